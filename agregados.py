@@ -0,0 +1,249 @@
+# Pandas e Numpy para as contagens
+import pandas as pd
+import numpy as np
+
+# Pickle e os para guardar o cubo ao lado do cache dos dados
+import os
+import pickle
+
+# Hashlib para a impressão digital dos dados
+import hashlib
+
+from leitura_dados import caminho_cache
+from distribuicao_pesos import histograma_log
+
+
+# Incrementar ao mudar o formato do cubo
+VERSAO_CUBO = 4
+
+# Dimensões contadas no cubo (as mesmas usadas pelos gráficos)
+DIMENSOES = [
+    'Ano',
+    'Mes',
+    'Dia',
+    'Dia da Semana',
+    'Hora do Dia',
+    'Municipio',
+    'AIS',
+    'Genero',
+    'Raca da Vitima',
+    'Idade da Vitima',
+    'Escolaridade da Vitima',
+    'Natureza',
+    'Meio Empregado',
+    'Tipo de Entorpecente',
+]
+
+# Pares de dimensões contados em conjunto (guardados no cubo como 'A/B'):
+# séries temporais por município/AIS e regiões das AIS nos mapas
+DIMENSOES_PARES = [
+    ('Dia', 'Municipio'),
+    ('Dia', 'AIS'),
+    ('Municipio', 'AIS'),
+]
+
+# Coluna numérica cuja distribuição (histograma em escala log) também é
+# guardada no cubo
+COLUNA_PESO = 'Quantidade (Kg)'
+
+
+# Classe com as contagens pré-calculadas de um conjunto de dados
+class CuboAgregado:
+    """Contagens de ocorrências por dimensão, calculadas uma única vez após a
+    validação dos dados. Os gráficos aceitam um cubo no lugar do DataFrame."""
+
+    def __init__(self, contagens, total, histograma_pesos=None):
+        self.contagens = contagens
+        self.total = total
+        self.histograma_pesos = histograma_pesos
+
+        self._impressao = None
+
+    def contagem(self, dimensao):
+        if dimensao not in self.contagens:
+            raise KeyError(f"Dimensão '{dimensao}' não disponível no cubo")
+        return self.contagens[dimensao]
+
+    def impressao_digital(self):
+        """Hash do conteúdo do cubo, calculado uma única vez"""
+        if getattr(self, '_impressao', None) is None:
+            h = hashlib.sha1(str(self.total).encode('ascii'))
+            for dimensao, serie in sorted(self.contagens.items()):
+                h.update(dimensao.encode('utf-8'))
+                h.update(pd.util.hash_pandas_object(serie).to_numpy().tobytes())
+            if self.histograma_pesos is not None:
+                h.update(np.ascontiguousarray(self.histograma_pesos).tobytes())
+            self._impressao = h.hexdigest()
+        return self._impressao
+
+    def __contains__(self, dimensao):
+        return dimensao in self.contagens
+
+    def __len__(self):
+        return self.total
+
+
+# Função para obter a série de uma dimensão, derivando as temporais
+def serie_dimensao(df, dimensao):
+    """Retorna a série de valores de uma dimensão do DataFrame"""
+    if dimensao == 'Ano':
+        return pd.to_datetime(df['Data'], errors='coerce').dt.year
+    if dimensao == 'Mes':
+        return pd.to_datetime(df['Data'], errors='coerce').dt.month
+    if dimensao == 'Dia':
+        return pd.to_datetime(df['Data'], errors='coerce').dt.normalize()
+    if dimensao == 'Hora do Dia':
+        # A coluna Hora guarda minutos desde a meia-noite
+        return df['Hora'] // 60
+    return df[dimensao]
+
+
+# Função para contar ocorrências de uma dimensão em um DataFrame ou cubo
+def contagem(dados, dimensao):
+    """Contagem de ocorrências por valor, em ordem decrescente (como value_counts).
+    Pares de dimensões ('Dia/Municipio') são contados por combinação de valores.
+    Cubos e outras fontes com contagem própria (banco_dados.ConjuntoSQL) respondem diretamente."""
+    if isinstance(dados, CuboAgregado) or hasattr(dados, 'contagem'):
+        return dados.contagem(dimensao)
+    if '/' in dimensao:
+        return _contar_pares(dados, *dimensao.split('/'))
+    return _contar(serie_dimensao(dados, dimensao))
+
+
+# Função para contar os valores de uma série
+def _contar(serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Colunas categóricas: uma única passada de np.bincount sobre os códigos
+        codigos = serie.cat.codes.to_numpy()
+        totais = np.bincount(codigos[codigos >= 0], minlength=len(serie.cat.categories))
+        contagens = pd.Series(totais, index=pd.Index(serie.cat.categories, name=serie.name), name='count')
+        contagens = contagens[contagens > 0]
+        return contagens.sort_values(ascending=False, kind='stable')
+    contagens = serie.value_counts()
+    # Colunas categóricas listam também as categorias sem ocorrências
+    contagens = contagens[contagens > 0]
+    if isinstance(contagens.index, pd.CategoricalIndex):
+        contagens.index = contagens.index.astype(contagens.index.categories.dtype)
+    return contagens
+
+
+# Função para contar as combinações de valores de duas dimensões
+def _contar_pares(df, primeira, segunda):
+    """Contagem por par de valores (só os pares com ocorrências)"""
+    pares = df.groupby([serie_dimensao(df, primeira), serie_dimensao(df, segunda)], observed=True).size()
+    return pares[pares > 0]
+
+
+# Função para identificar o conteúdo de um DataFrame ou cubo
+def impressao_digital(dados):
+    """Hash que muda sempre que o conteúdo dos dados muda"""
+    if dados is None:
+        return None
+    if isinstance(dados, CuboAgregado) or hasattr(dados, 'impressao_digital'):
+        return dados.impressao_digital()
+    hashes = pd.util.hash_pandas_object(dados, index=True).to_numpy()
+    h = hashlib.sha1(hashes.tobytes())
+    h.update(str(list(dados.columns)).encode('utf-8'))
+    return h.hexdigest()
+
+
+# Função para obter o histograma dos pesos positivos de um DataFrame ou cubo
+def histograma_pesos(dados):
+    """Contagem dos valores positivos de Quantidade (Kg) em cada faixa da
+    grade logarítmica de distribuicao_pesos (sem ordenar os valores)"""
+    if isinstance(dados, CuboAgregado) or hasattr(dados, 'histograma_pesos'):
+        return dados.histograma_pesos
+    valores = pd.to_numeric(dados[COLUNA_PESO], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    return histograma_log(valores)
+
+
+# Função para construir o cubo de contagens de um DataFrame
+def construir_cubo(df):
+    """Calcula as contagens de todas as dimensões presentes no DataFrame"""
+    contagens = {}
+    for dimensao in DIMENSOES:
+        try:
+            serie = serie_dimensao(df, dimensao)
+        except KeyError:
+            continue
+        contagens[dimensao] = _contar(serie)
+
+    for primeira, segunda in DIMENSOES_PARES:
+        if primeira in contagens and segunda in contagens:
+            contagens[f"{primeira}/{segunda}"] = _contar_pares(df, primeira, segunda)
+
+    pesos = None
+    if COLUNA_PESO in df.columns:
+        pesos = histograma_pesos(df)
+    return CuboAgregado(contagens, len(df), pesos)
+
+
+# Função para obter o cubo do cache ou construí-lo e gravá-lo
+def obter_cubo(df):
+    """Carrega o cubo gravado ao lado do cache dos dados ou o reconstrói"""
+    if df is None:
+        return None
+
+    caminho = df.attrs.get('caminho')
+    if caminho is None or not os.path.exists(caminho):
+        return construir_cubo(df)
+
+    arquivo = arquivo_cubo(caminho, df.attrs.get('incrementos', 0))
+    if os.path.exists(arquivo):
+        try:
+            with open(arquivo, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Cubo inválido em {arquivo}, reconstruindo: {str(e)}")
+
+    cubo = construir_cubo(df)
+    _salvar_cubo(cubo, arquivo)
+    return cubo
+
+
+# Função para obter o arquivo do cubo de uma planilha com n incrementos
+def arquivo_cubo(caminho, incrementos=0):
+    return f"{caminho_cache(caminho)}.cubo-v{VERSAO_CUBO}-{incrementos}.pkl"
+
+
+def _salvar_cubo(cubo, arquivo):
+    try:
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        with open(arquivo + '.tmp', 'wb') as f:
+            pickle.dump(cubo, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(arquivo + '.tmp', arquivo)
+    except Exception as e:
+        print(f"Não foi possível gravar o cubo: {str(e)}")
+
+
+# Função para somar ao cubo as contagens de registros novos
+def somar_cubo(cubo, df_novo):
+    """Retorna um novo cubo com as contagens de df_novo somadas às do cubo"""
+    delta = construir_cubo(df_novo)
+    contagens = dict(cubo.contagens)
+    for dimensao, serie in delta.contagens.items():
+        if dimensao in contagens:
+            anterior = contagens[dimensao]
+            serie = anterior.add(serie, fill_value=0).astype(anterior.dtype)
+        contagens[dimensao] = serie.sort_values(ascending=False, kind='stable')
+
+    # A grade dos histogramas é fixa, então basta somar as contagens
+    pesos = cubo.histograma_pesos
+    if delta.histograma_pesos is not None:
+        pesos = delta.histograma_pesos if pesos is None else pesos + delta.histograma_pesos
+    return CuboAgregado(contagens, cubo.total + delta.total, pesos)
+
+
+# Função para atualizar o cubo gravado após a ingestão de um incremento
+def atualizar_cubo_persistido(caminho, incrementos_anteriores, df_novo):
+    """Soma as contagens do incremento ao cubo gravado, sem reler o histórico.
+    Se o cubo anterior não existir, ele será reconstruído na próxima carga."""
+    anterior = arquivo_cubo(caminho, incrementos_anteriores)
+    if not os.path.exists(anterior):
+        return None
+    with open(anterior, 'rb') as f:
+        cubo = pickle.load(f)
+    cubo = somar_cubo(cubo, df_novo)
+    _salvar_cubo(cubo, arquivo_cubo(caminho, incrementos_anteriores + 1))
+    os.remove(anterior)
+    return cubo
@@ -0,0 +1,527 @@
+"""Banco de dados analítico (SQLite) com os dados tratados dos conjuntos.
+
+Os DataFrames limpos de leitura_dados são gravados uma única vez em um
+arquivo SQLite, normalizados em tabelas de dimensão (municipio, ais,
+natureza, meio_empregado, tipo_entorpecente, ...) e uma tabela de fatos por
+conjunto, com índices na data, no município e na AIS. Os gráficos recebem um
+ConjuntoSQL no lugar do DataFrame ou do cubo: cada contagem é um GROUP BY no
+banco, e os filtros viram cláusulas WHERE que usam os índices, então a
+memória do processo não cresce com o tamanho dos dados.
+
+Uso:
+    python banco_dados.py                          # grava/atualiza todos os conjuntos
+    python banco_dados.py --conjuntos crimes_violentos --forcar
+    python banco_dados.py --consulta "SELECT COUNT(*) FROM fato_crimes_violentos"
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Pandas e Numpy para preparar as linhas gravadas e montar as contagens
+import pandas as pd
+import numpy as np
+
+from agregados import DIMENSOES_PARES, COLUNA_PESO
+from distribuicao_pesos import FAIXAS, faixas_log
+from filtros import COLUNAS_FILTRAVEIS, chave_filtros
+from leitura_dados import DATASETS, DIRETORIO_CACHE, versao_conjunto
+
+
+# Arquivo padrão do banco (junto dos demais dados tratados)
+ARQUIVO_BANCO = os.path.join(DIRETORIO_CACHE, 'ocorrencias.sqlite')
+
+# Incrementar ao mudar o esquema das tabelas (força uma nova carga)
+VERSAO_BANCO = 1
+
+# Conexões de leitura abertas ao mesmo tempo por arquivo
+TAMANHO_POOL = 4
+
+# Cache de páginas de cada conexão de leitura, em KiB
+CACHE_SQLITE_KIB = 16 * 1024
+
+# Colunas categóricas e suas tabelas de dimensão (id, nome)
+DIMENSOES_SQL = {
+    'Municipio': 'municipio',
+    'AIS': 'ais',
+    'Natureza': 'natureza',
+    'Meio Empregado': 'meio_empregado',
+    'Tipo de Entorpecente': 'tipo_entorpecente',
+    'Genero': 'genero',
+    'Raca da Vitima': 'raca',
+    'Escolaridade da Vitima': 'escolaridade',
+    'Dia da Semana': 'dia_semana',
+}
+
+# Índices das tabelas de fatos. Os de município e AIS levam a data em
+# seguida: o filtro por local (com ou sem período) e a contagem por dia do
+# local são respondidos só pelo índice, sem ler as linhas da tabela.
+INDICES = [
+    ('data',),
+    ('municipio_id', 'data'),
+    ('ais_id', 'data'),
+]
+
+# Dimensões do cubo calculadas sobre colunas da tabela de fatos
+EXPRESSOES = {
+    'Ano': 'ano',
+    'Mes': 'mes',
+    'Dia': 'data',
+    'Hora do Dia': 'hora / 60',
+    'Idade da Vitima': 'idade',
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS cargas (
+    conjunto TEXT PRIMARY KEY,
+    chave TEXT NOT NULL,
+    registros INTEGER NOT NULL,
+    validacao TEXT,
+    gravado_em TEXT NOT NULL
+);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {tabela} (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE
+);
+""" for tabela in DIMENSOES_SQL.values())
+
+
+# Classe com um conjunto de conexões de leitura reaproveitadas
+class PoolConexoes:
+    """Conexões somente leitura com o banco, criadas sob demanda (até
+    `tamanho`) e devolvidas ao pool após cada consulta. Podem ser usadas de
+    qualquer thread (interface, desenho dos gráficos, servidor)."""
+
+    def __init__(self, arquivo, tamanho=TAMANHO_POOL):
+        self.arquivo = arquivo
+        self.tamanho = tamanho
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+
+    @contextmanager
+    def conexao(self):
+        try:
+            con = self._livres.get_nowait()
+        except queue.Empty:
+            with self._trava:
+                criar = self._criadas < self.tamanho
+                if criar:
+                    self._criadas += 1
+            # Com o pool cheio, espera uma conexão ser devolvida
+            con = self._abrir() if criar else self._livres.get()
+        try:
+            yield con
+        finally:
+            self._livres.put(con)
+
+    def _abrir(self):
+        con = sqlite3.connect(self.arquivo, check_same_thread=False)
+        con.execute('PRAGMA query_only = ON')
+        con.execute(f'PRAGMA cache_size = -{CACHE_SQLITE_KIB}')
+        return con
+
+    def consultar(self, sql, parametros=()):
+        with self.conexao() as con:
+            return con.execute(sql, parametros).fetchall()
+
+    def fechar(self):
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_trava_pools = threading.Lock()
+
+
+# Função para obter o pool (um por arquivo e por processo)
+def pool_conexoes(arquivo=ARQUIVO_BANCO):
+    arquivo = os.path.abspath(arquivo)
+    with _trava_pools:
+        pool = _pools.get(arquivo)
+        if pool is None:
+            pool = PoolConexoes(arquivo)
+            _pools[arquivo] = pool
+        return pool
+
+
+# Classe que responde às contagens dos gráficos com consultas ao banco
+class ConjuntoSQL:
+    """Um conjunto de dados gravado no banco, opcionalmente filtrado.
+
+    Aceito pelos gráficos no lugar do DataFrame ou do cubo (contagem,
+    histograma_pesos, impressao_digital) e pela interface no lugar do
+    IndiceFiltros (colunas, valores, filtrar). Só guarda o arquivo, o nome e
+    os critérios; pode ser enviado a outros processos, que abrem suas
+    próprias conexões."""
+
+    def __init__(self, nome, arquivo=ARQUIVO_BANCO, criterios=None):
+        self.nome = nome
+        self.arquivo = arquivo
+        self.criterios = dict(criterios or {})
+        self.tabela = f"fato_{nome}"
+        self._cache = {}
+
+    def __getstate__(self):
+        return {'nome': self.nome, 'arquivo': self.arquivo, 'criterios': self.criterios}
+
+    def __setstate__(self, estado):
+        self.__init__(estado['nome'], estado['arquivo'], estado['criterios'])
+
+    def _consultar(self, sql, parametros=()):
+        return pool_conexoes(self.arquivo).consultar(sql, parametros)
+
+    def _colunas_fato(self):
+        """Colunas da tabela de fatos (lidas uma única vez)"""
+        if 'colunas' not in self._cache:
+            self._cache['colunas'] = {linha[1] for linha in self._consultar(f"PRAGMA table_info({self.tabela})")}
+        return self._cache['colunas']
+
+    def _carga(self):
+        if 'carga' not in self._cache:
+            linhas = self._consultar("SELECT chave, registros, validacao FROM cargas WHERE conjunto = ?", (self.nome,))
+            if not linhas:
+                raise KeyError(f"Conjunto '{self.nome}' não gravado em {self.arquivo}")
+            self._cache['carga'] = linhas[0]
+        return self._cache['carga']
+
+    # Expressão SQL e tabela de dimensão (ou None) de uma dimensão do cubo
+    def _expressao(self, dimensao):
+        tabela = DIMENSOES_SQL.get(dimensao)
+        if tabela is not None:
+            coluna = f"{tabela}_id"
+        elif dimensao in EXPRESSOES:
+            coluna = EXPRESSOES[dimensao].split()[0]
+        else:
+            coluna = None
+        if coluna not in self._colunas_fato():
+            raise KeyError(f"Dimensão '{dimensao}' não disponível no banco")
+        return f"f.{coluna}" if tabela else f"f.{EXPRESSOES[dimensao]}", tabela
+
+    # Cláusulas WHERE dos critérios de filtro
+    def _condicoes(self):
+        condicoes, parametros = [], []
+        for coluna, selecionados in self.criterios.items():
+            if not isinstance(selecionados, (list, tuple, set, range)):
+                selecionados = [selecionados]
+            selecionados = list(selecionados)
+            if coluna == 'Ano':
+                # Anos viram intervalos de datas, para usar o índice da data
+                faixas = _intervalos(sorted(int(ano) for ano in selecionados))
+                condicoes.append('(' + (' OR '.join(['f.data BETWEEN ? AND ?'] * len(faixas)) or '0') + ')')
+                for inicio, fim in faixas:
+                    parametros += [f"{inicio:04d}-01-01", f"{fim:04d}-12-31"]
+            elif coluna == 'Mes':
+                condicoes.append(f"f.mes IN ({', '.join('?' * len(selecionados))})")
+                parametros += [int(mes) for mes in selecionados]
+            else:
+                expressao, tabela = self._expressao(coluna)
+                condicoes.append(f"{expressao} IN (SELECT id FROM {tabela} WHERE nome IN "
+                                 f"({', '.join('?' * len(selecionados))}))")
+                parametros += [str(valor) for valor in selecionados]
+        return condicoes, parametros
+
+    def contagem(self, dimensao):
+        """Contagem de ocorrências por valor (ou par de valores, 'Dia/Municipio'),
+        no mesmo formato de agregados.contagem"""
+        dimensoes = dimensao.split('/')
+        calculados, agrupados, selecionados, juncoes = [], [], [], []
+        condicoes, parametros = self._condicoes()
+        for posicao, nome in enumerate(dimensoes):
+            expressao, tabela = self._expressao(nome)
+            calculados.append(f"{expressao} AS v{posicao}")
+            # Com filtros, os índices servem ao WHERE; agrupar pela ordem de um
+            # índice ('+' desliga esse uso) faria uma leitura aleatória por linha
+            agrupados.append(f"+{expressao}" if self.criterios else expressao)
+            if tabela is None:
+                selecionados.append(f"t.v{posicao}")
+                condicoes.append(f"{expressao} IS NOT NULL")
+            else:
+                # Os nomes vêm das dimensões só para as linhas já agrupadas
+                apelido = f"d{posicao}"
+                selecionados.append(f"{apelido}.nome")
+                juncoes.append(f"JOIN {tabela} {apelido} ON {apelido}.id = t.v{posicao}")
+        # Uma dimensão: da maior contagem para a menor; pares: pela ordem dos valores
+        ordem = 'total DESC, 1' if len(dimensoes) == 1 else ', '.join(str(i + 1) for i in range(len(dimensoes)))
+        sql = (f"SELECT {', '.join(selecionados)}, t.total FROM "
+               f"(SELECT {', '.join(calculados)}, COUNT(*) AS total FROM {self.tabela} f {_onde(condicoes)} "
+               f"GROUP BY {', '.join(agrupados)}) t {' '.join(juncoes)} ORDER BY {ordem}")
+        linhas = self._consultar(sql, parametros)
+
+        colunas = list(zip(*linhas)) or [()] * (len(dimensoes) + 1)
+        niveis = [_valores_indice(nome, valores) for nome, valores in zip(dimensoes, colunas)]
+        totais = np.array(colunas[-1], dtype='int64')
+        if len(dimensoes) == 1:
+            return pd.Series(totais, index=niveis[0], name='count')
+        return pd.Series(totais, index=pd.MultiIndex.from_arrays(niveis))
+
+    @property
+    def histograma_pesos(self):
+        """Histograma de Quantidade (Kg) na grade de distribuicao_pesos, a
+        partir da faixa gravada de cada registro"""
+        if 'faixa_peso' not in self._colunas_fato():
+            return None
+        condicoes, parametros = self._condicoes()
+        linhas = self._consultar(f"SELECT f.faixa_peso, COUNT(*) FROM {self.tabela} f "
+                                 f"{_onde(condicoes + ['f.faixa_peso IS NOT NULL'])} GROUP BY f.faixa_peso",
+                                 parametros)
+        contagens = np.zeros(FAIXAS, dtype='int64')
+        for faixa, total in linhas:
+            contagens[faixa] = total
+        return contagens
+
+    @property
+    def attrs(self):
+        """Relatório de validação gravado na carga (como df.attrs)"""
+        validacao = self._carga()[2]
+        return {'validacao': json.loads(validacao)} if validacao and not self.criterios else {}
+
+    def impressao_digital(self):
+        h = hashlib.sha1(f"{os.path.abspath(self.arquivo)}:{self.nome}:{self._carga()[0]}".encode('utf-8'))
+        h.update(repr(chave_filtros(self.criterios)).encode('utf-8'))
+        return h.hexdigest()
+
+    # Mesma interface do IndiceFiltros
+    def colunas(self):
+        colunas = [coluna for coluna in COLUNAS_FILTRAVEIS
+                   if f"{DIMENSOES_SQL[coluna]}_id" in self._colunas_fato()]
+        if 'data' in self._colunas_fato():
+            colunas += ['Ano', 'Mes']
+        return colunas
+
+    def valores(self, coluna):
+        """Valores distintos da coluna, em ordem"""
+        if coluna == 'Ano':
+            primeiro, ultimo = self._consultar(f"SELECT MIN(ano), MAX(ano) FROM {self.tabela}")[0]
+            return [] if primeiro is None else list(range(primeiro, ultimo + 1))
+        if coluna == 'Mes':
+            return list(range(1, 13))
+        expressao, tabela = self._expressao(coluna)
+        linhas = self._consultar(f"SELECT nome FROM {tabela} WHERE id IN "
+                                 f"(SELECT DISTINCT {expressao[2:]} FROM {self.tabela}) ORDER BY nome")
+        return [linha[0] for linha in linhas]
+
+    def filtrar(self, criterios):
+        """Conjunto com os critérios somados aos atuais (nenhuma linha é lida)"""
+        if not criterios:
+            return self
+        return ConjuntoSQL(self.nome, self.arquivo, {**self.criterios, **criterios})
+
+    def __contains__(self, dimensao):
+        try:
+            for nome in dimensao.split('/'):
+                self._expressao(nome)
+        except KeyError:
+            return False
+        return '/' not in dimensao or tuple(dimensao.split('/')) in DIMENSOES_PARES
+
+    def __len__(self):
+        if 'total' not in self._cache:
+            if self.criterios:
+                condicoes, parametros = self._condicoes()
+                total = self._consultar(f"SELECT COUNT(*) FROM {self.tabela} f {_onde(condicoes)}", parametros)[0][0]
+            else:
+                total = self._carga()[1]
+            self._cache['total'] = total
+        return self._cache['total']
+
+    def __repr__(self):
+        return f"ConjuntoSQL({self.nome!r}, {self.arquivo!r}, {self.criterios!r})"
+
+
+def _onde(condicoes):
+    return f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+
+
+# Função para juntar anos consecutivos em intervalos (inicio, fim)
+def _intervalos(anos):
+    intervalos = []
+    for ano in anos:
+        if intervalos and ano <= intervalos[-1][1] + 1:
+            intervalos[-1] = (intervalos[-1][0], max(ano, intervalos[-1][1]))
+        else:
+            intervalos.append((ano, ano))
+    return intervalos
+
+
+# Função para converter os valores lidos do banco no índice da contagem
+def _valores_indice(dimensao, valores):
+    if dimensao == 'Dia':
+        return pd.DatetimeIndex(np.array(valores, dtype='datetime64[ns]'), name=dimensao)
+    return pd.Index(list(valores), name=dimensao)
+
+
+# Função para converter um vetor em lista para o sqlite3 (que não aceita tipos do numpy)
+def _lista_sql(valores, nulos):
+    lista = valores.tolist()
+    for posicao in np.flatnonzero(nulos):
+        lista[posicao] = None
+    return lista
+
+
+# Função para abrir a conexão de escrita e criar as tabelas de dimensão
+def _conexao_escrita(arquivo):
+    pasta = os.path.dirname(os.path.abspath(arquivo))
+    os.makedirs(pasta, exist_ok=True)
+    con = sqlite3.connect(arquivo)
+    # WAL: as conexões de leitura continuam consultando durante uma nova carga
+    con.execute('PRAGMA journal_mode = WAL')
+    con.execute('PRAGMA synchronous = NORMAL')
+    con.execute('PRAGMA foreign_keys = ON')
+    con.executescript(ESQUEMA)
+    return con
+
+
+# Função para converter os códigos de uma coluna categórica nos ids da dimensão
+def _ids_dimensao(con, tabela, serie):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    nomes = [str(valor) for valor in valores]
+    con.executemany(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", [(nome,) for nome in nomes])
+    ids = dict(con.execute(f"SELECT nome, id FROM {tabela}"))
+    # O código -1 (valor ausente) aponta para a posição extra no fim
+    mapa = np.array([ids[nome] for nome in nomes] + [0], dtype='int64')
+    return _lista_sql(mapa[codigos], codigos < 0)
+
+
+# Função para montar as colunas da tabela de fatos a partir do DataFrame
+def _colunas_fato(con, df):
+    """Retorna [(coluna, tipo SQL, valores)] das colunas presentes no DataFrame"""
+    colunas = []
+    if 'Data' in df.columns:
+        datas = pd.to_datetime(df['Data'], errors='coerce')
+        # Datas formatadas uma vez por dia distinto, não por linha
+        codigos, dias = pd.factorize(datas.dt.normalize())
+        textos = np.array(list(dias.strftime('%Y-%m-%d')) + [None], dtype=object)
+        nulos = datas.isna().to_numpy()
+        colunas.append(('data', 'TEXT', textos[codigos].tolist()))
+        colunas.append(('ano', 'INTEGER', _lista_sql(datas.dt.year.fillna(0).to_numpy(dtype='int64'), nulos)))
+        colunas.append(('mes', 'INTEGER', _lista_sql(datas.dt.month.fillna(0).to_numpy(dtype='int64'), nulos)))
+    for coluna, nome in (('Hora', 'hora'), ('Idade da Vitima', 'idade')):
+        if coluna in df.columns:
+            valores = pd.to_numeric(df[coluna], errors='coerce')
+            colunas.append((nome, 'INTEGER', _lista_sql(valores.fillna(0).to_numpy(dtype='int64'),
+                                                        valores.isna().to_numpy())))
+    if COLUNA_PESO in df.columns:
+        pesos = pd.to_numeric(df[COLUNA_PESO], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        faixas = faixas_log(pesos)
+        colunas.append(('quantidade', 'REAL', _lista_sql(pesos, np.isnan(pesos))))
+        colunas.append(('faixa_peso', 'INTEGER', _lista_sql(faixas, faixas < 0)))
+    for coluna, tabela in DIMENSOES_SQL.items():
+        if coluna in df.columns:
+            colunas.append((f"{tabela}_id", f"INTEGER REFERENCES {tabela}(id)",
+                            _ids_dimensao(con, tabela, df[coluna])))
+    return colunas
+
+
+# Função para gravar um conjunto de dados tratado no banco
+def ingerir_conjunto(nome, df, arquivo=ARQUIVO_BANCO, chave=None):
+    """Substitui a tabela de fatos do conjunto pelos registros do DataFrame,
+    em uma única transação, e registra a carga (chave de versão e relatório
+    de validação) na tabela cargas"""
+    inicio = time.perf_counter()
+    tabela = f"fato_{nome}"
+    if 'Data' in df.columns:
+        # Linhas gravadas em ordem de data: um período ocupa páginas vizinhas
+        df = df.iloc[np.argsort(df['Data'].to_numpy(), kind='stable')]
+    con = _conexao_escrita(arquivo)
+    try:
+        with con:
+            colunas = _colunas_fato(con, df)
+            con.execute(f"DROP TABLE IF EXISTS {tabela}")
+            definicoes = ', '.join(f"{coluna} {tipo}" for coluna, tipo, _ in colunas)
+            con.execute(f"CREATE TABLE {tabela} (id INTEGER PRIMARY KEY, {definicoes})")
+            con.executemany(f"INSERT INTO {tabela} ({', '.join(coluna for coluna, _, _ in colunas)}) "
+                            f"VALUES ({', '.join('?' * len(colunas))})",
+                            zip(*(valores for _, _, valores in colunas)))
+            # Índices criados depois da inserção (mais rápido que mantê-los linha a linha)
+            presentes = {coluna for coluna, _, _ in colunas}
+            for indexadas in INDICES:
+                if presentes.issuperset(indexadas):
+                    con.execute(f"CREATE INDEX idx_{tabela}_{'_'.join(indexadas)} ON {tabela} ({', '.join(indexadas)})")
+            validacao = df.attrs.get('validacao')
+            con.execute("INSERT OR REPLACE INTO cargas VALUES (?, ?, ?, ?, ?)",
+                        (nome, chave or '', len(df), json.dumps(validacao) if validacao else None,
+                         time.strftime('%Y-%m-%d %H:%M:%S')))
+        # Estatísticas para o planejador escolher entre os índices
+        con.execute('ANALYZE')
+    finally:
+        con.close()
+    print(f"{len(df)} registros de {nome} gravados em {arquivo} ({time.perf_counter() - inicio:.1f} s)")
+
+
+# Função para obter a chave de versão gravada na carga de um conjunto
+def chave_gravada(nome, arquivo=ARQUIVO_BANCO):
+    if not os.path.exists(arquivo):
+        return None
+    try:
+        con = sqlite3.connect(arquivo)
+        try:
+            linha = con.execute("SELECT chave FROM cargas WHERE conjunto = ?", (nome,)).fetchone()
+        finally:
+            con.close()
+    except sqlite3.Error:
+        return None
+    return linha[0] if linha else None
+
+
+# Função para obter um conjunto do banco, gravando-o antes se estiver desatualizado
+def obter_conjunto(nome, arquivo=ARQUIVO_BANCO, forcar=False):
+    """ConjuntoSQL do conjunto (None se indisponível). Se a planilha, o
+    código de limpeza ou os incrementos mudaram desde a última carga, o
+    conjunto é carregado por leitura_dados e gravado de novo; senão, nenhum
+    dado é lido para a memória."""
+    versao = versao_conjunto(nome)
+    chave = None if versao is None else f"{VERSAO_BANCO}-{versao}"
+    gravada = chave_gravada(nome, arquivo)
+    if forcar or (chave is not None and chave != gravada):
+        df = DATASETS[nome]()
+        if df is None:
+            return None
+        ingerir_conjunto(nome, df, arquivo, chave)
+        del df
+    elif gravada is None:
+        print(f"Conjunto {nome} indisponível")
+        return None
+    return ConjuntoSQL(nome, arquivo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava os conjuntos de dados no banco SQLite e faz consultas.")
+    parser.add_argument('--banco', default=ARQUIVO_BANCO, help="arquivo do banco")
+    parser.add_argument('--conjuntos', nargs='+', choices=list(DATASETS), help="conjuntos de dados a gravar")
+    parser.add_argument('--forcar', action='store_true', help="grava de novo mesmo se estiver em dia")
+    parser.add_argument('--consulta', help="consulta SQL executada após a gravação")
+    args = parser.parse_args(argv)
+
+    for nome in args.conjuntos or list(DATASETS):
+        conjunto = obter_conjunto(nome, args.banco, args.forcar)
+        if conjunto is not None:
+            print(f"{nome}: {len(conjunto)} registros")
+    if os.path.exists(args.banco):
+        print(f"Banco: {args.banco} ({os.path.getsize(args.banco) / 1024 ** 2:.1f} MiB)")
+
+    if args.consulta:
+        try:
+            with pool_conexoes(args.banco).conexao() as con:
+                print(pd.read_sql_query(args.consulta, con).to_string())
+        except Exception as e:
+            print(f"Erro na consulta: {str(e)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
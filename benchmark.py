@@ -0,0 +1,212 @@
+"""Medição de desempenho das etapas de leitura, limpeza, agregação e desenho.
+
+Gera (ou reaproveita) arquivos sintéticos de cada conjunto de dados nos
+tamanhos pedidos e mede, sem interface gráfica:
+    leitura          pd.read_excel (.xlsx) ou pd.read_csv (.csv)
+    ler_em_blocos    leitura em blocos com o motor mais rápido disponível
+    limpar_colunas, tratar_dados, aplicar_esquema, validar_dados
+    construir_cubo
+    cada gráfico do registro, a partir do DataFrame e do cubo
+
+O resultado é gravado em JSON (um arquivo por commit) e pode ser comparado
+com um resultado anterior para encontrar regressões.
+
+Uso:
+    python benchmark.py --linhas 10000 100000
+    python benchmark.py --linhas 10000 100000 1000000 10000000 --conjuntos crimes_violentos
+    python benchmark.py --comparar resultados_benchmark/abc1234.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+import numpy as np
+import pandas as pd
+
+import leitura_dados
+from agregados import construir_cubo
+from dados_sinteticos import COLUNAS, gerar_arquivo
+from registro_graficos import MENUS, configurar_estilo, resolver
+
+
+# Tamanhos da série completa; o padrão roda só os dois primeiros
+TAMANHOS = (10000, 100000, 1000000, 10000000)
+
+PASTA_RESULTADOS = 'resultados_benchmark'
+
+# Regressões menores que isto (em segundos) são consideradas ruído
+DIFERENCA_MINIMA = 0.005
+
+
+# Função para medir o melhor tempo de uma etapa
+def medir(funcao, entrada=None, repeticoes=1):
+    """Executa funcao(cópia da entrada) e retorna (melhor tempo, último resultado).
+    A cópia da entrada não entra na medição, pois as etapas alteram o DataFrame."""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        copia = entrada.copy() if isinstance(entrada, pd.DataFrame) else entrada
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcao(copia) if entrada is not None else funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+# Função para desenhar um gráfico em uma figura sem janela
+def _desenhar(funcao, dados):
+    figura = Figure(figsize=(10, 6))
+    funcao(dados, ax=figura.add_subplot(111))
+    figura.tight_layout()
+    figura.savefig(io.BytesIO(), format='png', dpi=100)
+
+
+# Função para medir todas as etapas de um conjunto de dados em um tamanho
+def medir_conjunto(nome, linhas, repeticoes=1, formato='auto'):
+    inicio = time.perf_counter()
+    caminho = gerar_arquivo(nome, linhas, formato)
+    geracao = time.perf_counter() - inicio
+    esquema = leitura_dados.CONJUNTOS[nome][1]
+
+    if caminho.endswith('.csv'):
+        ler = lambda: pd.read_csv(caminho)
+    else:
+        ler = lambda: pd.read_excel(caminho)
+
+    fases = {}
+    fases['leitura'], df = medir(ler, repeticoes=repeticoes)
+    fases['ler_em_blocos'], _ = medir(lambda: sum(len(bloco) for bloco, _ in leitura_dados.ler_em_blocos(caminho)),
+                                      repeticoes=repeticoes)
+    fases['limpar_colunas'], df = medir(leitura_dados.limpar_colunas, df, repeticoes)
+    fases['tratar_dados'], df = medir(lambda d: leitura_dados.tratar_dados(d, exibir_estatisticas=False), df,
+                                      repeticoes)
+    fases['aplicar_esquema'], df = medir(lambda d: leitura_dados.aplicar_esquema(d, esquema, relatorio=False), df,
+                                         repeticoes)
+    fases['validar_dados'], _ = medir(leitura_dados.validar_dados, df, repeticoes)
+    fases['construir_cubo'], cubo = medir(construir_cubo, df, repeticoes)
+
+    graficos = {}
+    for grafico in MENUS[nome].graficos:
+        funcao = resolver(grafico)
+        graficos[grafico.funcao] = {
+            'df': round(medir(lambda d: _desenhar(funcao, d), df, repeticoes)[0], 4),
+            'cubo': round(medir(lambda c: _desenhar(funcao, c), cubo, repeticoes)[0], 4),
+        }
+
+    return {
+        'conjunto': nome,
+        'linhas': linhas,
+        'arquivo': os.path.basename(caminho),
+        'geracao_segundos': round(geracao, 4),
+        'memoria_mib': round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+        'fases': {fase: round(segundos, 4) for fase, segundos in fases.items()},
+        'graficos': graficos,
+    }
+
+
+# Função para identificar o commit atual (None fora de um repositório git)
+def commit_atual():
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Função para executar o benchmark e gravar o resultado em JSON
+def executar(conjuntos, tamanhos, repeticoes=1, formato='auto', saida=None):
+    configurar_estilo()
+    commit = commit_atual()
+    resultado = {
+        'commit': commit,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'maquina': f"{platform.machine()} {os.cpu_count()} CPUs",
+        'repeticoes': repeticoes,
+        'resultados': [],
+    }
+    for linhas in tamanhos:
+        for nome in conjuntos:
+            print(f"{nome} ({linhas} linhas)...", flush=True)
+            resultado['resultados'].append(medir_conjunto(nome, linhas, repeticoes, formato))
+
+    saida = saida or os.path.join(PASTA_RESULTADOS, f"{commit or 'sem-commit'}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"Resultado gravado em {saida}")
+    return resultado
+
+
+# Função para achatar o resultado em {(conjunto, linhas, medida): segundos}
+def _tempos(resultado):
+    tempos = {}
+    for item in resultado['resultados']:
+        chave = (item['conjunto'], item['linhas'])
+        for fase, segundos in item['fases'].items():
+            tempos[chave + (fase,)] = segundos
+        for grafico, origens in item['graficos'].items():
+            for origem, segundos in origens.items():
+                tempos[chave + (f"{grafico} ({origem})",)] = segundos
+    return tempos
+
+
+# Função para comparar dois resultados e listar as regressões
+def comparar(anterior, atual, tolerancia=0.2):
+    """Imprime as medidas comuns aos dois resultados e retorna as que ficaram
+    mais lentas que o anterior além da tolerância relativa"""
+    antes, depois = _tempos(anterior), _tempos(atual)
+    regressoes = []
+    print(f"\nComparação com {anterior.get('commit')} ({anterior.get('data')}):")
+    print(f"{'Conjunto':<18} {'Linhas':>9} {'Medida':<38} {'Antes':>9} {'Depois':>9} {'Razão':>7}")
+    for chave in sorted(set(antes) & set(depois)):
+        razao = depois[chave] / antes[chave] if antes[chave] else float('inf')
+        regrediu = razao > 1 + tolerancia and depois[chave] - antes[chave] > DIFERENCA_MINIMA
+        if regrediu:
+            regressoes.append(chave)
+        nome, linhas, medida = chave
+        print(f"{nome:<18} {linhas:>9} {medida:<38} {antes[chave]:>9.4f} {depois[chave]:>9.4f} {razao:>6.2f}x"
+              + ("  REGRESSÃO" if regrediu else ""))
+    print(f"{len(regressoes)} regressões acima de {tolerancia:.0%}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o desempenho com dados sintéticos.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(TAMANHOS[:2]),
+                        help=f"tamanhos a medir (série completa: {' '.join(map(str, TAMANHOS))})")
+    parser.add_argument('--conjuntos', nargs='+', choices=list(COLUNAS), default=list(COLUNAS))
+    parser.add_argument('--repeticoes', type=int, default=3, help="melhor de n execuções de cada etapa")
+    parser.add_argument('--formato', choices=['auto', 'xlsx', 'csv'], default='auto',
+                        help="formato dos arquivos sintéticos (auto: .xlsx até 100 mil linhas)")
+    parser.add_argument('--saida', help=f"arquivo JSON (padrão: {PASTA_RESULTADOS}/<commit>.json)")
+    parser.add_argument('--comparar', help="resultado anterior (JSON) para procurar regressões")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="aumento relativo tolerado (padrão: 0.2)")
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.conjuntos, args.linhas, args.repeticoes, args.formato, args.saida)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        if comparar(anterior, resultado, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
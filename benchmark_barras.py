@@ -0,0 +1,89 @@
+"""Comparação de tempo entre os gráficos de barras do seaborn e grafico_barras.
+
+Para cada coluna categórica, mede o desenho a partir do DataFrame com:
+    countplot  sns.countplot com order=value_counts (caminho original)
+    barplot    contagem + sns.barplot
+    barras     contagem (np.bincount) + ax.barh
+
+Uso:
+    python benchmark_barras.py --repeticoes 5
+"""
+import argparse
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from agregados import contagem
+from grafico_barras import barras
+from leitura_dados import DATASETS
+from registro_graficos import configurar_estilo
+
+
+# Colunas comparadas em cada conjunto de dados
+COLUNAS = {
+    'entorpecentes': ['Tipo de Entorpecente', 'Municipio', 'AIS'],
+    'crimes_violentos': ['Meio Empregado', 'Natureza', 'Escolaridade da Vitima', 'Municipio', 'AIS'],
+    'crimes_sexuais': ['Raca da Vitima', 'Escolaridade da Vitima', 'Municipio', 'AIS'],
+}
+
+
+def _countplot(df, coluna, ax):
+    import seaborn as sns
+    sns.countplot(y=coluna, data=df, order=df[coluna].value_counts().index, ax=ax)
+
+
+def _barplot(df, coluna, ax):
+    import seaborn as sns
+    contagens = contagem(df, coluna)
+    sns.barplot(x=contagens.values, y=contagens.index, order=contagens.index, ax=ax)
+
+
+def _barras(df, coluna, ax):
+    barras(contagem(df, coluna), ax)
+
+
+METODOS = {'countplot': _countplot, 'barplot': _barplot, 'barras': _barras}
+
+
+# Função para medir o melhor tempo de desenho de um método
+def medir(metodo, df, coluna, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        figura = Figure(figsize=(10, 6))
+        FigureCanvasAgg(figura)
+        ax = figura.add_subplot(111)
+        inicio = time.perf_counter()
+        metodo(df, coluna, ax)
+        figura.canvas.draw()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara o seaborn com o desenho direto das barras.")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--conjuntos', nargs='+', choices=list(COLUNAS), default=list(COLUNAS))
+    args = parser.parse_args(argv)
+
+    configurar_estilo()
+    print(f"{'Conjunto':<18} {'Coluna':<24} " + " ".join(f"{nome:>11}" for nome in METODOS) + f" {'Ganho':>7}")
+    for nome in args.conjuntos:
+        df = DATASETS[nome]()
+        if df is None:
+            print(f"Conjunto {nome} indisponível")
+            continue
+        for coluna in COLUNAS[nome]:
+            if coluna not in df.columns:
+                continue
+            tempos = {metodo: medir(funcao, df, coluna, args.repeticoes) for metodo, funcao in METODOS.items()}
+            ganho = tempos['countplot'] / tempos['barras']
+            print(f"{nome:<18} {coluna:<24} "
+                  + " ".join(f"{tempos[metodo] * 1000:>8.1f} ms" for metodo in METODOS)
+                  + f" {ganho:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# Multiprocessing para carregar as planilhas em paralelo, fora do GIL
+import multiprocessing
+import os
+import secrets
+import sys
+
+# PyQt para avisar a interface por sinais
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+# Conjuntos de dados carregados pela aplicação (chaves de leitura_dados.DATASETS).
+# O pandas só é importado nos processos filhos, para não atrasar a abertura da janela.
+NOMES_DATASETS = ('entorpecentes', 'crimes_violentos', 'crimes_sexuais')
+
+# Consultar os dados no banco SQLite (banco_dados) em vez de mantê-los em memória.
+# Ativado com a opção --banco ou com a variável de ambiente TRABALHO_BD_BANCO=1.
+USAR_BANCO = os.environ.get('TRABALHO_BD_BANCO') == '1' or '--banco' in sys.argv
+
+
+# Função executada no processo filho: carrega os dados e pré-calcula as contagens
+def _carregar_dataset(nome, usar_banco=False, segmento=None):
+    if usar_banco:
+        # O DataFrame só é lido (no processo filho) se o banco estiver
+        # desatualizado; a interface recebe apenas o acesso ao banco
+        from banco_dados import obter_conjunto
+
+        conjunto = obter_conjunto(nome)
+        return conjunto, conjunto
+
+    from agregados import obter_cubo
+    from leitura_dados import DATASETS
+    from memoria_compartilhada import publicar, entregar
+
+    df = DATASETS[nome]()
+    if df is None:
+        return None, None
+    cubo = obter_cubo(df)
+    # Calculada aqui para chegar pronta à interface (chave do cache de gráficos)
+    cubo.impressao_digital()
+    # O DataFrame vai para a interface em memória compartilhada: só a
+    # descrição das colunas é serializada, e a interface assume o segmento
+    # (com o nome escolhido por ela, para removê-lo se a carga for cancelada)
+    dados = publicar(df, segmento)
+    entregar(dados)
+    return dados, cubo
+
+
+# Classe que carrega os conjuntos de dados em processos separados
+class CarregadorDados(QObject):
+    """Executa as funções carregar_* em um pool de processos e avisa a
+    interface, por sinais, à medida que cada conjunto de dados fica pronto"""
+
+    # Nome do conjunto, DataFrame carregado e seu cubo de contagens
+    # (ambos None em caso de falha; com o banco, o mesmo ConjuntoSQL nos dois)
+    dataset_carregado = pyqtSignal(str, object, object)
+    # Nome do conjunto e mensagem de erro
+    erro = pyqtSignal(str, str)
+    # Emitido quando todos os conjuntos terminaram (ou a carga foi cancelada)
+    concluido = pyqtSignal()
+
+    def __init__(self, tarefas=None, parent=None, usar_banco=USAR_BANCO):
+        super().__init__(parent)
+        self.tarefas = tuple(tarefas or NOMES_DATASETS)
+        self.usar_banco = usar_banco
+        self._pool = None
+        self._pendentes = set()
+        self._segmentos = {}
+
+    def iniciar(self):
+        """Dispara a carga de todos os conjuntos de dados em paralelo"""
+        # 'spawn' evita herdar o estado do Qt no processo filho
+        contexto = multiprocessing.get_context('spawn')
+        self._pool = contexto.Pool(processes=len(self.tarefas))
+        self._pendentes = set(self.tarefas)
+        # Nomes dos segmentos de memória compartilhada de cada conjunto (curtos:
+        # alguns sistemas limitam o nome a 31 caracteres)
+        prefixo = f"tbd_{secrets.token_hex(4)}"
+        self._segmentos = {nome: f"{prefixo}_{i}" for i, nome in enumerate(self.tarefas)}
+        for nome in self.tarefas:
+            self._pool.apply_async(
+                _carregar_dataset,
+                (nome, self.usar_banco, self._segmentos[nome]),
+                callback=lambda resultado, nome=nome: self._finalizar(nome, *resultado),
+                error_callback=lambda e, nome=nome: self._falhar(nome, e),
+            )
+        self._pool.close()
+
+    def cancelar(self):
+        """Interrompe os processos que ainda estão carregando dados"""
+        if self._pool is None:
+            return
+        self._pool.terminate()
+        self._pool = None
+        if self._pendentes:
+            if not self.usar_banco:
+                # Os processos interrompidos podem ter publicado o DataFrame sem
+                # que a interface o assumisse; o segmento ficaria em /dev/shm
+                from memoria_compartilhada import remover
+                for nome in self._pendentes:
+                    remover(self._segmentos[nome])
+            self._pendentes.clear()
+            self.concluido.emit()
+
+    def em_andamento(self):
+        return bool(self._pendentes)
+
+    # Os callbacks rodam na thread de resultados do pool; os sinais chegam
+    # à interface pela fila de eventos do Qt
+    def _finalizar(self, nome, df, cubo):
+        if df is not None and not self.usar_banco:
+            # Assumir o segmento mesmo se a carga foi cancelada, para que
+            # ele seja removido quando a aplicação terminar
+            from memoria_compartilhada import anexar
+            df = anexar(df, assumir=True)
+        if nome not in self._pendentes:
+            return
+        self._pendentes.discard(nome)
+        self.dataset_carregado.emit(nome, df, cubo)
+        if not self._pendentes:
+            self.concluido.emit()
+
+    def _falhar(self, nome, excecao):
+        if nome not in self._pendentes:
+            return
+        self.erro.emit(nome, str(excecao))
+        self._finalizar(nome, None, None)
@@ -0,0 +1,81 @@
+"""Conversão das planilhas para um formato colunar de leitura rápida.
+
+Grava, ao lado de cada planilha, um arquivo .parquet (ou .feather) com as
+mesmas colunas e valores brutos. As funções carregar_* passam a ler o
+arquivo convertido automaticamente enquanto ele não for mais antigo que a
+planilha (ver leitura_dados.arquivo_dados).
+
+Uso:
+    python converter_planilhas.py                 # planilhas dos três conjuntos
+    python converter_planilhas.py dados.xlsx --formato feather
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from leitura_dados import CONJUNTOS, _tem_pyarrow, ler_em_blocos, motor_leitura
+
+
+# Função para dar a cada coluna um tipo que o formato colunar aceite
+def _tipos_colunares(df):
+    """Datas e números mantêm o tipo; colunas mistas (ex.: Idade com números e
+    'Não Informada', Hora com objetos time) viram texto, sem perder os nulos"""
+    for coluna in df.columns:
+        serie = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+            continue
+        tipo = pd.api.types.infer_dtype(serie, skipna=True)
+        if tipo in ('integer', 'floating', 'mixed-integer-float'):
+            df[coluna] = pd.to_numeric(serie)
+        elif tipo in ('datetime', 'datetime64'):
+            df[coluna] = pd.to_datetime(serie)
+        else:
+            df[coluna] = serie.astype('string')
+    return df
+
+
+# Função para converter uma planilha
+def converter(caminho, formato='parquet'):
+    """Converte a planilha e retorna o caminho do arquivo gravado"""
+    destino = os.path.splitext(caminho)[0] + f".{formato}"
+    inicio = time.perf_counter()
+    df = pd.concat([bloco for bloco, _ in ler_em_blocos(caminho)], ignore_index=True)
+    df = _tipos_colunares(df)
+
+    temporario = os.path.join(os.path.dirname(os.path.abspath(destino)), f"tmp-{os.path.basename(destino)}")
+    if formato == 'parquet':
+        df.to_parquet(temporario, index=False)
+    else:
+        df.to_feather(temporario)
+    os.replace(temporario, destino)
+    print(f"{caminho} -> {destino}: {len(df)} linhas em {time.perf_counter() - inicio:.1f} s "
+          f"(motor: {motor_leitura(caminho)})")
+    return destino
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte planilhas para Parquet ou Feather.")
+    parser.add_argument('arquivos', nargs='*', help="planilhas a converter (padrão: as dos três conjuntos)")
+    parser.add_argument('--formato', choices=['parquet', 'feather'], default='parquet')
+    args = parser.parse_args(argv)
+
+    if not _tem_pyarrow():
+        print("A conversão requer o pacote pyarrow (pip install pyarrow)")
+        return 1
+
+    arquivos = args.arquivos or [planilha for planilha, _ in CONJUNTOS.values()]
+    convertidos = 0
+    for caminho in arquivos:
+        if not os.path.exists(caminho):
+            print(f"{caminho} não encontrado, ignorado")
+            continue
+        converter(caminho, args.formato)
+        convertidos += 1
+    return 0 if convertidos else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,11 @@
-import pandas as pd
 
 # Matplotlib para criar gráficos e visualizações básicas
 import matplotlib.pyplot as plt
 
-# Seaborn para criar gráficos estatísticos com estilo bonito e fácil
-import seaborn as sns
+from agregados import contagem
+from grafico_barras import barras
+from series_temporais import tendencia_diaria, tendencia_mensal, comparacao_ano_a_ano, tendencia_por
+from mapas import mapa_municipios, mapa_ais
 
 # Importar dados de Crimes Violentos Excel
 from leitura_dados import carregar_crimes_violentos
@@ -13,7 +14,8 @@ from leitura_dados import carregar_crimes_violentos
 def meio_empregado_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(y='Meio Empregado', data=df, order=df['Meio Empregado'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Meio Empregado')
+    barras(contagens, ax)
     ax.set_title('Distribuição dos Meios Empregados')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Meio Empregado')
@@ -21,7 +23,8 @@ def meio_empregado_cv(df, ax=None):
 def natureza_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(y='Natureza', data=df, order=df['Natureza'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Natureza')
+    barras(contagens, ax)
     ax.set_title('Natureza dos Crimes Violentos')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Natureza')
@@ -29,7 +32,8 @@ def natureza_cv(df, ax=None):
 def genero_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(x='Genero', data=df, order=df['Genero'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Genero')
+    barras(contagens, ax, horizontal=False)
     ax.set_title('Gênero das Vítimas')
     ax.set_xlabel('Gênero')
     ax.set_ylabel('Ocorrencias')
@@ -37,7 +41,8 @@ def genero_cv(df, ax=None):
 def raca_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(x='Raca da Vitima', data=df, order=df['Raca da Vitima'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Raca da Vitima')
+    barras(contagens, ax, horizontal=False)
     ax.set_title('Raça das Vítimas')
     ax.set_xlabel('Raça')
     ax.set_ylabel('Ocorrencias')
@@ -46,15 +51,8 @@ def idade_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
     # Conta as 10 idades mais frequentes
-    top_idades = df['Idade da Vitima'].value_counts().head(10)
-    # Filtra o DataFrame para essas idades
-    df_filtrado = df[df['Idade da Vitima'].isin(top_idades.index)]
-    sns.countplot(
-        y='Idade da Vitima',
-        data=df_filtrado,
-        order=top_idades.index,
-        ax=ax,
-    )
+    top_idades = contagem(df, 'Idade da Vitima').head(10)
+    barras(top_idades, ax)
     ax.set_title('Top 10 Idades das Vítimas de Crimes Violentos')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Idade')
@@ -62,7 +60,8 @@ def idade_cv(df, ax=None):
 def escolaridade_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(y='Escolaridade da Vitima', data=df, order=df['Escolaridade da Vitima'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Escolaridade da Vitima')
+    barras(contagens, ax)
     ax.set_title('Escolaridade das Vítimas')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Escolaridade')
@@ -70,8 +69,8 @@ def escolaridade_cv(df, ax=None):
 def municipio_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    top_municipios = df['Municipio'].value_counts().head(20)
-    sns.barplot(x=top_municipios.values, y=top_municipios.index, ax=ax)
+    top_municipios = contagem(df, 'Municipio').head(20)
+    barras(top_municipios, ax)
     ax.set_title('Top 20 Municípios com Mais Crimes Violentos')
     ax.set_xlabel('Ocorrencias')
     # ax.set_ylabel('Município') # Temporariamente removido devido a erro
@@ -79,7 +78,8 @@ def municipio_cv(df, ax=None):
 def ais_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(y='AIS', data=df, order=df['AIS'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'AIS')
+    barras(contagens, ax)
     ax.set_title('Distribuição por Áreas Integradas de Segurança (AIS)')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('AIS')
@@ -87,9 +87,9 @@ def ais_cv(df, ax=None):
 def ano_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df = df.copy()
-    df['Ano'] = pd.to_datetime(df['Data'], errors='coerce').dt.year
-    sns.countplot(x='Ano', data=df, order=sorted(df['Ano'].dropna().unique()), ax=ax)
+    anos = contagem(df, 'Ano').sort_index()
+    anos.index = anos.index.astype(int)
+    barras(anos, ax, horizontal=False)
     ax.set_title('Ocorrencias de Crimes por Ano')
     ax.set_xlabel('Ano')
     ax.set_ylabel('Ocorrencias')
@@ -98,9 +98,8 @@ def ano_cv(df, ax=None):
 def mes_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df = df.copy()
-    df['Mês'] = pd.to_datetime(df['Data'], errors='coerce').dt.month
-    sns.countplot(x='Mês', data=df, order=range(1,13), ax=ax)
+    meses = contagem(df, 'Mes').reindex(range(1, 13), fill_value=0)
+    barras(meses, ax, horizontal=False)
     ax.set_title('Ocorrencias de Crimes por Mês')
     ax.set_xlabel('Mês')
     ax.set_ylabel('Ocorrencias')
@@ -109,7 +108,8 @@ def dia_semana_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
     dias_ordem = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
-    sns.countplot(x='Dia da Semana', data=df, order=dias_ordem, ax=ax)
+    dias = contagem(df, 'Dia da Semana').reindex(dias_ordem, fill_value=0)
+    barras(dias, ax, horizontal=False)
     ax.set_title('Ocorrencias de Crimes por Dia da Semana')
     ax.set_xlabel('Dia da Semana')
     ax.set_ylabel('Ocorrencias')
@@ -117,10 +117,30 @@ def dia_semana_cv(df, ax=None):
 def horario_cv(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df = df.copy()
-    df['Hora'] = df['Hora'].apply(lambda x: x.hour if pd.notnull(x) else None)
-    df = df[df['Hora'].notnull()]
-    sns.countplot(x='Hora', data=df, ax=ax)
+    horas = contagem(df, 'Hora do Dia').sort_index()
+    horas.index = horas.index.astype(int)
+    barras(horas, ax, horizontal=False)
     ax.set_title('Distribuição dos Crimes por Horário')
     ax.set_xlabel('Hora do Dia')
     ax.set_ylabel('Ocorrencias')
+
+def tendencia_diaria_cv(df, ax=None):
+    tendencia_diaria(df, ax, 'Tendência Diária dos Crimes Violentos')
+
+def tendencia_mensal_cv(df, ax=None):
+    tendencia_mensal(df, ax, 'Tendência Mensal dos Crimes Violentos')
+
+def comparacao_anual_cv(df, ax=None):
+    comparacao_ano_a_ano(df, ax, 'Comparação Ano a Ano dos Crimes Violentos')
+
+def tendencia_municipios_cv(df, ax=None):
+    tendencia_por(df, ax, 'Municipio', 'Tendência nos 5 Municípios com Mais Ocorrências')
+
+def mapa_municipio_cv(df, ax=None):
+    mapa_municipios(df, ax, 'Mapa dos Crimes Violentos por Município')
+
+def mapa_taxa_cv(df, ax=None):
+    mapa_municipios(df, ax, 'Mapa dos Crimes Violentos por 100 mil Habitantes', por_habitante=True)
+
+def mapa_ais_cv(df, ax=None):
+    mapa_ais(df, ax, 'Mapa dos Crimes Violentos por Região de AIS')
@@ -0,0 +1,282 @@
+# Matplotlib para criar gráficos e visualizações básicas
+import matplotlib.pyplot as plt
+
+# Hashlib para a impressão digital dos conjuntos cruzados
+import hashlib
+
+# Pandas e Numpy para as tabelas alinhadas
+import pandas as pd
+import numpy as np
+
+from agregados import contagem, impressao_digital
+from grafico_barras import barras
+from mapas import chave_nome
+
+
+# Nomes curtos dos conjuntos nos gráficos
+ROTULOS = {
+    'entorpecentes': 'Entorpecentes',
+    'crimes_violentos': 'CVLI',
+    'crimes_sexuais': 'Crimes Sexuais',
+}
+
+# Pares comparados (o primeiro conjunto é o que pode anteceder o segundo)
+PARES = [
+    ('entorpecentes', 'crimes_violentos'),
+    ('entorpecentes', 'crimes_sexuais'),
+    ('crimes_violentos', 'crimes_sexuais'),
+]
+
+# Defasagens testadas, em períodos (meses), para cada lado
+DEFASAGEM_MAXIMA = 6
+
+# Locais com menos ocorrências que isto em algum dos conjuntos ficam fora da
+# correlação por local (séries quase vazias só produzem ruído)
+MINIMO_OCORRENCIAS = 50
+
+
+# Classe com as contagens dos conjuntos em uma grade comum de local x período
+class TabelasCruzadas:
+    """Uma matriz (locais x períodos) por conjunto, todas com os mesmos
+    locais e períodos, de modo que a mesma posição representa o mesmo
+    Municipio/AIS no mesmo mês em todos os conjuntos.
+
+    As contagens vêm das dimensões 'Dia/<nivel>' do cubo (ou do DataFrame);
+    locais e meses são codificados como inteiros e cada matriz é preenchida
+    com um único np.bincount, sem juntar registros linha a linha."""
+
+    def __init__(self, conjuntos, nivel='Municipio'):
+        self.nivel = nivel
+        contagens = {nome: contagem(dados, f"Dia/{nivel}") for nome, dados in conjuntos.items()}
+
+        # Locais: nomes normalizados (o mesmo município pode vir grafado de
+        # forma diferente em cada planilha); exibidos com a primeira grafia
+        nomes = {}
+        for serie in contagens.values():
+            for local in serie.index.get_level_values(1).unique():
+                nomes.setdefault(chave_nome(local), str(local))
+        self.locais = pd.Index(sorted(nomes))
+        self.nomes_locais = [nomes[chave] for chave in self.locais]
+
+        # Períodos: meses contados a partir do primeiro mês com dados (nenhum
+        # período se todos os conjuntos estiverem vazios)
+        meses = {nome: self._meses(serie) for nome, serie in contagens.items()}
+        com_dados = [m for m in meses.values() if len(m)]
+        if com_dados:
+            inicio = min(m.min() for m in com_dados)
+            fim = max(m.max() for m in com_dados)
+            self.periodos = pd.period_range(pd.Period(year=inicio // 12, month=inicio % 12 + 1, freq='M'),
+                                            periods=fim - inicio + 1, freq='M').to_timestamp()
+        else:
+            inicio = 0
+            self.periodos = pd.DatetimeIndex([])
+
+        self.tabelas = {}
+        self.cobertura = {}
+        for nome, serie in contagens.items():
+            # Normaliza só os nomes distintos e traduz os códigos do conjunto
+            # para os códigos comuns
+            codigos, valores = pd.factorize(serie.index.get_level_values(1))
+            codigos_locais = self.locais.get_indexer([chave_nome(local) for local in valores])[codigos]
+            codigos_meses = meses[nome] - inicio
+            chaves = codigos_locais.astype('int64') * len(self.periodos) + codigos_meses
+            totais = np.bincount(chaves, weights=serie.to_numpy(dtype='float64'),
+                                 minlength=len(self.locais) * len(self.periodos))
+            self.tabelas[nome] = totais.reshape(len(self.locais), len(self.periodos))
+            # Primeiro e último mês com ocorrências de cada conjunto
+            self.cobertura[nome] = (int(codigos_meses.min()), int(codigos_meses.max())) if len(serie) else (0, -1)
+
+    @staticmethod
+    def _meses(serie):
+        dias = pd.DatetimeIndex(serie.index.get_level_values(0))
+        return (dias.year * 12 + dias.month - 1).to_numpy(dtype='int64')
+
+    def periodo_comum(self, *nomes):
+        """Fatia dos períodos cobertos por todos os conjuntos indicados, ou
+        None se não houver nenhum mês em comum (ou algum conjunto estiver vazio)"""
+        inicio = max(self.cobertura[nome][0] for nome in nomes)
+        fim = min(self.cobertura[nome][1] for nome in nomes)
+        if fim < inicio:
+            return None
+        return slice(inicio, fim + 1)
+
+    def residuos(self, nome, periodos):
+        """log(1 + contagem) sem a média de cada local e de cada período,
+        para que o tamanho do local e a sazonalidade comum a todos não
+        apareçam como correlação"""
+        valores = np.log1p(self.tabelas[nome][:, periodos])
+        return (valores - valores.mean(axis=1, keepdims=True) - valores.mean(axis=0, keepdims=True)
+                + valores.mean())
+
+
+# Função para correlacionar duas matrizes alinhadas com defasagem
+def correlacao_defasada(a, b, defasagem):
+    """Correlação entre a[:, t] e b[:, t + defasagem] sobre todos os locais
+    juntos (matrizes locais x períodos). Defasagem positiva: a antecede b.
+    NaN se não sobrar nenhum período depois da defasagem."""
+    if defasagem > 0:
+        a, b = a[..., :-defasagem], b[..., defasagem:]
+    elif defasagem < 0:
+        a, b = a[..., -defasagem:], b[..., :defasagem]
+    if a.size == 0:
+        return np.nan
+    a = a - a.mean()
+    b = b - b.mean()
+    denominador = np.sqrt(np.sum(a * a) * np.sum(b * b))
+    return float(np.sum(a * b) / denominador) if denominador else np.nan
+
+
+# Função para calcular a correlação de um par de conjuntos em cada defasagem
+def correlacoes_defasadas(tabelas, a, b, defasagens):
+    """Série de correlações indexada pela defasagem, no período coberto pelos
+    dois conjuntos. Série vazia se os conjuntos não tiverem meses em comum."""
+    defasagens = pd.Index(defasagens, name='Defasagem')
+    periodos = tabelas.periodo_comum(a, b)
+    if periodos is None:
+        return pd.Series(index=defasagens[:0], dtype='float64')
+    ra, rb = tabelas.residuos(a, periodos), tabelas.residuos(b, periodos)
+    return pd.Series([correlacao_defasada(ra, rb, k) for k in defasagens], index=defasagens, dtype='float64')
+
+
+# Função para correlacionar cada local separadamente
+def correlacao_por_local(a, b, defasagem):
+    """Correlação de cada linha de a com a mesma linha de b defasada"""
+    if defasagem > 0:
+        a, b = a[:, :-defasagem], b[:, defasagem:]
+    elif defasagem < 0:
+        a, b = a[:, -defasagem:], b[:, :defasagem]
+    a = a - a.mean(axis=1, keepdims=True)
+    b = b - b.mean(axis=1, keepdims=True)
+    denominador = np.sqrt(np.sum(a * a, axis=1) * np.sum(b * b, axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominador > 0, np.sum(a * b, axis=1) / denominador, np.nan)
+
+
+# Classe com os conjuntos carregados, entregue aos gráficos de cruzamento
+class ConjuntosCruzados:
+    """Conjuntos de dados (DataFrames ou cubos) por nome. As tabelas
+    alinhadas são montadas na primeira vez que cada nível é pedido."""
+
+    def __init__(self, conjuntos):
+        self.conjuntos = {nome: dados for nome, dados in conjuntos.items() if dados is not None}
+        self._tabelas = {}
+        self._impressao = None
+
+    def tabelas(self, nivel='Municipio'):
+        if nivel not in self._tabelas:
+            self._tabelas[nivel] = TabelasCruzadas(self.conjuntos, nivel)
+        return self._tabelas[nivel]
+
+    def pares(self):
+        return [(a, b) for a, b in PARES if a in self.conjuntos and b in self.conjuntos]
+
+    def impressao_digital(self):
+        if self._impressao is None:
+            h = hashlib.sha1()
+            for nome, dados in sorted(self.conjuntos.items()):
+                h.update(f"{nome}:{impressao_digital(dados)}".encode('utf-8'))
+            self._impressao = h.hexdigest()
+        return self._impressao
+
+    def __len__(self):
+        return len(self.conjuntos)
+
+
+def _aviso(ax, titulo, texto):
+    ax.text(0.5, 0.5, texto, horizontalalignment='center', verticalalignment='center',
+            transform=ax.transAxes, fontsize=12, color='gray')
+    ax.set_title(titulo)
+
+
+def _sem_pares(ax, titulo):
+    _aviso(ax, titulo, 'São necessários ao menos dois conjuntos de dados carregados.')
+
+
+def _sem_periodo_comum(ax, titulo):
+    _aviso(ax, titulo, 'Os conjuntos de dados não têm meses em comum.')
+
+
+# Funções para criar gráficos
+def correlacao_defasada_grafico(dados, ax=None, nivel='Municipio', titulo='Correlação Defasada por Município'):
+    """Correlação entre os conjuntos para cada defasagem, em meses"""
+    if ax is None:
+        ax = plt.gca()
+    if not dados.pares():
+        return _sem_pares(ax, titulo)
+    tabelas = dados.tabelas(nivel)
+    defasagens = np.arange(-DEFASAGEM_MAXIMA, DEFASAGEM_MAXIMA + 1)
+    correlacoes = {(a, b): correlacoes_defasadas(tabelas, a, b, defasagens) for a, b in dados.pares()}
+    if all(serie.empty for serie in correlacoes.values()):
+        return _sem_periodo_comum(ax, titulo)
+    for (a, b), serie in correlacoes.items():
+        if not serie.empty:
+            ax.plot(serie.index, serie.to_numpy(), marker='o', label=f"{ROTULOS[a]} → {ROTULOS[b]}")
+    ax.axhline(0, color='gray', linewidth=0.8)
+    ax.axvline(0, color='gray', linewidth=0.8, linestyle='--')
+    ax.set_xticks(defasagens)
+    ax.set_title(titulo)
+    ax.set_xlabel('Defasagem (meses; positiva: o primeiro conjunto antecede o segundo)')
+    ax.set_ylabel('Correlação')
+    ax.legend()
+
+
+def series_comparadas(dados, ax=None, titulo='Ocorrências Mensais dos Conjuntos'):
+    """Totais mensais de cada conjunto como índice (média do período = 100)"""
+    if ax is None:
+        ax = plt.gca()
+    if not dados.pares():
+        return _sem_pares(ax, titulo)
+    tabelas = dados.tabelas()
+    periodos = tabelas.periodo_comum(*tabelas.tabelas)
+    if periodos is None:
+        return _sem_periodo_comum(ax, titulo)
+    for nome, tabela in tabelas.tabelas.items():
+        mensal = tabela[:, periodos].sum(axis=0)
+        ax.plot(tabelas.periodos[periodos], mensal / mensal.mean() * 100, linewidth=1.5, label=ROTULOS[nome])
+    ax.axhline(100, color='gray', linewidth=0.8)
+    ax.set_title(titulo)
+    ax.set_xlabel('Mês')
+    ax.set_ylabel('Índice (média do período = 100)')
+    ax.legend()
+
+
+def correlacao_locais(dados, ax=None, nivel='Municipio', titulo='Municípios com Maior Correlação', quantidade=15):
+    """Locais em que o primeiro conjunto do par mais acompanha o segundo, na
+    defasagem de maior correlação geral (entre 0 e DEFASAGEM_MAXIMA meses)"""
+    if ax is None:
+        ax = plt.gca()
+    if not dados.pares():
+        return _sem_pares(ax, titulo)
+    a, b = dados.pares()[0]
+    tabelas = dados.tabelas(nivel)
+    correlacoes = correlacoes_defasadas(tabelas, a, b, range(DEFASAGEM_MAXIMA + 1)).dropna()
+    if correlacoes.empty:
+        return _sem_periodo_comum(ax, titulo)
+    defasagem = int(correlacoes.idxmax())
+    periodos = tabelas.periodo_comum(a, b)
+    ra, rb = tabelas.residuos(a, periodos), tabelas.residuos(b, periodos)
+
+    suficientes = ((tabelas.tabelas[a][:, periodos].sum(axis=1) >= MINIMO_OCORRENCIAS)
+                   & (tabelas.tabelas[b][:, periodos].sum(axis=1) >= MINIMO_OCORRENCIAS))
+    valores = correlacao_por_local(ra, rb, defasagem)
+    correlacoes = pd.Series(valores[suficientes], index=pd.Index(np.array(tabelas.nomes_locais)[suficientes],
+                                                                  name=nivel))
+    barras(correlacoes.dropna().sort_values(ascending=False).head(quantidade), ax)
+    ax.set_title(f"{titulo}: {ROTULOS[a]} → {ROTULOS[b]} ({defasagem} meses depois)")
+    ax.set_xlabel('Correlação')
+
+
+def correlacao_defasada_municipios(dados, ax=None):
+    correlacao_defasada_grafico(dados, ax, 'Municipio', 'Correlação Defasada entre Conjuntos por Município')
+
+
+def correlacao_defasada_ais(dados, ax=None):
+    correlacao_defasada_grafico(dados, ax, 'AIS', 'Correlação Defasada entre Conjuntos por AIS')
+
+
+def correlacao_municipios(dados, ax=None):
+    correlacao_locais(dados, ax, 'Municipio', 'Municípios com Maior Correlação')
+
+
+def correlacao_ais(dados, ax=None):
+    correlacao_locais(dados, ax, 'AIS', 'AIS com Maior Correlação')
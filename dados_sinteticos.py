@@ -0,0 +1,240 @@
+"""Geração de planilhas e CSVs sintéticos no formato das planilhas originais.
+
+As distribuições de Município/AIS, Hora e das colunas das vítimas são
+copiadas das planilhas reais quando elas estão disponíveis (a partir do
+cache dos dados); sem elas, são usadas distribuições de reserva. As datas
+cobrem 2009 a 2024 e o dia da semana é sempre coerente com a data.
+
+Uso:
+    python dados_sinteticos.py crimes_violentos 1000000 --formato csv
+"""
+import argparse
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from leitura_dados import DIRETORIO_CACHE, carregar_crimes_sexuais, carregar_crimes_violentos
+
+
+# Pasta onde os arquivos sintéticos são gravados (reaproveitados entre execuções)
+PASTA_SINTETICOS = os.path.join(DIRETORIO_CACHE, 'sinteticos')
+
+# Limite de linhas de uma planilha .xlsx (sem contar o cabeçalho)
+LIMITE_LINHAS_XLSX = 1048575
+
+# Acima deste tamanho o formato automático grava CSV (gravar .xlsx é lento demais)
+LIMITE_XLSX_AUTOMATICO = 100000
+
+# Linhas geradas e gravadas de cada vez
+TAMANHO_BLOCO_GERACAO = 500000
+
+PRIMEIRA_DATA = '2009-01-01'
+ULTIMA_DATA = '2024-12-31'
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+# Colunas de cada conjunto, com os nomes (acentuados) das planilhas originais
+COLUNAS = {
+    'entorpecentes': ['Município', 'AIS', 'Tipo de Entorpecente', 'Quantidade (Kg)', 'Data', 'Hora',
+                      'Dia da Semana'],
+    'crimes_violentos': ['Município', 'AIS', 'Natureza', 'Data', 'Hora', 'Dia da Semana', 'Meio Empregado',
+                         'Gênero', 'Idade da Vítima', 'Escolaridade da Vítima', 'Raça da Vítima'],
+    'crimes_sexuais': ['AIS', 'Município', 'Data', 'Hora', 'Dia da Semana', 'Gênero', 'Idade da Vítima',
+                       'Escolaridade da Vítima', 'Raça da Vítima'],
+}
+
+# Peso relativo de cada dia da semana (segunda a domingo)
+PESOS_DIAS = {
+    'entorpecentes': [1.0, 1.05, 1.05, 1.05, 1.1, 0.9, 0.8],
+    'crimes_violentos': [1.0, 0.9, 0.9, 0.95, 1.1, 1.35, 1.5],
+    'crimes_sexuais': [1.05, 1.05, 1.0, 1.0, 1.0, 0.95, 0.95],
+}
+
+# Distribuições de reserva, usadas quando as planilhas reais não estão disponíveis
+_RESERVA = {
+    'Natureza': (['HOMICIDIO DOLOSO', 'LESAO CORPORAL SEGUIDA DE MORTE', 'ROUBO SEGUIDO DE MORTE (LATROCINIO)',
+                  'FEMINICIDIO'], [0.92, 0.04, 0.025, 0.015]),
+    'Meio Empregado': (['Arma de fogo', 'Arma branca', 'Outros meios', 'Meio não informado'],
+                       [0.78, 0.14, 0.07, 0.01]),
+    'Gênero': (['Masculino', 'Feminino', 'Não Informado'], [0.9, 0.095, 0.005]),
+    'Escolaridade da Vítima': (['Não Informada', 'Alfabetizado', 'Ensino Fundamental Incompleto',
+                                'Ensino Fundamental Completo', 'Ensino Médio Incompleto',
+                                'Ensino Médio Completo', 'Ensino Superior'],
+                               [0.8, 0.04, 0.07, 0.03, 0.03, 0.02, 0.01]),
+    'Raça da Vítima': (['Não Informada', 'Parda', 'Branca', 'Preta', 'Amarela'], [0.6, 0.32, 0.05, 0.025, 0.005]),
+}
+
+# Tipos de entorpecente e a mediana do peso apreendido (Kg) de cada um
+ENTORPECENTES = {
+    'Maconha': (0.42, 0.05),
+    'Cocaína': (0.28, 0.02),
+    'Crack': (0.2, 0.01),
+    'Haxixe': (0.03, 0.02),
+    'Skunk': (0.04, 0.03),
+    'Ecstasy': (0.02, 0.005),
+    'Outros': (0.01, 0.01),
+}
+
+
+# Função para calcular a distribuição empírica de uma série
+def _distribuicao(serie):
+    frequencias = serie.astype('object').where(serie.notna(), None).value_counts(normalize=True, dropna=False)
+    return list(frequencias.index), frequencias.to_numpy(dtype='float64')
+
+
+# Função para carregar as distribuições das planilhas reais, se disponíveis
+def distribuicoes():
+    """Dicionário {coluna ou par de colunas: (valores, probabilidades)}"""
+    dist = dict(_RESERVA)
+    with contextlib.redirect_stdout(io.StringIO()):
+        violentos = carregar_crimes_violentos()
+        sexuais = carregar_crimes_sexuais()
+
+    if violentos is not None:
+        pares = violentos.groupby(['Municipio', 'AIS'], observed=True).size()
+        dist['Município/AIS'] = (list(pares.index), (pares / pares.sum()).to_numpy())
+        dist['Hora'] = _distribuicao(violentos['Hora'])
+        for coluna in ('Natureza', 'Meio Empregado', 'Genero', 'Idade da Vitima', 'Escolaridade da Vitima',
+                       'Raca da Vitima'):
+            dist[f"crimes_violentos:{coluna}"] = _distribuicao(violentos[coluna])
+    else:
+        # Município/AIS com cauda longa (lei de Zipf), Fortaleza concentrando a maior parte
+        municipios = ['Fortaleza', 'Caucaia', 'Maracanaú', 'Juazeiro do Norte', 'Sobral', 'Crato'] + \
+                     [f"Município {i:03d}" for i in range(7, 185)]
+        pesos = 1.0 / np.arange(1, len(municipios) + 1) ** 1.1
+        pares = [(m, f"AIS {(i % 25) + 1:02d}") for i, m in enumerate(municipios)]
+        dist['Município/AIS'] = (pares, pesos / pesos.sum())
+        dist['Hora'] = (None, None)
+
+    if sexuais is not None:
+        for coluna in ('Genero', 'Idade da Vitima', 'Escolaridade da Vitima', 'Raca da Vitima'):
+            dist[f"crimes_sexuais:{coluna}"] = _distribuicao(sexuais[coluna])
+    return dist
+
+
+# Função para sortear valores de uma distribuição
+def _sortear(rng, distribuicao, linhas):
+    valores, probabilidades = distribuicao
+    # As distribuições de reserva são listas
+    probabilidades = np.asarray(probabilidades, dtype='float64')
+    indices = rng.choice(len(valores), size=linhas, p=probabilidades / probabilidades.sum())
+    return np.asarray(valores, dtype='object')[indices]
+
+
+def _coluna_vitima(dist, nome, coluna, rng, linhas):
+    chave = f"{nome}:{coluna}"
+    if chave in dist:
+        return _sortear(rng, dist[chave], linhas)
+    if coluna == 'Idade da Vitima':
+        idades = np.clip(np.rint(rng.lognormal(3.3, 0.35, linhas)), 0, 99).astype('int64').astype('object')
+        idades[rng.random(linhas) < 0.1] = 'Não Informada'
+        return idades
+    acentuada = coluna.replace('Genero', 'Gênero').replace('Vitima', 'Vítima').replace('Raca', 'Raça')
+    return _sortear(rng, _RESERVA[acentuada], linhas)
+
+
+# Função para gerar as horas no formato texto das planilhas
+def _horas(dist, rng, linhas):
+    valores, probabilidades = dist['Hora']
+    if valores is None:
+        # Mais ocorrências à noite; 10% sem hora informada (00:00:00)
+        minutos = (rng.normal(20 * 60, 5 * 60, linhas) % 1440).astype('int64')
+        minutos[rng.random(linhas) < 0.1] = 0
+    else:
+        minutos = _sortear(rng, (valores, probabilidades), linhas)
+    horas = pd.Series(minutos, dtype='object')
+    validos = horas.notna()
+    texto = pd.Series('', index=horas.index, dtype='object')
+    m = horas[validos].astype('int64')
+    texto[validos] = (m // 60).map('{:02d}'.format) + ':' + (m % 60).map('{:02d}'.format) + ':00'
+    return texto.to_numpy()
+
+
+# Função para gerar um bloco de linhas de um conjunto de dados
+def gerar_bloco(nome, linhas, rng, dist=None):
+    """DataFrame com linhas sintéticas no formato bruto da planilha do conjunto"""
+    dist = dist if dist is not None else distribuicoes()
+
+    # Datas: dias de 2009 a 2024, com peso por dia da semana
+    dias = pd.date_range(PRIMEIRA_DATA, ULTIMA_DATA, freq='D')
+    pesos = np.asarray(PESOS_DIAS[nome])[dias.dayofweek]
+    datas = dias[rng.choice(len(dias), size=linhas, p=pesos / pesos.sum())]
+
+    pares = _sortear(rng, dist['Município/AIS'], linhas)
+    dados = {
+        'Município': [par[0] for par in pares],
+        'AIS': [par[1] for par in pares],
+        'Data': datas,
+        'Hora': _horas(dist, rng, linhas),
+        'Dia da Semana': np.asarray(DIAS_SEMANA, dtype='object')[datas.dayofweek],
+    }
+
+    if nome == 'entorpecentes':
+        tipos = list(ENTORPECENTES)
+        probabilidades = np.array([ENTORPECENTES[t][0] for t in tipos])
+        indices = rng.choice(len(tipos), size=linhas, p=probabilidades / probabilidades.sum())
+        medianas = np.array([ENTORPECENTES[t][1] for t in tipos])[indices]
+        pesos_kg = np.round(medianas * rng.lognormal(0.0, 1.6, linhas), 4)
+        pesos_kg[rng.random(linhas) < 0.03] = 0.0
+        dados['Tipo de Entorpecente'] = np.asarray(tipos, dtype='object')[indices]
+        dados['Quantidade (Kg)'] = pesos_kg
+    else:
+        if nome == 'crimes_violentos':
+            dados['Natureza'] = _coluna_vitima(dist, nome, 'Natureza', rng, linhas)
+            dados['Meio Empregado'] = _coluna_vitima(dist, nome, 'Meio Empregado', rng, linhas)
+        dados['Gênero'] = _coluna_vitima(dist, nome, 'Genero', rng, linhas)
+        idades = _coluna_vitima(dist, nome, 'Idade da Vitima', rng, linhas)
+        dados['Idade da Vítima'] = np.where(pd.isna(idades), 'Não Informada', idades)
+        dados['Escolaridade da Vítima'] = _coluna_vitima(dist, nome, 'Escolaridade da Vitima', rng, linhas)
+        dados['Raça da Vítima'] = _coluna_vitima(dist, nome, 'Raca da Vitima', rng, linhas)
+
+    return pd.DataFrame(dados)[COLUNAS[nome]]
+
+
+# Função para gravar um arquivo sintético (ou reaproveitar um já gravado)
+def gerar_arquivo(nome, linhas, formato='auto', pasta=PASTA_SINTETICOS, semente=0):
+    """Grava linhas sintéticas do conjunto em .xlsx ou .csv e retorna o caminho.
+
+    O formato automático usa .xlsx até LIMITE_XLSX_AUTOMATICO linhas e CSV
+    acima disso. Arquivos já gerados com os mesmos parâmetros são reaproveitados."""
+    if formato == 'auto':
+        formato = 'xlsx' if linhas <= LIMITE_XLSX_AUTOMATICO else 'csv'
+    if formato == 'xlsx' and linhas > LIMITE_LINHAS_XLSX:
+        raise ValueError(f"Planilhas .xlsx comportam no máximo {LIMITE_LINHAS_XLSX} linhas; use CSV")
+
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, f"{nome}-{linhas}-s{semente}.{formato}")
+    if os.path.exists(caminho):
+        return caminho
+
+    rng = np.random.default_rng(semente)
+    dist = distribuicoes()
+    temporario = os.path.join(pasta, f"tmp-{os.path.basename(caminho)}")
+    if formato == 'xlsx':
+        gerar_bloco(nome, linhas, rng, dist).to_excel(temporario, index=False, engine='openpyxl')
+    else:
+        gravadas = 0
+        while gravadas < linhas:
+            bloco = gerar_bloco(nome, min(TAMANHO_BLOCO_GERACAO, linhas - gravadas), rng, dist)
+            bloco.to_csv(temporario, mode='a' if gravadas else 'w', header=not gravadas, index=False)
+            gravadas += len(bloco)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera planilhas ou CSVs sintéticos de um conjunto de dados.")
+    parser.add_argument('conjunto', choices=list(COLUNAS))
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('--formato', choices=['auto', 'xlsx', 'csv'], default='auto')
+    parser.add_argument('--pasta', default=PASTA_SINTETICOS)
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(gerar_arquivo(args.conjunto, args.linhas, args.formato, args.pasta, args.semente))
+
+
+if __name__ == "__main__":
+    main()
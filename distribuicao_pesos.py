@@ -0,0 +1,111 @@
+# Numpy para o histograma e a convolução por FFT
+import numpy as np
+
+
+# Grade fixa em log10(Kg), de 1 micrograma a 1 milhão de Kg. Com 400 faixas
+# por década cada faixa cobre ~0,6% do peso, o que basta para o percentil e
+# para o histograma exibido. Por ser fixa, histogramas de partes diferentes
+# dos dados podem ser somados (cubo incremental).
+LOG_MINIMO = -9.0
+LOG_MAXIMO = 6.0
+FAIXAS_POR_DECADA = 400
+FAIXAS = int((LOG_MAXIMO - LOG_MINIMO) * FAIXAS_POR_DECADA)
+LARGURA_FAIXA = (LOG_MAXIMO - LOG_MINIMO) / FAIXAS
+
+# A curva de densidade é calculada até 4 desvios do núcleo gaussiano
+DESVIOS_NUCLEO = 4
+
+
+# Função para contar os pesos nas faixas da grade logarítmica
+def histograma_log(pesos):
+    """Contagem dos pesos positivos em cada faixa da grade (int64, FAIXAS posições)"""
+    faixas = faixas_log(pesos)
+    return np.bincount(faixas[faixas >= 0], minlength=FAIXAS).astype('int64')
+
+
+# Função para obter a faixa da grade de cada peso
+def faixas_log(pesos):
+    """Índice da faixa de cada peso (-1 para pesos nulos, ausentes ou negativos),
+    com as mesmas bordas de np.histogram; guardado pelo banco_dados para que o
+    histograma saia de um GROUP BY"""
+    pesos = np.asarray(pesos, dtype='float64')
+    faixas = np.full(len(pesos), -1, dtype='int64')
+    positivos = pesos > 0
+    logs = np.log10(pesos[positivos])
+    # Pesos fora da grade ficam nas faixas das pontas em vez de serem descartados
+    np.clip(logs, LOG_MINIMO, LOG_MAXIMO - LARGURA_FAIXA / 2, out=logs)
+    limites = np.linspace(LOG_MINIMO, LOG_MAXIMO, FAIXAS + 1)
+    faixas[positivos] = np.minimum(np.searchsorted(limites, logs, side='right') - 1, FAIXAS - 1)
+    return faixas
+
+
+# Função para obter as bordas (em Kg) das faixas de índice inicio a fim
+def bordas(inicio, fim):
+    return 10 ** (LOG_MINIMO + np.arange(inicio, fim + 1) * LARGURA_FAIXA)
+
+
+# Função para estimar um quantil a partir do histograma
+def quantil(contagens, q):
+    """Quantil aproximado (erro de no máximo uma faixa da grade), por
+    interpolação linear em log dentro da faixa, sem ordenar os pesos"""
+    acumulado = np.cumsum(contagens)
+    total = acumulado[-1] if len(acumulado) else 0
+    if total == 0:
+        return np.nan
+    alvo = q * total
+    faixa = int(np.searchsorted(acumulado, alvo, side='left'))
+    anteriores = acumulado[faixa - 1] if faixa > 0 else 0
+    fracao = (alvo - anteriores) / contagens[faixa]
+    return 10 ** (LOG_MINIMO + (faixa + fracao) * LARGURA_FAIXA)
+
+
+# Função para achar a faixa da grade que contém um peso
+def faixa_do_peso(peso):
+    posicao = int(np.floor((np.log10(peso) - LOG_MINIMO) / LARGURA_FAIXA))
+    return min(max(posicao, 0), FAIXAS - 1)
+
+
+# Função para agrupar as faixas finas nas barras do gráfico
+def agrupar(contagens, barras, limite=None):
+    """Reagrupa as faixas ocupadas (até a faixa do limite) em `barras` barras
+    de mesma largura em log. Retorna (bordas das barras em Kg, contagens por
+    barra, contagens das faixas finas cobertas pelas barras)"""
+    ocupadas = np.flatnonzero(contagens)
+    inicio, fim = int(ocupadas[0]), int(ocupadas[-1])
+    if limite is not None:
+        fim = min(fim, faixa_do_peso(limite))
+    # Cada barra cobre um número inteiro de faixas finas, então as contagens
+    # continuam exatas; a última borda pode passar um pouco do limite
+    por_barra = max(1, -(-(fim - inicio + 1) // barras))
+    recorte = np.zeros(por_barra * barras, dtype='int64')
+    disponivel = min(len(recorte), FAIXAS - inicio)
+    recorte[:disponivel] = contagens[inicio:inicio + disponivel]
+    recorte[fim - inicio + 1:] = 0
+    totais = recorte.reshape(barras, por_barra).sum(axis=1)
+    return bordas(inicio, inicio + len(recorte))[::por_barra], totais, recorte
+
+
+# Função para suavizar o histograma com um núcleo gaussiano
+def densidade_fft(contagens):
+    """Estimativa de densidade por núcleo gaussiano, em log10(peso), sobre o
+    histograma fino: convolução por FFT em O(F log F) para F faixas, em vez
+    de O(n x grade) do gaussian_kde. A largura do núcleo segue a regra de
+    Scott, com o desvio padrão calculado do próprio histograma.
+
+    Retorna as contagens suavizadas por faixa fina."""
+    contagens = np.asarray(contagens, dtype='float64')
+    total = contagens.sum()
+    centros = np.arange(len(contagens))
+    media = np.dot(centros, contagens) / total
+    desvio = np.sqrt(np.dot((centros - media) ** 2, contagens) / total)
+    # Desvio do núcleo em faixas (no mínimo meia faixa, para dados de um só valor)
+    sigma = max(desvio * total ** (-1 / 5), 0.5)
+
+    raio = int(np.ceil(DESVIOS_NUCLEO * sigma))
+    nucleo = np.exp(-0.5 * (np.arange(-raio, raio + 1) / sigma) ** 2)
+    nucleo /= nucleo.sum()
+
+    # Preenchimento com zeros para que a convolução não dê a volta na grade
+    tamanho = 1 << int(np.ceil(np.log2(len(contagens) + len(nucleo) - 1)))
+    convolucao = np.fft.irfft(np.fft.rfft(contagens, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    return np.maximum(convolucao[raio:raio + len(contagens)], 0)
@@ -1,8 +1,15 @@
 # Matplotlib para criar gráficos e visualizações básicas
+import matplotlib
 import matplotlib.pyplot as plt
 
-# Seaborn para criar gráficos estatísticos com estilo bonito e fácil
-import seaborn as sns
+# Numpy para o histograma dos pesos
+import numpy as np
+
+from agregados import contagem, histograma_pesos
+from distribuicao_pesos import LARGURA_FAIXA, agrupar, densidade_fft, quantil
+from grafico_barras import barras
+from series_temporais import tendencia_diaria, tendencia_mensal, comparacao_ano_a_ano, tendencia_por
+from mapas import mapa_municipios, mapa_ais
 
 # Importar dados de Entorpecentes Excel
 from leitura_dados import carregar_entorpecentes
@@ -15,7 +22,8 @@ from leitura_dados import carregar_entorpecentes
 def tipo_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(data=df, y='Tipo de Entorpecente', order=df['Tipo de Entorpecente'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'Tipo de Entorpecente')
+    barras(contagens, ax)
     ax.set_title('Total de Apreensões por Tipo de Entorpecente')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Tipo de Entorpecente')
@@ -24,18 +32,25 @@ def tipo_entorpecente(df, ax=None):
 def peso_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    # Filtrar valores maiores que zero para melhor visualização da distribuição
-    df_filtrado = df[df['Quantidade (Kg)'] > 0]
-    if not df_filtrado.empty:
+    # Apenas valores maiores que zero, contados em faixas de largura igual em log
+    contagens = histograma_pesos(df)
+    if contagens is not None and contagens.any():
         # Limitar ao percentil 99 para evitar distorção por outliers
-        limite = df_filtrado['Quantidade (Kg)'].quantile(0.99)
-        df_filtrado = df_filtrado[df_filtrado['Quantidade (Kg)'] <= limite]
-        sns.histplot(
-            df_filtrado['Quantidade (Kg)'],
-            bins=30,
-            kde=True,
-            ax=ax,
-        )
+        # (percentil estimado pelo histograma, sem ordenar os pesos)
+        limite = quantil(contagens, 0.99)
+        bordas, totais, finas = agrupar(contagens, 30, limite)
+        cor = matplotlib.rcParams['axes.prop_cycle'].by_key()['color'][0]
+        ax.bar(bordas[:-1], totais, width=np.diff(bordas), align='edge', color=cor, alpha=0.5,
+               edgecolor=ax.get_facecolor(), linewidth=1)
+
+        # Curva de densidade (KDE por FFT) na escala das barras, só entre o
+        # menor e o maior peso exibidos
+        curva = densidade_fft(finas) * (len(finas) // len(totais))
+        ocupadas = np.flatnonzero(finas)
+        faixas = np.arange(ocupadas[0], ocupadas[-1] + 1)
+        centros = bordas[0] * 10 ** ((faixas + 0.5) * LARGURA_FAIXA)
+        ax.plot(centros, curva[faixas], color=cor, linewidth=1.5)
+
         ax.set_xscale('log')
         ax.set_title('Distribuição de Peso das Apreensões (até o percentil 99)')
         ax.set_xlabel('Peso (Kg) [escala log]')
@@ -51,8 +66,8 @@ def peso_entorpecente(df, ax=None):
 def municipio_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    top_municipios = df['Municipio'].value_counts().head(10)
-    sns.barplot(x=top_municipios.values, y=top_municipios.index, ax=ax)
+    top_municipios = contagem(df, 'Municipio').head(10)
+    barras(top_municipios, ax)
     ax.set_title('Top 10 Municípios com Mais Apreensões de Entorpecentes')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('Município')
@@ -61,7 +76,8 @@ def municipio_entorpecente(df, ax=None):
 def ais_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    sns.countplot(data=df, y='AIS', order=df['AIS'].value_counts().index, ax=ax)
+    contagens = contagem(df, 'AIS')
+    barras(contagens, ax)
     ax.set_title('Apreensões por Área Integrada de Segurança (AIS)')
     ax.set_xlabel('Ocorrencias')
     ax.set_ylabel('AIS')
@@ -70,8 +86,9 @@ def ais_entorpecente(df, ax=None):
 def ano_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df['Ano'] = df['Data'].dt.year
-    sns.countplot(data=df, x='Ano', ax=ax)
+    anos = contagem(df, 'Ano').sort_index()
+    anos.index = anos.index.astype(int)
+    barras(anos, ax, horizontal=False)
     ax.set_title('Apreensões por Ano')
     ax.set_xlabel('Ano')
     ax.set_ylabel('Ocorrencias')
@@ -80,8 +97,9 @@ def ano_entorpecente(df, ax=None):
 def mes_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df['Mês'] = df['Data'].dt.month
-    sns.countplot(data=df, x='Mês', ax=ax)
+    meses = contagem(df, 'Mes').sort_index()
+    meses.index = meses.index.astype(int)
+    barras(meses, ax, horizontal=False)
     ax.set_title('Apreensões por Mês')
     ax.set_xlabel('Mês')
     ax.set_ylabel('Ocorrencias')
@@ -91,7 +109,8 @@ def dia_semana_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
     dias_ordem = ['Domingo', 'Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado']
-    sns.countplot(data=df, x='Dia da Semana', order=dias_ordem, ax=ax)
+    dias = contagem(df, 'Dia da Semana').reindex(dias_ordem, fill_value=0)
+    barras(dias, ax, horizontal=False)
     ax.set_title('Apreensões por Dia da Semana')
     ax.set_xlabel('Dia da Semana')
     ax.set_ylabel('Ocorrencias')
@@ -101,11 +120,37 @@ def dia_semana_entorpecente(df, ax=None):
 def horario_entorpecente(df, ax=None):
     if ax is None:
         ax = plt.gca()
-    df = df.copy()
-    df['Hora'] = df['Hora'].astype(str).str[:2]
-    df = df[df['Hora'].str.isdigit()]
-    df['Hora'] = df['Hora'].astype(int)
-    sns.countplot(data=df, x='Hora', order=sorted(df['Hora'].unique()), ax=ax)
+    horas = contagem(df, 'Hora do Dia').sort_index()
+    horas.index = horas.index.astype(int)
+    barras(horas, ax, horizontal=False)
     ax.set_title('Apreensões por Hora do Dia')
     ax.set_xlabel('Hora (24h)')
-    ax.set_ylabel('Ocorrencias')
\ No newline at end of file
+    ax.set_ylabel('Ocorrencias')
+
+
+def tendencia_diaria_entorpecente(df, ax=None):
+    tendencia_diaria(df, ax, 'Tendência Diária das Apreensões de Entorpecentes')
+
+
+def tendencia_mensal_entorpecente(df, ax=None):
+    tendencia_mensal(df, ax, 'Tendência Mensal das Apreensões de Entorpecentes')
+
+
+def comparacao_anual_entorpecente(df, ax=None):
+    comparacao_ano_a_ano(df, ax, 'Comparação Ano a Ano das Apreensões de Entorpecentes')
+
+
+def tendencia_municipios_entorpecente(df, ax=None):
+    tendencia_por(df, ax, 'Municipio', 'Tendência nos 5 Municípios com Mais Ocorrências')
+
+
+def mapa_municipio_entorpecente(df, ax=None):
+    mapa_municipios(df, ax, 'Mapa das Apreensões de Entorpecentes por Município')
+
+
+def mapa_taxa_entorpecente(df, ax=None):
+    mapa_municipios(df, ax, 'Mapa das Apreensões de Entorpecentes por 100 mil Habitantes', por_habitante=True)
+
+
+def mapa_ais_entorpecente(df, ax=None):
+    mapa_ais(df, ax, 'Mapa das Apreensões de Entorpecentes por Região de AIS')
@@ -0,0 +1,111 @@
+# Pandas e Numpy para os índices de filtragem
+import pandas as pd
+import numpy as np
+
+
+# Colunas que podem ser filtradas, além do intervalo de anos e dos meses
+COLUNAS_FILTRAVEIS = [
+    'Municipio',
+    'AIS',
+    'Genero',
+    'Raca da Vitima',
+    'Natureza',
+    'Meio Empregado',
+    'Tipo de Entorpecente',
+]
+
+
+# Classe com os índices de um conjunto de dados para filtragem rápida
+class IndiceFiltros:
+    """Índices por valor (ids de linha ordenados e bitmaps) das colunas
+    filtráveis, do ano e do mês. Uma combinação de filtros é resolvida com
+    operações bit a bit sobre os bitmaps, sem percorrer as colunas de novo."""
+
+    def __init__(self, df):
+        self.df = df
+        self.total = len(df)
+        self._valores = {}
+        self._ids = {}
+        self._bitmaps = {}
+
+        for coluna in COLUNAS_FILTRAVEIS:
+            if coluna in df.columns:
+                codigos, valores = pd.factorize(df[coluna], sort=True)
+                self._indexar(coluna, codigos, list(valores))
+
+        if 'Data' in df.columns:
+            datas = pd.to_datetime(df['Data'], errors='coerce')
+            anos = datas.dt.year
+            if anos.notna().any():
+                primeiro = int(anos.min())
+                codigos = (anos - primeiro).fillna(-1).to_numpy(dtype='int64')
+                self._indexar('Ano', codigos, list(range(primeiro, int(anos.max()) + 1)))
+            meses = datas.dt.month.fillna(0).to_numpy(dtype='int64') - 1
+            self._indexar('Mes', meses, list(range(1, 13)))
+
+    def _indexar(self, coluna, codigos, valores):
+        # Ids de linha agrupados por valor (ordenação estável preserva a ordem das linhas)
+        validos = codigos >= 0
+        ordem = np.argsort(codigos, kind='stable')[np.count_nonzero(~validos):]
+        limites = np.concatenate([[0], np.cumsum(np.bincount(codigos[validos], minlength=len(valores)))])
+        self._valores[coluna] = valores
+        self._ids[coluna] = (ordem.astype('int32'), limites)
+
+    def colunas(self):
+        return list(self._valores)
+
+    def valores(self, coluna):
+        """Valores distintos da coluna, em ordem"""
+        return self._valores[coluna]
+
+    def ids(self, coluna, valor):
+        """Ids (ordenados) das linhas com o valor na coluna"""
+        ordem, limites = self._ids[coluna]
+        try:
+            posicao = self._valores[coluna].index(valor)
+        except ValueError:
+            return ordem[:0]
+        return ordem[limites[posicao]:limites[posicao + 1]]
+
+    def bitmap(self, coluna, valor):
+        """Bitmap compactado (np.packbits) das linhas com o valor na coluna"""
+        chave = (coluna, valor)
+        bitmap = self._bitmaps.get(chave)
+        if bitmap is None:
+            linhas = np.zeros(self.total, dtype=bool)
+            linhas[self.ids(coluna, valor)] = True
+            bitmap = np.packbits(linhas)
+            self._bitmaps[chave] = bitmap
+        return bitmap
+
+    def mascara(self, criterios):
+        """Resolve os critérios {coluna: valor ou lista de valores} em um vetor
+        booleano: OU entre os valores de uma coluna, E entre as colunas"""
+        resultado = None
+        for coluna, selecionados in criterios.items():
+            if not isinstance(selecionados, (list, tuple, set, range)):
+                selecionados = [selecionados]
+            bitmap = np.zeros((self.total + 7) // 8, dtype=np.uint8)
+            for valor in selecionados:
+                np.bitwise_or(bitmap, self.bitmap(coluna, valor), out=bitmap)
+            resultado = bitmap if resultado is None else np.bitwise_and(resultado, bitmap, out=resultado)
+        if resultado is None:
+            return np.ones(self.total, dtype=bool)
+        return np.unpackbits(resultado, count=self.total).astype(bool)
+
+    def filtrar(self, criterios):
+        """DataFrame com as linhas que atendem aos critérios"""
+        if not criterios:
+            return self.df
+        linhas = np.flatnonzero(self.mascara(criterios))
+        return self.df.take(linhas)
+
+
+# Função para normalizar os critérios em uma chave imutável (usada em caches)
+def chave_filtros(criterios):
+    if not criterios:
+        return None
+    return tuple(sorted(
+        (coluna, tuple(valor) if isinstance(valor, (list, tuple, set, range)) else (valor,))
+        for coluna, valor in criterios.items()
+    ))
@@ -0,0 +1,47 @@
+# Matplotlib e Numpy para desenhar as barras diretamente
+import colorsys
+
+import matplotlib
+import numpy as np
+
+
+# Saturação aplicada pelo seaborn às cores das barras (mantém o visual anterior)
+SATURACAO = 0.75
+
+
+# Função para obter a cor das barras a partir da paleta ativa
+def cor_barras():
+    """Primeira cor do ciclo de cores, dessaturada como no sns.barplot"""
+    cor = matplotlib.rcParams['axes.prop_cycle'].by_key()['color'][0]
+    h, l, s = colorsys.rgb_to_hls(*matplotlib.colors.to_rgb(cor))
+    return colorsys.hls_to_rgb(h, l, s * SATURACAO)
+
+
+# Função para desenhar um gráfico de barras a partir de contagens prontas
+def barras(contagens, ax, horizontal=True):
+    """Desenha uma barra por item da série de contagens, na ordem da série.
+
+    Substitui o sns.barplot: as contagens já vêm calculadas (do cubo ou de
+    agregados.contagem), então basta um ax.barh/ax.bar, sem o agrupamento
+    interno do seaborn. Os rótulos, limites e grade seguem os do seaborn."""
+    posicoes = np.arange(len(contagens))
+    valores = np.asarray(contagens.to_numpy(), dtype='float64')
+    rotulos = [str(valor) for valor in contagens.index]
+    cor = cor_barras()
+
+    if horizontal:
+        ax.barh(posicoes, valores, height=0.8, color=cor)
+        ax.set_yticks(posicoes, rotulos)
+        # Primeira categoria no topo
+        ax.set_ylim(len(posicoes) - 0.5, -0.5)
+        ax.yaxis.grid(False)
+        if contagens.index.name:
+            ax.set_ylabel(contagens.index.name)
+    else:
+        ax.bar(posicoes, valores, width=0.8, color=cor)
+        ax.set_xticks(posicoes, rotulos)
+        ax.set_xlim(-0.5, len(posicoes) - 0.5)
+        ax.xaxis.grid(False)
+        if contagens.index.name:
+            ax.set_xlabel(contagens.index.name)
+    return ax
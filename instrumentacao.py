@@ -0,0 +1,77 @@
+"""Medição do tempo de inicialização da aplicação.
+
+Ativada com a opção --tempos-inicializacao ou com a variável de ambiente
+TRABALHO_BD_TEMPOS=1. Registra o tempo de cada import (no estilo de
+``python -X importtime``) e das etapas da abertura da janela, e imprime o
+relatório quando a janela é exibida.
+"""
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+_INICIO = time.perf_counter()
+
+ATIVO = os.environ.get('TRABALHO_BD_TEMPOS') == '1' or '--tempos-inicializacao' in sys.argv
+
+_import_original = builtins.__import__
+_imports = []
+_etapas = []
+_profundidade = 0
+
+
+# Função que substitui __import__ para medir o primeiro import de cada módulo
+def _import_medido(nome, globals=None, locals=None, fromlist=(), level=0):
+    global _profundidade
+    if level or nome in sys.modules:
+        return _import_original(nome, globals, locals, fromlist, level)
+
+    nivel = _profundidade
+    _profundidade += 1
+    inicio = time.perf_counter()
+    try:
+        return _import_original(nome, globals, locals, fromlist, level)
+    finally:
+        _profundidade -= 1
+        _imports.append((nome, nivel, time.perf_counter() - inicio))
+
+
+# Função para ligar a medição dos imports
+def iniciar():
+    """Passa a medir os imports, se a instrumentação estiver ativa"""
+    if ATIVO:
+        builtins.__import__ = _import_medido
+
+
+# Função para registrar o instante de uma etapa da inicialização
+def marcar(nome):
+    if ATIVO:
+        _etapas.append((nome, time.perf_counter() - _INICIO))
+
+
+# Gerenciador de contexto para medir a duração de uma etapa
+@contextmanager
+def etapa(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ATIVO:
+            _etapas.append((f"{nome} ({(time.perf_counter() - inicio) * 1000:.1f} ms)",
+                            time.perf_counter() - _INICIO))
+
+
+# Função para imprimir o relatório de tempos
+def relatorio(limite_imports=25):
+    """Imprime as etapas e os imports mais lentos desde o início do processo"""
+    if not ATIVO:
+        return
+    print("\nTempos de inicialização (desde o início do processo):")
+    for nome, instante in _etapas:
+        print(f"{instante * 1000:9.1f} ms  {nome}")
+
+    print(f"\nImports mais lentos (tempo acumulado, {len(_imports)} módulos):")
+    for nome, nivel, segundos in sorted(_imports, key=lambda item: -item[2])[:limite_imports]:
+        print(f"{segundos * 1000:9.1f} ms  {'  ' * nivel}{nome}")
@@ -1,101 +1,293 @@
 import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QStackedWidget,
-                            QScrollArea, QFrame, QMessageBox, QProgressDialog, QSpacerItem, QSizePolicy)
-from PyQt6.QtCore import Qt, QSize, QTimer
-from PyQt6.QtGui import QFont, QIcon, QPixmap
-from qt_material import apply_stylesheet
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import seaborn as sns
+                            QScrollArea, QFrame, QMessageBox, QProgressDialog, QSpacerItem, QSizePolicy,
+                            QComboBox, QGridLayout, QDialog, QTabWidget, QTableWidget,
+                            QTableWidgetItem, QHeaderView)
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QColor, QPalette
 import traceback
+import os
+from collections import OrderedDict
 
-from leitura_dados import (
-    carregar_entorpecentes,
-    carregar_crimes_violentos,
-    carregar_crimes_sexuais,
-)
-from entorpecentes import (
-    tipo_entorpecente,
-    peso_entorpecente,
-    municipio_entorpecente,
-    ais_entorpecente,
-    ano_entorpecente,
-    mes_entorpecente,
-    dia_semana_entorpecente,
-    horario_entorpecente,
-)
-from crimes_violentos import (
-    meio_empregado_cv,
-    natureza_cv,
-    genero_cv,
-    raca_cv,
-    idade_cv,
-    escolaridade_cv,
-    municipio_cv,
-    ais_cv,
-    ano_cv,
-    mes_cv,
-    dia_semana_cv,
-    horario_cv,
-)
-from crimes_sexuais import (
-    genero_cs,
-    raca_cs,
-    idade_cs,
-    escolaridade_cs,
-    municipio_cs,
-    ais_cs,
-    ano_cs,
-    mes_cs,
-    dia_semana_cs,
-    horario_cs,
-)
+import instrumentacao
+from carregamento import CarregadorDados, NOMES_DATASETS
+from registro_graficos import MENUS, MENU_CRUZAMENTOS, resolver, configurar_estilo
+from renderizacao import RenderizadorGraficos
+
+# matplotlib, seaborn, pandas, qt_material e os módulos de gráficos são
+# importados só quando usados, para que a janela apareça o quanto antes
+
+# Tema do qt_material e arquivo onde a folha de estilo compilada é guardada
+TEMA = 'light_blue.xml'
+DIRETORIO_CACHE_TEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache_dados')
+
+class CacheRenderizacao:
+    """Cache LRU dos gráficos já desenhados (buffers RGBA), limitado em bytes"""
+
+    def __init__(self, limite_bytes=64 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.total_bytes = 0
+        self._itens = OrderedDict()
+
+    def obter(self, chave):
+        buffer = self._itens.get(chave)
+        if buffer is not None:
+            self._itens.move_to_end(chave)
+        return buffer
+
+    def guardar(self, chave, buffer):
+        if buffer.nbytes > self.limite_bytes:
+            return
+        antigo = self._itens.pop(chave, None)
+        if antigo is not None:
+            self.total_bytes -= antigo.nbytes
+        self._itens[chave] = buffer
+        self.total_bytes += buffer.nbytes
+        # Descartar os gráficos usados há mais tempo até caber no limite
+        while self.total_bytes > self.limite_bytes:
+            _, removido = self._itens.popitem(last=False)
+            self.total_bytes -= removido.nbytes
+
+    def limpar(self):
+        self._itens.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._itens)
 
 class GraficoWidget(QWidget):
+    # Espera antes de mostrar o aviso "Gerando gráfico..." (evita piscar nos
+    # gráficos rápidos) e antes de redesenhar após um redimensionamento
+    ATRASO_ESPERA_MS = 150
+    ATRASO_REDIMENSIONAR_MS = 250
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.figure = Figure(figsize=(8, 6))
-        self.canvas = FigureCanvas(self.figure)
+        # A figura e o canvas só são criados no primeiro gráfico
+        self.figure = None
+        self.canvas = None
+        self.cache = CacheRenderizacao()
+        self._primeiro_grafico = False
+        # Os gráficos são agregados e desenhados fora da thread da interface
+        self.renderizador = RenderizadorGraficos(self)
+        self.renderizador.grafico_pronto.connect(self._concluir)
+        self.renderizador.erro.connect(self._falhar)
+        self._pedido = None
+        self._pendente = None
+        self._chave_pendente = None
+        self._timer_redimensionar = QTimer(self)
+        self._timer_redimensionar.setSingleShot(True)
+        self._timer_redimensionar.timeout.connect(self._redesenhar_pedido)
         layout = QVBoxLayout()
-        layout.addWidget(self.canvas)
         self.setLayout(layout)
-        
-        # Configurar estilo do seaborn
-        sns.set_style("whitegrid")
-        sns.set_palette("husl")
-        
-        # Configurar fonte padrão
-        plt.rcParams['font.family'] = 'Arial'
-        plt.rcParams['font.size'] = 10
 
-    def plotar_grafico(self, funcao, *args):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
+    def _criar_canvas(self):
+        if self.canvas is not None:
+            return
+        with instrumentacao.etapa("matplotlib, seaborn e canvas"):
+            from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+            from matplotlib.figure import Figure
             
+            self.figure = Figure(figsize=(8, 6))
+            self.canvas = FigureCanvas(self.figure)
+            self.layout().addWidget(self.canvas)
+            
+            # Configurar estilo do seaborn e fonte padrão
+            configurar_estilo()
+
+    def _chave_cache(self, funcao, versao, filtros):
+        # Só valores já calculados: nada aqui percorre os dados
+        largura, altura = self.canvas.get_width_height(physical=True)
+        return (funcao.__module__, funcao.__qualname__, versao, largura, altura, filtros)
+
+    def plotar_grafico(self, funcao, *args, filtros=None, versao=None):
+        """`versao` identifica os dados (calculada uma vez na carga) e
+        `filtros` os critérios aplicados a eles; juntos formam a chave do cache"""
+        try:
             # Verificar se os dados são válidos
             if len(args) > 0 and args[0] is None:
                 raise ValueError("Dados não disponíveis")
             
-            # Plotar o gráfico
-            funcao(*args, ax=ax)
+            self._criar_canvas()
+            self._pedido = (funcao, args, filtros, versao)
             
-            # Ajustar layout
-            self.figure.tight_layout()
-            self.canvas.draw()
+            # Reaproveitar o gráfico já desenhado para os mesmos dados e tamanho
+            chave = self._chave_cache(funcao, versao, filtros)
+            buffer = self.cache.obter(chave)
+            if buffer is not None:
+                self.renderizador.cancelar()
+                self._pendente = None
+                self._exibir(buffer)
+                return
+            
+            # Desenhar em segundo plano; um pedido anterior ainda em andamento
+            # é cancelado e o resultado dele, descartado
+            largura, altura = chave[3], chave[4]
+            self._chave_pendente = chave
+            self._pendente = self.renderizador.pedir(funcao, args, largura, altura, self.figure.dpi)
+            geracao = self._pendente
+            QTimer.singleShot(self.ATRASO_ESPERA_MS, lambda: self._mostrar_espera(geracao))
             
         except Exception as e:
-            print(f"DEBUG: Tipo do erro: {type(e)}")
-            print(f"DEBUG: Valor do erro: {e}")
-            error_message = f"Erro ao gerar gráfico: {str(e)}"
-            detailed_error = traceback.format_exc()
-            QMessageBox.critical(self, "Erro", f"{error_message}\n\nDetalhes:\n{detailed_error}")
-            # Limpar a figura em caso de erro
+            self._mostrar_erro(f"Erro ao gerar gráfico: {str(e)}", traceback.format_exc())
+
+    def _exibir(self, buffer):
+        self.figure.clear()
+        self.figure.figimage(buffer, 0, 0, origin='upper', resize=False)
+        self.canvas.draw()
+        
+        if not self._primeiro_grafico:
+            self._primeiro_grafico = True
+            instrumentacao.marcar("primeiro gráfico exibido")
+            instrumentacao.relatorio()
+
+    def _mostrar_espera(self, geracao):
+        if self._pendente != geracao:
+            return
+        self.figure.clear()
+        self.figure.text(0.5, 0.5, "Gerando gráfico...", horizontalalignment='center',
+                         verticalalignment='center', fontsize=14, color='gray')
+        self.canvas.draw()
+
+    def _concluir(self, geracao, buffer):
+        # Resultado de um pedido já substituído por outro
+        if geracao != self._pendente:
+            return
+        self._pendente = None
+        self.cache.guardar(self._chave_pendente, buffer)
+        self._exibir(buffer)
+
+    def _falhar(self, geracao, detalhes):
+        if geracao != self._pendente:
+            return
+        self._pendente = None
+        self._mostrar_erro("Erro ao gerar gráfico", detalhes)
+
+    def _mostrar_erro(self, mensagem, detalhes):
+        QMessageBox.critical(self, "Erro", f"{mensagem}\n\nDetalhes:\n{detalhes}")
+        # Limpar a figura em caso de erro
+        if self.canvas is not None:
             self.figure.clear()
             self.canvas.draw()
 
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # O gráfico exibido é uma imagem do tamanho anterior do canvas
+        if self._pedido is not None:
+            self._timer_redimensionar.start(self.ATRASO_REDIMENSIONAR_MS)
+
+    def _redesenhar_pedido(self):
+        funcao, args, filtros, versao = self._pedido
+        self.plotar_grafico(funcao, *args, filtros=filtros, versao=versao)
+
+    def encerrar(self):
+        self._timer_redimensionar.stop()
+        self.renderizador.encerrar()
+
+class PainelFiltros(QWidget):
+    """Filtros do conjunto de dados do gráfico atual; cada mudança emite os critérios"""
+    filtros_alterados = pyqtSignal(dict)
+
+    # Rótulos das colunas filtráveis
+    ROTULOS = {
+        'Municipio': "Município",
+        'AIS': "AIS",
+        'Genero': "Gênero",
+        'Raca da Vitima': "Raça",
+        'Natureza': "Natureza",
+        'Meio Empregado': "Meio Empregado",
+        'Tipo de Entorpecente': "Entorpecente",
+        'Mes': "Mês",
+    }
+    COLUNAS_POR_LINHA = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.nome = None
+        self.combos = {}
+        self.anos = []
+        self.layout_filtros = QGridLayout(self)
+        self.layout_filtros.setContentsMargins(5, 5, 5, 0)
+
+    def configurar(self, nome, indice):
+        """Recria os filtros para as colunas do índice, sem filtros aplicados"""
+        self.nome = nome
+        while self.layout_filtros.count():
+            widget = self.layout_filtros.takeAt(0).widget()
+            if widget is not None:
+                widget.deleteLater()
+        self.combos = {}
+
+        colunas = [coluna for coluna in indice.colunas() if coluna != 'Ano']
+        for posicao, coluna in enumerate(colunas):
+            combo = QComboBox()
+            combo.addItem("Todos", None)
+            for valor in indice.valores(coluna):
+                combo.addItem(str(valor), valor)
+            self._adicionar(posicao, self.ROTULOS.get(coluna, coluna), combo)
+            self.combos[coluna] = combo
+
+        # Intervalo de anos
+        self.anos = indice.valores('Ano') if 'Ano' in indice.colunas() else []
+        if self.anos:
+            self.combo_ano_inicial = QComboBox()
+            self.combo_ano_final = QComboBox()
+            for ano in self.anos:
+                self.combo_ano_inicial.addItem(str(ano), ano)
+                self.combo_ano_final.addItem(str(ano), ano)
+            self.combo_ano_final.setCurrentIndex(len(self.anos) - 1)
+            self._adicionar(len(colunas), "De", self.combo_ano_inicial)
+            self._adicionar(len(colunas) + 1, "Até", self.combo_ano_final)
+            for combo in (self.combo_ano_inicial, self.combo_ano_final):
+                combo.currentIndexChanged.connect(self._alterado)
+
+        for combo in self.combos.values():
+            combo.currentIndexChanged.connect(self._alterado)
+
+        btn_limpar = QPushButton("Limpar filtros")
+        btn_limpar.clicked.connect(self.limpar)
+        linha = (len(colunas) + 2 * bool(self.anos) + self.COLUNAS_POR_LINHA - 1) // self.COLUNAS_POR_LINHA
+        self.layout_filtros.addWidget(btn_limpar, linha, 0, 1, 2 * self.COLUNAS_POR_LINHA)
+
+    def _adicionar(self, posicao, rotulo, combo):
+        linha, coluna = divmod(posicao, self.COLUNAS_POR_LINHA)
+        self.layout_filtros.addWidget(QLabel(rotulo), linha, 2 * coluna)
+        self.layout_filtros.addWidget(combo, linha, 2 * coluna + 1)
+
+    def criterios(self):
+        """Critérios selecionados, no formato aceito por IndiceFiltros.filtrar"""
+        criterios = {}
+        for coluna, combo in self.combos.items():
+            if combo.currentData() is not None:
+                criterios[coluna] = combo.currentData()
+        if self.anos:
+            inicial, final = self.combo_ano_inicial.currentData(), self.combo_ano_final.currentData()
+            if (inicial, final) != (self.anos[0], self.anos[-1]):
+                criterios['Ano'] = range(inicial, final + 1)
+        return criterios
+
+    def limpar(self):
+        for combo in self._todos_combos():
+            combo.blockSignals(True)
+        for combo in self.combos.values():
+            combo.setCurrentIndex(0)
+        if self.anos:
+            self.combo_ano_inicial.setCurrentIndex(0)
+            self.combo_ano_final.setCurrentIndex(len(self.anos) - 1)
+        for combo in self._todos_combos():
+            combo.blockSignals(False)
+        self._alterado()
+
+    def _todos_combos(self):
+        combos = list(self.combos.values())
+        if self.anos:
+            combos += [self.combo_ano_inicial, self.combo_ano_final]
+        return combos
+
+    def _alterado(self, *_):
+        self.filtros_alterados.emit(self.criterios())
+
 class MenuButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
@@ -195,12 +387,37 @@ class MainWindow(QMainWindow):
         self.btn_entorpecentes = MenuButton("ENTORPECENTES")
         self.btn_crimes_violentos = MenuButton("CRIMES VIOLENTOS")
         self.btn_crimes_sexuais = MenuButton("CRIMES SEXUAIS")
+        self.btn_cruzamentos = MenuButton("CRUZAMENTOS")
+        
+        # Os botões são habilitados à medida que cada conjunto de dados fica pronto
+        self.df_entorpecentes = None
+        self.cubo_entorpecentes = None
+        self.df_crimes_violentos = None
+        self.cubo_crimes_violentos = None
+        self.df_crimes_sexuais = None
+        self.cubo_crimes_sexuais = None
+        self.cruzados = None
+        # Impressão digital de cada conjunto (chave do cache de gráficos)
+        self.versoes = {}
+        self.carregador = CarregadorDados(parent=self)
+        self.carregador.dataset_carregado.connect(self._dataset_carregado)
+        self.carregador.erro.connect(self._erro_carregamento)
+        for botao in (self.btn_entorpecentes, self.btn_crimes_violentos, self.btn_crimes_sexuais,
+                      self.btn_cruzamentos):
+            botao.setEnabled(False)
         
         menu_layout.addWidget(self.btn_entorpecentes)
         menu_layout.addWidget(self.btn_crimes_violentos)
         menu_layout.addWidget(self.btn_crimes_sexuais)
+        menu_layout.addWidget(self.btn_cruzamentos)
         menu_layout.addStretch()
         
+        # Diagnóstico de memória e widgets
+        self.btn_diagnostico = QPushButton("Diagnóstico")
+        self.btn_diagnostico.setFlat(True)
+        self.btn_diagnostico.setStyleSheet("color: #888; font-size: 10px;")
+        menu_layout.addWidget(self.btn_diagnostico)
+        
         # Rodapé discreto
         rodape = QLabel("Desenvolvido para análise de dados públicos do Ceará • 2024")
         rodape.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -209,8 +426,21 @@ class MainWindow(QMainWindow):
         
         # Área de conteúdo
         self.stacked_widget = QStackedWidget()
+        self.menus = {}
+        
+        # Página do gráfico: filtros do conjunto de dados acima do gráfico
+        self.pagina_grafico = QWidget()
+        layout_grafico = QVBoxLayout(self.pagina_grafico)
+        self.painel_filtros = PainelFiltros()
         self.grafico_widget = GraficoWidget()
-        self.stacked_widget.addWidget(self.grafico_widget)
+        layout_grafico.addWidget(self.painel_filtros)
+        layout_grafico.addWidget(self.grafico_widget, 1)
+        self.stacked_widget.addWidget(self.pagina_grafico)
+        
+        # Índices de filtragem (criados no primeiro gráfico de cada conjunto)
+        self.indices = {}
+        self._grafico_atual = None
+        self.painel_filtros.filtros_alterados.connect(self._redesenhar)
         self.stacked_widget.setStyleSheet("""
             QStackedWidget {
                 border-radius: 18px;
@@ -226,55 +456,73 @@ class MainWindow(QMainWindow):
         self.btn_entorpecentes.clicked.connect(self.mostrar_menu_entorpecentes)
         self.btn_crimes_violentos.clicked.connect(self.mostrar_menu_crimes_violentos)
         self.btn_crimes_sexuais.clicked.connect(self.mostrar_menu_crimes_sexuais)
+        self.btn_cruzamentos.clicked.connect(self.mostrar_menu_cruzamentos)
+        self.btn_diagnostico.clicked.connect(self.mostrar_diagnostico)
         
         # Carregar dados após um pequeno delay para garantir que a interface esteja pronta
         QTimer.singleShot(100, self.carregar_dados)
 
-    def _show_graph(self, plot_function, df):
-        self.grafico_widget.plotar_grafico(plot_function, df)
-        self.stacked_widget.setCurrentWidget(self.grafico_widget)
+    def _show_graph(self, nome, plot_function):
+        self._grafico_atual = (nome, plot_function)
+        # Os gráficos de cruzamento usam todos os conjuntos, sem filtros
+        cruzamento = nome == MENU_CRUZAMENTOS
+        self.painel_filtros.setVisible(not cruzamento)
+        # Os filtros são reiniciados ao trocar de conjunto de dados
+        if not cruzamento and self.painel_filtros.nome != nome:
+            self.painel_filtros.configurar(nome, self._indice(nome))
+        self.stacked_widget.setCurrentWidget(self.pagina_grafico)
+        self._redesenhar({} if cruzamento else self.painel_filtros.criterios())
+
+    def _indice(self, nome):
+        from filtros import IndiceFiltros
+        
+        indice = self.indices.get(nome)
+        if indice is None:
+            dados = getattr(self, f"df_{nome}")
+            # Os dados do banco são filtrados pelo próprio banco (WHERE)
+            indice = dados if hasattr(dados, 'filtrar') else IndiceFiltros(dados)
+            self.indices[nome] = indice
+        return indice
+
+    def _redesenhar(self, criterios):
+        from filtros import chave_filtros
+        
+        if self._grafico_atual is None:
+            return
+        nome, plot_function = self._grafico_atual
+        # Sem filtros o gráfico vem do cubo de contagens pré-calculado; com
+        # filtros, das linhas selecionadas pelos bitmaps do índice
+        if nome == MENU_CRUZAMENTOS:
+            dados = self._conjuntos_cruzados()
+            versao = tuple(self.versoes.get(conjunto) for conjunto in NOMES_DATASETS)
+        else:
+            dados = self._indice(nome).filtrar(criterios) if criterios else getattr(self, f"cubo_{nome}")
+            versao = self.versoes.get(nome)
+        self.grafico_widget.plotar_grafico(plot_function, dados, filtros=chave_filtros(criterios),
+                                           versao=versao)
+
+    def _conjuntos_cruzados(self):
+        from cruzamentos import ConjuntosCruzados
+        
+        # Recriado quando um novo conjunto termina de carregar
+        if self.cruzados is None:
+            self.cruzados = ConjuntosCruzados({nome: getattr(self, f"cubo_{nome}") for nome in NOMES_DATASETS})
+        return self.cruzados
 
     def carregar_dados(self):
         try:
-            # Criar diálogo de progresso
-            progress = QProgressDialog("Carregando dados...", "Cancelar", 0, 3, self)
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setWindowTitle("Carregando")
-            progress.setMinimumDuration(0)
-            
-            # Carregar dados de entorpecentes
-            progress.setLabelText("Carregando dados de entorpecentes...")
-            self.df_entorpecentes = carregar_entorpecentes()
-            progress.setValue(1)
-            
-            if progress.wasCanceled():
-                return
-                
-            # Carregar dados de crimes violentos
-            progress.setLabelText("Carregando dados de crimes violentos...")
-            self.df_crimes_violentos = carregar_crimes_violentos()
-            progress.setValue(2)
-            
-            if progress.wasCanceled():
-                return
-                
-            # Carregar dados de crimes sexuais
-            progress.setLabelText("Carregando dados de crimes sexuais...")
-            self.df_crimes_sexuais = carregar_crimes_sexuais()
-            progress.setValue(3)
-            
-            # Verificar se os dados foram carregados corretamente
-            if self.df_entorpecentes is None:
-                self.btn_entorpecentes.setEnabled(False)
-                QMessageBox.warning(self, "Aviso", "Não foi possível carregar os dados de entorpecentes.")
+            # Criar diálogo de progresso (não modal, para que os conjuntos já
+            # carregados possam ser usados enquanto os demais terminam)
+            self.progress = QProgressDialog("Carregando dados...", "Cancelar", 0, len(NOMES_DATASETS), self)
+            self.progress.setWindowModality(Qt.WindowModality.NonModal)
+            self.progress.setWindowTitle("Carregando")
+            self.progress.setMinimumDuration(0)
+            self.progress.setValue(0)
             
-            if self.df_crimes_violentos is None:
-                self.btn_crimes_violentos.setEnabled(False)
-                QMessageBox.warning(self, "Aviso", "Não foi possível carregar os dados de crimes violentos.")
-            
-            if self.df_crimes_sexuais is None:
-                self.btn_crimes_sexuais.setEnabled(False)
-                QMessageBox.warning(self, "Aviso", "Não foi possível carregar os dados de crimes sexuais.")
+            # Carregar os conjuntos de dados em paralelo, fora da thread da interface
+            self.carregador.concluido.connect(self.progress.close)
+            self.progress.canceled.connect(self.carregador.cancelar)
+            self.carregador.iniciar()
             
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao carregar dados: {str(e)}\n\nDetalhes:\n{traceback.format_exc()}")
@@ -282,138 +530,225 @@ class MainWindow(QMainWindow):
             print("Detalhes do erro:")
             traceback.print_exc()
 
+    def _dataset_carregado(self, nome, df, cubo):
+        setattr(self, f"df_{nome}", df)
+        setattr(self, f"cubo_{nome}", cubo)
+        self.versoes[nome] = cubo.impressao_digital() if cubo is not None else None
+        self.progress.setValue(self.progress.value() + 1)
+        
+        # Habilitar o botão do menu assim que o conjunto estiver pronto
+        botao = getattr(self, f"btn_{nome}")
+        if df is None:
+            descricao = nome.replace('_', ' ')
+            QMessageBox.warning(self, "Aviso", f"Não foi possível carregar os dados de {descricao}.")
+        else:
+            botao.setEnabled(True)
+            self.cruzados = None
+        
+        # Os cruzamentos precisam de ao menos dois conjuntos
+        carregados = sum(getattr(self, f"df_{conjunto}") is not None for conjunto in NOMES_DATASETS)
+        self.btn_cruzamentos.setEnabled(carregados >= 2)
+
+    def _erro_carregamento(self, nome, mensagem):
+        print(f"Erro ao carregar dados de {nome.replace('_', ' ')}: {mensagem}")
+
+    def closeEvent(self, event):
+        # Interromper cargas ainda em andamento ao fechar a janela
+        self.carregador.cancelar()
+        self.grafico_widget.encerrar()
+        super().closeEvent(event)
+
     def mostrar_menu_entorpecentes(self):
-        if self.df_entorpecentes is None:
-            QMessageBox.warning(self, "Aviso", "Dados de entorpecentes não disponíveis.")
-            return
-            
-        menu = QWidget()
-        layout = QVBoxLayout(menu)
-        
-        # Título
-        titulo = QLabel("Análise de Entorpecentes")
-        titulo.setFont(QFont('Arial', 14, QFont.Weight.Bold))
-        titulo.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(titulo)
-        
-        # Informações
-        info = InfoLabel("Selecione uma opção para visualizar a análise de apreensões de entorpecentes no Ceará.")
-        layout.addWidget(info)
-        
-        botoes = [
-            ("Tipos de Entorpecentes", lambda: self._show_graph(tipo_entorpecente, self.df_entorpecentes)),
-            ("Peso", lambda: self._show_graph(peso_entorpecente, self.df_entorpecentes)),
-            ("Município", lambda: self._show_graph(municipio_entorpecente, self.df_entorpecentes)),
-            ("AIS", lambda: self._show_graph(ais_entorpecente, self.df_entorpecentes)),
-            ("Ano", lambda: self._show_graph(ano_entorpecente, self.df_entorpecentes)),
-            ("Mês", lambda: self._show_graph(mes_entorpecente, self.df_entorpecentes)),
-            ("Dia da Semana", lambda: self._show_graph(dia_semana_entorpecente, self.df_entorpecentes)),
-            ("Horário", lambda: self._show_graph(horario_entorpecente, self.df_entorpecentes))
-        ]
-        
-        for texto, funcao in botoes:
-            btn = MenuButton(texto)
-            btn.clicked.connect(funcao)
-            layout.addWidget(btn)
-        
-        layout.addStretch()
-        self.stacked_widget.addWidget(menu)
-        self.stacked_widget.setCurrentWidget(menu)
+        self.mostrar_menu('entorpecentes')
 
     def mostrar_menu_crimes_violentos(self):
-        if self.df_crimes_violentos is None:
-            QMessageBox.warning(self, "Aviso", "Dados de crimes violentos não disponíveis.")
+        self.mostrar_menu('crimes_violentos')
+
+    def mostrar_menu_crimes_sexuais(self):
+        self.mostrar_menu('crimes_sexuais')
+
+    def mostrar_menu_cruzamentos(self):
+        self.mostrar_menu(MENU_CRUZAMENTOS)
+
+    def mostrar_menu(self, nome):
+        if nome != MENU_CRUZAMENTOS and getattr(self, f"df_{nome}") is None:
+            QMessageBox.warning(self, "Aviso", f"Dados de {nome.replace('_', ' ')} não disponíveis.")
             return
-            
-        menu = QWidget()
-        layout = QVBoxLayout(menu)
         
-        # Título
-        titulo = QLabel("Análise de Crimes Violentos")
-        titulo.setFont(QFont('Arial', 14, QFont.Weight.Bold))
-        titulo.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(titulo)
-        
-        # Informações
-        info = InfoLabel("Selecione uma opção para visualizar a análise de crimes violentos no Ceará.")
-        layout.addWidget(info)
-        
-        botoes = [
-            ("Meio Empregado", lambda: self._show_graph(meio_empregado_cv, self.df_crimes_violentos)),
-            ("Natureza", lambda: self._show_graph(natureza_cv, self.df_crimes_violentos)),
-            ("Gênero", lambda: self._show_graph(genero_cv, self.df_crimes_violentos)),
-            ("Raça", lambda: self._show_graph(raca_cv, self.df_crimes_violentos)),
-            ("Idade", lambda: self._show_graph(idade_cv, self.df_crimes_violentos)),
-            ("Escolaridade", lambda: self._show_graph(escolaridade_cv, self.df_crimes_violentos)),
-            ("Município", lambda: self._show_graph(municipio_cv, self.df_crimes_violentos)),
-            ("AIS", lambda: self._show_graph(ais_cv, self.df_crimes_violentos)),
-            ("Ano", lambda: self._show_graph(ano_cv, self.df_crimes_violentos)),
-            ("Mês", lambda: self._show_graph(mes_cv, self.df_crimes_violentos)),
-            ("Dia da Semana", lambda: self._show_graph(dia_semana_cv, self.df_crimes_violentos)),
-            ("Horário", lambda: self._show_graph(horario_cv, self.df_crimes_violentos))
-        ]
-        
-        for texto, funcao in botoes:
-            btn = MenuButton(texto)
-            btn.clicked.connect(funcao)
-            layout.addWidget(btn)
-        
-        layout.addStretch()
-        self.stacked_widget.addWidget(menu)
+        # Cada página de menu é criada uma única vez e reaproveitada
+        menu = self.menus.get(nome)
+        if menu is None:
+            menu = self._criar_menu(nome)
+            self.menus[nome] = menu
+            self.stacked_widget.addWidget(menu)
         self.stacked_widget.setCurrentWidget(menu)
 
-    def mostrar_menu_crimes_sexuais(self):
-        if self.df_crimes_sexuais is None:
-            QMessageBox.warning(self, "Aviso", "Dados de crimes sexuais não disponíveis.")
-            return
-            
+    def _criar_menu(self, nome):
+        definicao = MENUS[nome]
         menu = QWidget()
         layout = QVBoxLayout(menu)
         
         # Título
-        titulo = QLabel("Análise de Crimes Sexuais")
+        titulo = QLabel(definicao.titulo)
         titulo.setFont(QFont('Arial', 14, QFont.Weight.Bold))
         titulo.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(titulo)
         
         # Informações
-        info = InfoLabel("Selecione uma opção para visualizar a análise de crimes sexuais no Ceará.")
+        info = InfoLabel(definicao.descricao)
         layout.addWidget(info)
         
-        botoes = [
-            ("Gênero", lambda: self._show_graph(genero_cs, self.df_crimes_sexuais)),
-            ("Raça", lambda: self._show_graph(raca_cs, self.df_crimes_sexuais)),
-            ("Idade", lambda: self._show_graph(idade_cs, self.df_crimes_sexuais)),
-            ("Escolaridade", lambda: self._show_graph(escolaridade_cs, self.df_crimes_sexuais)),
-            ("Município", lambda: self._show_graph(municipio_cs, self.df_crimes_sexuais)),
-            ("AIS", lambda: self._show_graph(ais_cs, self.df_crimes_sexuais)),
-            ("Ano", lambda: self._show_graph(ano_cs, self.df_crimes_sexuais)),
-            ("Mês", lambda: self._show_graph(mes_cs, self.df_crimes_sexuais)),
-            ("Dia da Semana", lambda: self._show_graph(dia_semana_cs, self.df_crimes_sexuais)),
-            ("Horário", lambda: self._show_graph(horario_cs, self.df_crimes_sexuais))
-        ]
-        
-        for texto, funcao in botoes:
-            btn = MenuButton(texto)
-            btn.clicked.connect(funcao)
+        for grafico in definicao.graficos:
+            btn = MenuButton(grafico.rotulo)
+            btn.clicked.connect(lambda _, grafico=grafico: self._show_graph(nome, resolver(grafico)))
             layout.addWidget(btn)
         
         layout.addStretch()
-        self.stacked_widget.addWidget(menu)
-        self.stacked_widget.setCurrentWidget(menu)
+        
+        # Rolagem para menus com mais botões do que cabem na janela
+        rolagem = QScrollArea()
+        rolagem.setWidgetResizable(True)
+        rolagem.setFrameShape(QFrame.Shape.NoFrame)
+        rolagem.setWidget(menu)
+        return rolagem
+
+    def diagnostico(self):
+        """Contagem de widgets e uso de memória, para acompanhar sessões longas"""
+        return {
+            'Páginas no QStackedWidget': self.stacked_widget.count(),
+            'Menus criados': len(self.menus),
+            'Widgets existentes': len(QApplication.allWidgets()),
+            'Índices de filtragem': len(self.indices),
+            'Gráficos em cache': len(self.grafico_widget.cache),
+            'Cache de gráficos (MiB)': round(self.grafico_widget.cache.total_bytes / 1024 ** 2, 1),
+            'Memória residente (MiB)': _memoria_residente_mib(),
+        }
+
+    def mostrar_diagnostico(self):
+        from validacao import relatorio_validacao
+        
+        linhas = [f"{chave}: {valor}" for chave, valor in self.diagnostico().items()]
+        
+        # Relatório de validação de cada conjunto já carregado
+        relatorios = {}
+        for nome in NOMES_DATASETS:
+            df = getattr(self, f"df_{nome}")
+            if df is not None:
+                relatorios[nome] = relatorio_validacao(df)
+        dialogo = DiagnosticoDialog(linhas, relatorios, self)
+        # Sem isso cada abertura deixaria o diálogo e suas tabelas na janela
+        dialogo.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialogo.exec()
+
+class DiagnosticoDialog(QDialog):
+    """Diagnóstico da sessão e relatório de validação de cada conjunto de dados"""
+
+    COLUNAS = ["Tipo", "Nulos", "% Nulos", "Distintos", "Mínimo", "Máximo", "Falhas de conversão"]
+
+    def __init__(self, linhas_sessao, relatorios, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnóstico")
+        self.resize(900, 500)
+        layout = QVBoxLayout(self)
+        abas = QTabWidget()
+        layout.addWidget(abas)
+        
+        sessao = QLabel("\n".join(linhas_sessao))
+        sessao.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        abas.addTab(sessao, "Sessão")
+        
+        for nome, relatorio in relatorios.items():
+            abas.addTab(self._pagina_relatorio(relatorio), nome.replace('_', ' ').capitalize())
+        
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.accept)
+        layout.addWidget(btn_fechar)
+
+    def _pagina_relatorio(self, relatorio):
+        pagina = QWidget()
+        layout = QVBoxLayout(pagina)
+        layout.addWidget(QLabel(f"{relatorio.linhas} registros"))
+        
+        tabela = QTableWidget(len(relatorio.colunas), len(self.COLUNAS))
+        tabela.setHorizontalHeaderLabels(self.COLUNAS)
+        tabela.setVerticalHeaderLabels(list(relatorio.colunas))
+        tabela.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for linha, perfil in enumerate(relatorio.colunas.values()):
+            distintos = f"{'' if perfil['cardinalidade_exata'] else '~'}{perfil['cardinalidade']}"
+            valores = [perfil['tipo'], perfil['nulos'], f"{perfil['percentual_nulos']:.1%}", distintos,
+                       perfil['minimo'], perfil['maximo'],
+                       f"{perfil['falhas_conversao']} ({perfil['taxa_falhas']:.1%})"]
+            for coluna, valor in enumerate(valores):
+                tabela.setItem(linha, coluna, QTableWidgetItem('' if valor is None else str(valor)))
+        tabela.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(tabela)
+        
+        alertas = relatorio.alertas()
+        if alertas:
+            aviso = InfoLabel("\n".join(alertas))
+            layout.addWidget(aviso)
+        return pagina
+
+def _memoria_residente_mib():
+    """Memória residente do processo em MiB (None se não for possível medir)"""
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 1024 ** 2, 1)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def aplicar_tema(app, tema=TEMA):
+    """Aplica o tema do qt_material reaproveitando a folha de estilo já compilada"""
+    import qt_material
+    
+    # A folha compilada depende da instalação do qt_material e do sistema operacional
+    versao = int(os.path.getmtime(qt_material.__file__))
+    arquivo = os.path.join(DIRETORIO_CACHE_TEMA, f"tema-{versao}-{sys.platform}-{tema}.qss")
+    if os.path.exists(arquivo):
+        try:
+            with open(arquivo, encoding='utf-8') as f:
+                folha_estilo = f.read()
+            # Mesmos efeitos de apply_stylesheet, sem renderizar o template
+            app.setStyle('Fusion')
+            qt_material.add_fonts()
+            definicao = qt_material.get_theme(tema)
+            qt_material.set_icons_theme(definicao, parent='theme')
+            paleta = app.palette()
+            cor = QColor(definicao['primaryColor'])
+            cor.setAlpha(92)
+            paleta.setColor(QPalette.ColorRole.Text, cor)
+            app.setPalette(paleta)
+            app.setStyleSheet(folha_estilo)
+            return
+        except Exception as e:
+            print(f"Cache do tema inválido, recompilando: {str(e)}")
+    
+    os.makedirs(DIRETORIO_CACHE_TEMA, exist_ok=True)
+    qt_material.apply_stylesheet(app, theme=tema, save_as=arquivo)
 
 def main():
     try:
+        instrumentacao.marcar("imports da interface")
         app = QApplication(sys.argv)
+        instrumentacao.marcar("QApplication criada")
         
         # Configurar estilo
-        apply_stylesheet(app, theme='light_blue.xml')
+        with instrumentacao.etapa("tema qt_material"):
+            aplicar_tema(app)
         
         # Criar janela principal
-        window = MainWindow()
+        with instrumentacao.etapa("MainWindow"):
+            window = MainWindow()
         
         # Mostrar janela
         window.show()
+        QTimer.singleShot(0, lambda: (instrumentacao.marcar("janela exibida"), instrumentacao.relatorio()))
         
         # Iniciar aplicação
         sys.exit(app.exec())
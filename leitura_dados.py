@@ -5,76 +5,498 @@ import numpy as np
 # Unicodedata para normalização de strings
 import unicodedata
 
+# Hashlib e os para o cache das planilhas já tratadas
+import hashlib
+import os
+import glob
+import shutil
+
+from validacao import perfilar
+
+
+# Pasta (ao lado das planilhas) onde ficam os dados já tratados
+DIRETORIO_CACHE = '.cache_dados'
+
+# Número de linhas lidas e tratadas de cada vez
+TAMANHO_BLOCO = 20000
+
+# Incrementar ao mudar o formato dos dados tratados
+VERSAO_LIMPEZA = 3
+
+# Módulos do caminho de limpeza e validação: alterar qualquer um deles
+# invalida os dados tratados (o relatório de validação vai junto no cache)
+MODULOS_PIPELINE = ('leitura_dados.py', 'validacao.py')
+
+_VERSAO_PIPELINE = None
+
+# Planilhas completas de cada conjunto de dados
+PLANILHA_ENTORPECENTES = 'Entorpecente_2009-a-2024.xlsx'
+PLANILHA_CRIMES_VIOLENTOS = 'CVLI_2009-2024.xlsx'
+PLANILHA_CRIMES_SEXUAIS = 'Crimes-Sexuais_2009-a-2024.xlsx'
+
+# Esquemas de tipos compactos de cada conjunto de dados (aplicados na carga)
+ESQUEMA_ENTORPECENTES = {
+    'Municipio': 'category',
+    'AIS': 'category',
+    'Tipo de Entorpecente': 'category',
+    'Quantidade (Kg)': 'float32',
+    'Data': 'datetime64[ns]',
+    'Hora': 'Int16',
+    'Dia da Semana': 'category',
+}
+
+ESQUEMA_CRIMES_VIOLENTOS = {
+    'Municipio': 'category',
+    'AIS': 'category',
+    'Natureza': 'category',
+    'Data': 'datetime64[ns]',
+    'Hora': 'Int16',
+    'Dia da Semana': 'category',
+    'Meio Empregado': 'category',
+    'Genero': 'category',
+    'Idade da Vitima': 'UInt8',
+    'Escolaridade da Vitima': 'category',
+    'Raca da Vitima': 'category',
+}
+
+ESQUEMA_CRIMES_SEXUAIS = {
+    'Municipio': 'category',
+    'AIS': 'category',
+    'Data': 'datetime64[ns]',
+    'Hora': 'Int16',
+    'Dia da Semana': 'category',
+    'Genero': 'category',
+    'Idade da Vitima': 'UInt8',
+    'Escolaridade da Vitima': 'category',
+    'Raca da Vitima': 'category',
+}
+
+
+# Marcadores de valor ausente usados nas planilhas
+VALORES_NULOS = ['', 'nan', 'NaN', 'NULL', 'null', 'None', 'none']
+
+
+# Função para remover os acentos de um texto
+def sem_acentos(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+
 
 # Função para limpar os colunas dos arquivos Excel
-def limpar_colunas(df):
-    """Limpa os nomes das colunas e valores removendo espaços extras e acentos"""
+def limpar_colunas(df, remover_acentos=False):
+    """Limpa os nomes das colunas (sem acentos e espaços extras) e os valores
+    das colunas de texto (ver normalizar_textos)"""
     if df is None:
         return None
         
     # Limpar nomes das colunas
-    df.columns = [unicodedata.normalize('NFKD', str(col)).encode('ASCII', 'ignore').decode('ASCII').strip() 
-                 for col in df.columns]
+    df.columns = [sem_acentos(str(col)).strip() for col in df.columns]
     
     # Limpar valores nas colunas
     for col in df.columns:
-        if df[col].dtype == 'object':  # Apenas para colunas de texto
-            df[col] = df[col].apply(lambda x: str(x).strip() if pd.notnull(x) else x)
+        if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
+            df[col] = normalizar_textos(df[col], remover_acentos)
     
+    # tratar_dados não precisa procurar de novo os marcadores de nulo
+    df.attrs['valores_normalizados'] = True
     return df
 
 
+# Função para normalizar uma coluna de texto valor distinto a valor distinto
+def normalizar_textos(serie, remover_acentos=False):
+    """Converte os valores para texto sem espaços nas pontas, troca os
+    marcadores de nulo por NaN e, opcionalmente, remove os acentos.
+
+    A coluna é fatorada (códigos + valores distintos): a limpeza roda só nos
+    valores distintos e a coluna é remontada a partir dos códigos, então o
+    custo cresce com a cardinalidade e não com o número de linhas."""
+    codigos, unicos = pd.factorize(serie)
+    limpos = [str(valor).strip() for valor in unicos]
+    if remover_acentos:
+        limpos = [sem_acentos(valor) for valor in limpos]
+    nulos = set(VALORES_NULOS)
+    # O código -1 (valor ausente) aponta para o NaN no fim do vetor
+    valores = np.array([np.nan if valor in nulos else valor for valor in limpos] + [np.nan], dtype=object)
+    dtype = serie.dtype if pd.api.types.is_string_dtype(serie) and not pd.api.types.is_object_dtype(serie) else object
+    return pd.Series(valores[codigos], index=serie.index, name=serie.name, dtype=dtype)
+
+
 # Função para carregar e limpar o arquivo Entorpecentes Excel
-def carregar_entorpecentes(caminho='Entorpecente_2009-a-2024.xlsx'):
+def carregar_entorpecentes(caminho=PLANILHA_ENTORPECENTES, usar_cache=True, progresso=None):
     """Carrega e limpa os dados de entorpecentes"""
     try:
         print(f"\nCarregando dados de entorpecentes de {caminho}...")
-        df = pd.read_excel(caminho)
-        df = limpar_colunas(df)
-        df = tratar_dados(df)
-        df = validar_dados(df)
-        return df
+        return _carregar_conjunto(caminho, ESQUEMA_ENTORPECENTES, usar_cache, progresso)
     except Exception as e:
         print(f"Erro ao carregar dados de entorpecentes: {str(e)}")
         return None
 
 
 # Função para carregar e limpar o arquivo Crimes Violentos Excel
-def carregar_crimes_violentos(caminho='CVLI_2009-2024.xlsx'):
+def carregar_crimes_violentos(caminho=PLANILHA_CRIMES_VIOLENTOS, usar_cache=True, progresso=None):
     """Carrega e limpa os dados de crimes violentos"""
     try:
         print(f"\nCarregando dados de crimes violentos de {caminho}...")
-        df = pd.read_excel(caminho)
-        df = limpar_colunas(df)
-        df = tratar_dados(df)
-        df = validar_dados(df)
-        return df
+        return _carregar_conjunto(caminho, ESQUEMA_CRIMES_VIOLENTOS, usar_cache, progresso)
     except Exception as e:
         print(f"Erro ao carregar dados de crimes violentos: {str(e)}")
         return None
 
 # Função para carregar e limpar o arquivo Crimes Sexuais Excel
-def carregar_crimes_sexuais(caminho='Crimes-Sexuais_2009-a-2024.xlsx'):
+def carregar_crimes_sexuais(caminho=PLANILHA_CRIMES_SEXUAIS, usar_cache=True, progresso=None):
     """Carrega e limpa os dados de crimes sexuais"""
     try:
         print(f"\nCarregando dados de crimes sexuais de {caminho}...")
-        df = pd.read_excel(caminho)
-        df = limpar_colunas(df)
-        df = tratar_dados(df)
-        df = validar_dados(df)
-        return df
+        return _carregar_conjunto(caminho, ESQUEMA_CRIMES_SEXUAIS, usar_cache, progresso)
     except Exception as e:
         print(f"Erro ao carregar dados de crimes sexuais: {str(e)}")
         return None
 
+
+# Conjuntos de dados da aplicação e suas funções de carga
+DATASETS = {
+    'entorpecentes': carregar_entorpecentes,
+    'crimes_violentos': carregar_crimes_violentos,
+    'crimes_sexuais': carregar_crimes_sexuais,
+}
+
+
+# Planilha completa e esquema de cada conjunto de dados
+CONJUNTOS = {
+    'entorpecentes': (PLANILHA_ENTORPECENTES, ESQUEMA_ENTORPECENTES),
+    'crimes_violentos': (PLANILHA_CRIMES_VIOLENTOS, ESQUEMA_CRIMES_VIOLENTOS),
+    'crimes_sexuais': (PLANILHA_CRIMES_SEXUAIS, ESQUEMA_CRIMES_SEXUAIS),
+}
+
+
+# Função para carregar a planilha completa junto com os incrementos ingeridos
+def _carregar_conjunto(caminho, esquema, usar_cache=True, progresso=None):
+    caminho = arquivo_dados(caminho)
+    df = _carregar_com_cache(caminho, esquema, usar_cache, progresso)
+    if df is None:
+        return None
+    return _anexar_incrementos(df, caminho, esquema)
+
+
+# Extensões dos formatos colunares (exportados por converter_planilhas.py)
+FORMATOS_COLUNARES = ('.parquet', '.feather', '.arrow')
+
+
+# Função para escolher o motor de leitura mais rápido disponível para um arquivo
+def motor_leitura(caminho):
+    """Retorna o nome do motor usado por ler_em_blocos para o arquivo"""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        return 'pyarrow' if _tem_pyarrow() else 'pandas'
+    if extensao in FORMATOS_COLUNARES:
+        return 'pyarrow'
+    if extensao in ('.xlsx', '.xlsm', '.xls', '.ods') and _tem_calamine():
+        return 'calamine'
+    if extensao in ('.xlsx', '.xlsm'):
+        return 'openpyxl'
+    return 'pandas'
+
+
+def _tem_calamine():
+    try:
+        import python_calamine  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# Função para ler uma planilha, um CSV ou um arquivo colunar em blocos de linhas
+def ler_em_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera pares (DataFrame do bloco, total estimado de linhas) sem carregar o
+    arquivo inteiro, usando o motor mais rápido disponível: leitor de CSV do
+    pyarrow, Parquet/Feather mapeados em memória, calamine para planilhas (se
+    instalado) e o modo somente leitura do openpyxl para .xlsx. Outros formatos
+    são lidos de uma vez com pd.read_excel, como um único bloco."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    motor = motor_leitura(caminho)
+    if extensao == '.csv':
+        leitor = _ler_csv_pyarrow if motor == 'pyarrow' else _ler_csv_pandas
+    elif extensao == '.parquet':
+        leitor = _ler_parquet
+    elif extensao in FORMATOS_COLUNARES:
+        leitor = _ler_arrow
+    elif motor == 'calamine':
+        leitor = _ler_calamine
+    elif motor == 'openpyxl':
+        leitor = _ler_xlsx_openpyxl
+    else:
+        df = pd.read_excel(caminho)
+        yield df, len(df)
+        return
+    yield from leitor(caminho, tamanho_bloco)
+
+
+def _ler_csv_pandas(caminho, tamanho_bloco):
+    for bloco in pd.read_csv(caminho, chunksize=tamanho_bloco):
+        yield bloco, None
+
+
+def _ler_csv_pyarrow(caminho, tamanho_bloco):
+    import csv
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    # Todas as colunas como texto: a inferência de tipos por bloco falharia em
+    # colunas mistas (ex.: Idade com números e 'Não Informada'), e os tipos
+    # são convertidos depois por tratar_dados e aplicar_esquema
+    with open(caminho, newline='', encoding='utf-8') as f:
+        cabecalho = next(csv.reader(f), [])
+    leitor = pacsv.open_csv(
+        caminho,
+        read_options=pacsv.ReadOptions(block_size=max(tamanho_bloco * 128, 1 << 20)),
+        convert_options=pacsv.ConvertOptions(
+            column_types={coluna: pa.string() for coluna in cabecalho},
+            strings_can_be_null=True,
+        ),
+    )
+    for lote in leitor:
+        if lote.num_rows:
+            yield lote.to_pandas(), None
+
+
+def _ler_parquet(caminho, tamanho_bloco):
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(caminho, memory_map=True)
+    total = arquivo.metadata.num_rows
+    for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+        yield lote.to_pandas(), total
+
+
+def _ler_arrow(caminho, tamanho_bloco):
+    import pyarrow as pa
+
+    # Arquivo Feather/Arrow mapeado em memória: os lotes não são copiados até
+    # a conversão para pandas
+    with pa.memory_map(caminho) as fonte:
+        leitor = pa.ipc.open_file(fonte)
+        tabela = leitor.read_all()
+        for inicio in range(0, tabela.num_rows, tamanho_bloco):
+            yield tabela.slice(inicio, tamanho_bloco).to_pandas(), tabela.num_rows
+
+
+def _ler_calamine(caminho, tamanho_bloco):
+    from python_calamine import CalamineWorkbook
+
+    planilha = CalamineWorkbook.from_path(caminho).get_sheet_by_index(0)
+    total = getattr(planilha, 'height', None)
+    if hasattr(planilha, 'iter_rows'):
+        linhas = iter(planilha.iter_rows())
+    else:
+        linhas = iter(planilha.to_python())
+    # calamine devolve '' nas células vazias
+    yield from _blocos_de_linhas(linhas, total - 1 if total else None, tamanho_bloco, vazios=(None, ''))
+
+
+def _ler_xlsx_openpyxl(caminho, tamanho_bloco):
+    from openpyxl import load_workbook
+
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        planilha = livro.worksheets[0]
+        total = (planilha.max_row - 1) if planilha.max_row else None
+        yield from _blocos_de_linhas(planilha.iter_rows(values_only=True), total, tamanho_bloco)
+    finally:
+        livro.close()
+
+
+# Função para agrupar as linhas de uma planilha (cabeçalho primeiro) em DataFrames
+def _blocos_de_linhas(linhas, total, tamanho_bloco, vazios=(None,)):
+    cabecalho = next(linhas, None)
+    if cabecalho is None:
+        return
+    colunas = [str(col) if col not in vazios else f"Unnamed: {i}" for i, col in enumerate(cabecalho)]
+
+    bloco = []
+    for linha in linhas:
+        if all(valor in vazios for valor in linha):
+            continue
+        bloco.append(linha)
+        if len(bloco) == tamanho_bloco:
+            yield pd.DataFrame(bloco, columns=colunas), total
+            bloco = []
+    if bloco:
+        yield pd.DataFrame(bloco, columns=colunas), total
+
+
+# Função para localizar a versão convertida (mais rápida) de uma planilha
+def arquivo_dados(caminho):
+    """Retorna o arquivo colunar gerado por converter_planilhas.py ao lado da
+    planilha, se existir e não for mais antigo que ela; senão, a própria planilha"""
+    base, extensao = os.path.splitext(caminho)
+    if extensao.lower() in FORMATOS_COLUNARES + ('.csv',):
+        return caminho
+    for formato in FORMATOS_COLUNARES:
+        convertido = base + formato
+        if os.path.exists(convertido) and (not os.path.exists(caminho)
+                                           or os.path.getmtime(convertido) >= os.path.getmtime(caminho)):
+            return convertido
+    return caminho
+
+
+# Função que executa a leitura e a limpeza completas de uma planilha
+def _processar_planilha(caminho, esquema=None, progresso=None):
+    """Lê a planilha em blocos e aplica o pipeline de limpeza a cada bloco,
+    mantendo baixo o pico de memória. Se informado, progresso(bloco, linhas
+    lidas, total estimado) é chamado com cada bloco já tratado."""
+    print(f"Lendo {os.path.basename(caminho)} (motor: {motor_leitura(caminho)})")
+    partes = []
+    lidas = 0
+    # Valores presentes antes e depois da conversão de tipos, por coluna
+    brutos = None
+    convertidos = None
+    # Bytes de cada coluna antes da conversão de tipos, somados nos blocos
+    memoria_antes = None
+    for bloco, total in ler_em_blocos(caminho):
+        bloco = limpar_colunas(bloco)
+        presentes = bloco.notna().sum()
+        bloco = tratar_dados(bloco, exibir_estatisticas=False)
+        bloco.attrs.pop('horas_invalidas', None)
+        bloco.attrs.pop('valores_normalizados', None)
+        if esquema:
+            memoria = bloco.memory_usage(deep=True)
+            memoria_antes = memoria if memoria_antes is None else memoria_antes.add(memoria, fill_value=0)
+            bloco = aplicar_esquema(bloco, esquema, relatorio=False)
+        brutos = presentes if brutos is None else brutos.add(presentes, fill_value=0)
+        convertidos = bloco.notna().sum() if convertidos is None else convertidos.add(bloco.notna().sum(), fill_value=0)
+        partes.append(bloco)
+        lidas += len(bloco)
+        if progresso is not None:
+            progresso(bloco, lidas, total)
+
+    if not partes:
+        return None
+    df = concatenar(partes)
+    del partes
+    if memoria_antes is not None:
+        relatorio_memoria(memoria_antes, df.memory_usage(deep=True))
+
+    # Valores presentes na planilha que viraram nulos na conversão de tipos
+    falhas = {coluna: (int(brutos[coluna] - convertidos.get(coluna, 0)), int(brutos[coluna]))
+              for coluna in brutos.index if coluna in df.columns}
+    # O relatório vai junto com o DataFrame (df.attrs) para o cache
+    df.attrs['validacao'] = validar_dados(df, falhas).para_dict()
+    # Guardar a origem para localizar o cache e os agregados do conjunto
+    df.attrs['caminho'] = caminho
+    return df
+
+
+# Função para calcular a chave do cache de uma planilha
+def chave_cache(caminho):
+    """Gera a chave do cache a partir do caminho, data de modificação e tamanho
+    da planilha e da versão do pipeline de limpeza"""
+    info = os.stat(caminho)
+    h = hashlib.sha1()
+    h.update(os.path.abspath(caminho).encode('utf-8'))
+    h.update(f"{info.st_mtime_ns}:{info.st_size}".encode('ascii'))
+    h.update(_versao_pipeline().encode('ascii'))
+    return h.hexdigest()[:16]
+
+
+# Função para obter o caminho base do cache de uma planilha
+def caminho_cache(caminho):
+    """Retorna o caminho (sem extensão) do cache da planilha"""
+    pasta = os.path.join(os.path.dirname(os.path.abspath(caminho)), DIRETORIO_CACHE)
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return os.path.join(pasta, f"{nome}-{chave_cache(caminho)}")
+
+
+# Função para identificar a versão do código de limpeza
+def _versao_pipeline():
+    """Combina VERSAO_LIMPEZA com o hash dos MODULOS_PIPELINE, para que
+    qualquer alteração no código de limpeza ou de validação invalide o
+    cache automaticamente"""
+    global _VERSAO_PIPELINE
+    if _VERSAO_PIPELINE is None:
+        pasta = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for modulo in MODULOS_PIPELINE:
+            with open(os.path.join(pasta, modulo), 'rb') as f:
+                h.update(f.read())
+        _VERSAO_PIPELINE = f"{VERSAO_LIMPEZA}-{h.hexdigest()[:12]}"
+    return _VERSAO_PIPELINE
+
+
+# Função para ler o DataFrame limpo do cache ou reconstruí-lo
+def _carregar_com_cache(caminho, esquema=None, usar_cache=True, progresso=None):
+    """Carrega o DataFrame limpo do cache colunar, reconstruindo o cache
+    quando a planilha ou o código de limpeza mudarem"""
+    if not usar_cache:
+        return _processar_planilha(caminho, esquema, progresso)
+
+    base = caminho_cache(caminho)
+    for extensao, ler in _formatos_cache():
+        arquivo = base + extensao
+        if os.path.exists(arquivo):
+            try:
+                df = ler(arquivo)
+                df.attrs['caminho'] = caminho
+                print(f"Dados carregados do cache {arquivo}")
+                return df
+            except Exception as e:
+                print(f"Cache inválido em {arquivo}, reconstruindo: {str(e)}")
+
+    df = _processar_planilha(caminho, esquema, progresso)
+    if df is not None:
+        _salvar_cache(df, base)
+    return df
+
+
+# Formatos de cache disponíveis, do mais rápido para o mais simples
+def _formatos_cache():
+    formatos = []
+    if _tem_pyarrow():
+        formatos.append(('.parquet', pd.read_parquet))
+    formatos.append(('.pkl', pd.read_pickle))
+    return formatos
+
+
+def _tem_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# Função para gravar o DataFrame limpo no cache
+def _salvar_cache(df, base):
+    """Grava o cache de forma atômica e remove versões antigas da mesma planilha"""
+    try:
+        pasta = os.path.dirname(base)
+        os.makedirs(pasta, exist_ok=True)
+
+        # Remover caches antigos da mesma planilha
+        prefixo = os.path.basename(base).rsplit('-', 1)[0] + '-'
+        for nome in os.listdir(pasta):
+            if nome.startswith(prefixo) and not nome.startswith(os.path.basename(base)):
+                os.remove(os.path.join(pasta, nome))
+
+        temporario = base + '.tmp'
+        if _tem_pyarrow():
+            arquivo = base + '.parquet'
+            df.to_parquet(temporario, index=False)
+        else:
+            arquivo = base + '.pkl'
+            df.to_pickle(temporario)
+        os.replace(temporario, arquivo)
+        print(f"Cache gravado em {arquivo}")
+    except Exception as e:
+        print(f"Não foi possível gravar o cache: {str(e)}")
+
 # Função para tratar valores nulos e inconsistentes
-def tratar_dados(df):
+def tratar_dados(df, exibir_estatisticas=True):
     """Trata valores nulos e converte tipos de dados"""
     if df is None:
         return None
         
-    # Substituir valores nulos por NaN
-    df = df.replace(['', 'nan', 'NaN', 'NULL', 'null', 'None', 'none'], np.nan)
+    # Substituir valores nulos por NaN (limpar_colunas já faz isso nas colunas de texto)
+    if not df.attrs.get('valores_normalizados'):
+        df = df.replace(VALORES_NULOS, np.nan)
     
     # Converter colunas numéricas
     colunas_numericas = ['Peso', 'Idade', 'Quantidade (Kg)']
@@ -87,63 +509,322 @@ def tratar_dados(df):
         df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
     
     if 'Hora' in df.columns:
-        # Tentar diferentes formatos de hora
-        def converter_hora(hora):
-            if pd.isna(hora) or str(hora).strip().lower() == 'nan':
-                return np.nan
-            try:
-                # Tentar converter diretamente, o pandas pode inferir
-                return pd.to_datetime(hora).time()
-            except Exception as e:
-                try:
-                    # Tentar formato HH:MM
-                    if ':' in str(hora):
-                        return pd.to_datetime(str(hora), format='%H:%M').time()
-                    # Tentar formato HHMM
-                    elif len(str(hora)) == 4 and str(hora).isdigit():
-                        return pd.to_datetime(str(hora), format='%H%M').time()
-                    # Tentar formato HH
-                    elif len(str(hora)) == 2 and str(hora).isdigit():
-                        return pd.to_datetime(str(hora), format='%H').time()
-                    else:
-                        print(f"DEBUG: Formato de hora desconhecido: '{hora}'")
-                        return np.nan
-                except Exception as inner_e:
-                    print(f"DEBUG: Erro ao converter hora '{hora}': {e} / {inner_e}")
-                    return np.nan
-        
-        df['Hora'] = df['Hora'].apply(converter_hora)
-        
-        # Calcular estatísticas dos valores nulos
-        total_registros = len(df)
-        registros_sem_hora = df['Hora'].isna().sum()
-        percentual_sem_hora = (registros_sem_hora / total_registros) * 100
-        
-        print(f"\nEstatísticas da coluna Hora:")
-        print(f"Total de registros: {total_registros}")
-        print(f"Registros sem hora: {registros_sem_hora} ({percentual_sem_hora:.2f}%)")
+        df['Hora'], invalidos = converter_horas(df['Hora'])
+        if exibir_estatisticas:
+            _estatisticas_hora(df, invalidos)
+        else:
+            df.attrs['horas_invalidas'] = invalidos
     
     return df
 
-# Função para validar dados
-def validar_dados(df):
-    """Valida os dados e retorna informações sobre valores nulos e únicos"""
+
+# Função para imprimir as estatísticas da coluna Hora
+def _estatisticas_hora(df, invalidos):
+    # Calcular estatísticas dos valores nulos
+    total_registros = len(df)
+    registros_sem_hora = df['Hora'].isna().sum()
+    percentual_sem_hora = (registros_sem_hora / total_registros) * 100 if total_registros else 0
+    
+    print(f"\nEstatísticas da coluna Hora:")
+    print(f"Total de registros: {total_registros}")
+    print(f"Registros sem hora: {registros_sem_hora} ({percentual_sem_hora:.2f}%)")
+    if invalidos:
+        print(f"Horas em formato desconhecido: {invalidos}")
+
+# Função para calcular uma chave estável para cada registro
+def chave_registros(df):
+    """Hash (uint64) do conteúdo de cada linha, independente do índice e da
+    ordem das colunas, usado para descartar registros já ingeridos"""
+    colunas = sorted(df.columns)
+    return pd.util.hash_pandas_object(df[colunas], index=False).to_numpy(dtype='uint64')
+
+
+# Função para concatenar partes de um conjunto mantendo as colunas categóricas
+def concatenar(partes):
+    """Concatena DataFrames unindo as categorias de cada coluna categórica,
+    para que o resultado não volte a ser do tipo object"""
+    partes = [parte for parte in partes if parte is not None]
+    if len(partes) == 1:
+        return partes[0]
+    for col in partes[0].columns:
+        if isinstance(partes[0][col].dtype, pd.CategoricalDtype):
+            # Partes sem nenhum valor na coluna não contribuem com categorias
+            com_valores = [parte[col] for parte in partes
+                           if col in parte.columns and parte[col].notna().any()]
+            if not com_valores:
+                continue
+            categorias = pd.api.types.union_categoricals(com_valores, ignore_order=True).categories
+            for parte in partes:
+                if col in parte.columns:
+                    parte[col] = parte[col].astype('category').cat.set_categories(categorias)
+    attrs = dict(partes[0].attrs)
+    df = pd.concat(partes, ignore_index=True)
+    df.attrs.update(attrs)
+    return df
+
+
+# Função para obter a pasta com os incrementos ingeridos de uma planilha
+def pasta_incrementos(caminho):
+    pasta = os.path.join(os.path.dirname(os.path.abspath(caminho)), DIRETORIO_CACHE)
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return os.path.join(pasta, f"incrementos-{nome}")
+
+
+# Função para obter as chaves (ordenadas) dos registros da planilha completa
+def _chaves_base(caminho, df=None, esquema=None):
+    arquivo = os.path.join(pasta_incrementos(caminho), f"chaves-{chave_cache(caminho)}.npy")
+    if os.path.exists(arquivo):
+        return np.load(arquivo)
+    if df is None:
+        df = _carregar_com_cache(caminho, esquema)
+    chaves = np.sort(chave_registros(df))
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    for antigo in glob.glob(os.path.join(os.path.dirname(arquivo), 'chaves-*.npy')):
+        os.remove(antigo)
+    np.save(arquivo, chaves)
+    return chaves
+
+
+# Função para verificar quais chaves já existem em um vetor ordenado de chaves
+def _contidas(chaves, ordenadas):
+    """Busca binária: custo proporcional ao número de chaves consultadas"""
+    if len(ordenadas) == 0:
+        return np.zeros(len(chaves), dtype=bool)
+    posicoes = np.searchsorted(ordenadas, chaves)
+    posicoes[posicoes == len(ordenadas)] = 0
+    return ordenadas[posicoes] == chaves
+
+
+# Função para listar os incrementos ingeridos, em ordem de chegada
+def _originais_incrementos(caminho):
+    return sorted(glob.glob(os.path.join(pasta_incrementos(caminho), 'parte-*-original.*')))
+
+
+# Função para ler um incremento já tratado (ou tratá-lo com o pipeline atual)
+def _ler_incremento(original, esquema):
+    """Retorna a parte tratada do incremento e as chaves ordenadas dos seus
+    registros. Se o pipeline de limpeza mudou desde a ingestão, trata
+    novamente o arquivo original guardado na pasta de incrementos"""
+    parte = original.rsplit('-original.', 1)[0]
+    prefixo = f"{parte}-{_versao_pipeline()}"
+    if os.path.exists(prefixo + '.pkl') and os.path.exists(prefixo + '.npy'):
+        return pd.read_pickle(prefixo + '.pkl'), np.load(prefixo + '.npy')
+
+    for antigo in glob.glob(f"{parte}-*.pkl") + glob.glob(f"{parte}-*.npy"):
+        os.remove(antigo)
+    df = _processar_planilha(original, esquema)
+    _salvar_incremento(df, prefixo)
+    return df, np.load(prefixo + '.npy')
+
+
+# Função para gravar a parte tratada de um incremento e as chaves dos registros
+def _salvar_incremento(df, prefixo):
+    df.attrs = {}
+    df.to_pickle(prefixo + '.pkl')
+    np.save(prefixo + '.npy', np.sort(chave_registros(df)))
+
+
+# Função para anexar à planilha completa os incrementos já ingeridos
+def _anexar_incrementos(df, caminho, esquema):
+    originais = _originais_incrementos(caminho)
+    df.attrs['incrementos'] = len(originais)
+    if not originais:
+        return df
+
+    base = _chaves_base(caminho, df, esquema)
+    partes = [df]
+    for original in originais:
+        parte, _ = _ler_incremento(original, esquema)
+        # Descartar registros que a planilha completa já passou a conter
+        partes.append(parte[~_contidas(chave_registros(parte), base)])
+    print(f"{len(originais)} incremento(s) anexado(s) a {caminho}")
+    return concatenar(partes)
+
+
+# Função para identificar a versão atual dos dados tratados de um conjunto
+def versao_conjunto(conjunto):
+    """Chave que muda quando a planilha, o código de limpeza ou os incrementos
+    ingeridos mudam (usada para saber se uma cópia dos dados está em dia)"""
+    caminho = arquivo_dados(CONJUNTOS[conjunto][0])
+    if not os.path.exists(caminho):
+        return None
+    return f"{chave_cache(caminho)}-{len(_originais_incrementos(caminho))}"
+
+
+# Função para ingerir um novo período (planilha ou CSV) sem reprocessar o histórico
+def ingerir_incremento(caminho_incremento, conjunto):
+    """Trata apenas o arquivo novo, descarta os registros que já existem (pela
+    chave de cada linha), guarda o restante na pasta de incrementos do conjunto e
+    atualiza o cubo de contagens. Retorna o DataFrame com os registros novos.
+
+    Um registro é repetido quando todas as colunas tratadas são iguais às de
+    um registro da planilha completa ou de um incremento anterior. Linhas
+    idênticas dentro do arquivo novo que já existem na base são todas
+    descartadas; as que não existem são todas mantidas, pois dois registros
+    iguais podem ser ocorrências distintas."""
+    caminho, esquema = CONJUNTOS[conjunto]
+    caminho = arquivo_dados(caminho)
+    print(f"\nIngerindo {caminho_incremento} em {conjunto}...")
+    novo = _processar_planilha(caminho_incremento, esquema)
+
+    # Descartar registros da planilha completa e dos incrementos anteriores
+    chaves = chave_registros(novo)
+    repetidos = _contidas(chaves, _chaves_base(caminho, esquema=esquema))
+    originais = _originais_incrementos(caminho)
+    for original in originais:
+        _, chaves_parte = _ler_incremento(original, esquema)
+        repetidos |= _contidas(chaves, chaves_parte)
+
+    novos = novo[~repetidos].reset_index(drop=True)
+    print(f"Registros novos: {len(novos)} de {len(novo)}")
+    if novos.empty:
+        return novos
+
+    # Guardar o arquivo original (para reprocessamento) e a parte tratada
+    pasta = pasta_incrementos(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    prefixo = os.path.join(pasta, f"parte-{len(originais) + 1:04d}")
+    extensao = os.path.splitext(caminho_incremento)[1]
+    _salvar_incremento(novos, f"{prefixo}-{_versao_pipeline()}")
+    shutil.copy2(caminho_incremento, f"{prefixo}-original{extensao}")
+
+    # Atualizar o cubo de contagens somando apenas as contagens do incremento
+    from agregados import atualizar_cubo_persistido
+    atualizar_cubo_persistido(caminho, len(originais), novos)
+    return novos
+
+
+# Função para converter as colunas para os tipos compactos do esquema
+def aplicar_esquema(df, esquema, relatorio=True):
+    """Converte as colunas do DataFrame para os tipos do esquema
+    (category, inteiros anuláveis pequenos, datetime64 e float32)"""
     if df is None:
         return None
-        
-    print("\nValidação dos dados:")
-    
-    # Verificar valores nulos
-    nulos = df.isnull().sum()
-    if nulos.any():
-        print("\nValores nulos por coluna:")
-        for col, count in nulos[nulos > 0].items():
-            print(f"{col}: {count} valores nulos")
-    
-    # Verificar valores únicos
-    print("\nValores únicos por coluna:")
-    for col in df.columns:
-        n_unicos = df[col].nunique()
-        print(f"{col}: {n_unicos} valores únicos")
-    
+
+    antes = df.memory_usage(deep=True) if relatorio else None
+
+    for col, tipo in esquema.items():
+        if col not in df.columns:
+            continue
+        if tipo == 'category':
+            df[col] = df[col].astype('category')
+        elif tipo.startswith('datetime64'):
+            df[col] = pd.to_datetime(df[col], errors='coerce').astype(tipo)
+        elif tipo[0] in 'IU':
+            # Inteiros anuláveis: valores não numéricos ou fora da faixa viram nulos
+            numeros = pd.to_numeric(df[col], errors='coerce').round()
+            faixa = np.iinfo(tipo.lower())
+            numeros = numeros.where((numeros >= faixa.min) & (numeros <= faixa.max))
+            df[col] = numeros.astype(tipo)
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(tipo)
+
+    if relatorio:
+        relatorio_memoria(antes, df.memory_usage(deep=True))
     return df
+
+
+# Função para comparar o uso de memória antes e depois da conversão de tipos
+def relatorio_memoria(antes, depois):
+    """Imprime os bytes ocupados por coluna antes e depois da conversão"""
+    print("\nUso de memória por coluna (antes -> depois):")
+    for col in depois.index:
+        if col == 'Index':
+            continue
+        print(f"{col}: {antes.get(col, 0) / 1024:.1f} KiB -> {depois[col] / 1024:.1f} KiB")
+    total_antes = antes.sum()
+    total_depois = depois.sum()
+    reducao = (1 - total_depois / total_antes) * 100 if total_antes else 0
+    print(f"Total: {total_antes / 1024 ** 2:.2f} MiB -> {total_depois / 1024 ** 2:.2f} MiB ({reducao:.1f}% menor)")
+
+
+# Padrões de texto reconhecidos na coluna Hora
+_PADRAO_HH_MM = r'^(\d{1,2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?$'
+_PADRAO_DATA_HORA = r'^\d{4}-\d{2}-\d{2}[ T](\d{1,2}):(\d{2})(?::(\d{2}(?:\.\d+)?))?'
+_PADRAO_HHMM = r'^(\d{2})(\d{2})(?:\.0+)?$'
+_PADRAO_HH = r'^(\d{1,2})(?:\.0+)?$'
+_PADRAO_FRACAO_DIA = r'^0?\.\d+$'
+
+
+# Função para arredondar para o minuto mais próximo sem passar de 23:59
+def _arredondar_minutos(minutos, segundos):
+    """minutos (podem ter fração) + segundos, arredondados. Valores que já
+    estavam fora do dia continuam fora, para serem descartados como inválidos."""
+    minutos = minutos + segundos / 60
+    return np.minimum(np.round(minutos), np.maximum(np.floor(minutos), 1439))
+
+
+# Função para converter a coluna Hora em minutos desde a meia-noite
+def converter_horas(horas):
+    """Converte a coluna Hora de uma só vez para minutos desde a meia-noite (Int16).
+
+    Os valores são classificados por padrão (HH:MM, HH:MM:SS, data e hora,
+    HHMM, HH e fração do dia do Excel) e cada classe é convertida em lote.
+    Segundos e frações são arredondados para o minuto mais próximo: o Excel
+    guarda muitas horas alguns milissegundos antes da hora cheia (19:59:59.971
+    é 20:00). Só o fim do dia não passa de 23:59.
+    Retorna a série convertida e a quantidade de valores em formato desconhecido."""
+    minutos = pd.Series(np.nan, index=horas.index, dtype='float64')
+    presentes = horas.notna()
+    if not presentes.any():
+        return minutos.astype('Int16'), 0
+
+    valores = horas[presentes]
+    if pd.api.types.is_numeric_dtype(valores):
+        numeros = valores.astype('float64')
+        fracao = (numeros >= 0) & (numeros < 1)
+        minutos[numeros.index[fracao]] = _arredondar_minutos(numeros[fracao] * 1440, 0)
+        # Números inteiros seguem as regras de HHMM e HH
+        valores = numeros[~fracao].map(lambda x: f"{x:g}").astype(str)
+    elif pd.api.types.is_datetime64_any_dtype(valores):
+        minutos[valores.index] = _arredondar_minutos(valores.dt.hour * 60 + valores.dt.minute,
+                                                     valores.dt.second + valores.dt.microsecond / 1e6)
+        valores = valores.iloc[:0].astype(str)
+    else:
+        # Objetos time/datetime viram 'HH:MM:SS' ou 'AAAA-MM-DD HH:MM:SS'
+        valores = valores.astype(str).str.strip()
+
+    pendentes = valores
+    for padrao in (_PADRAO_HH_MM, _PADRAO_DATA_HORA, _PADRAO_HHMM, _PADRAO_HH):
+        if pendentes.empty:
+            break
+        partes = pendentes.str.extract(padrao)
+        casou = partes[0].notna()
+        hora = partes.loc[casou, 0].astype(int)
+        minuto = partes.loc[casou, 1].astype(int) if partes.shape[1] > 1 else 0
+        segundos = partes.loc[casou, 2].astype(float).fillna(0) if partes.shape[1] > 2 else 0
+        minutos[hora.index] = _arredondar_minutos(hora * 60 + minuto, segundos)
+        pendentes = pendentes[~casou]
+
+    fracao = pendentes.str.match(_PADRAO_FRACAO_DIA)
+    if fracao.any():
+        dias = pendentes[fracao].astype(float)
+        minutos[dias.index] = _arredondar_minutos(dias * 1440, 0)
+        pendentes = pendentes[~fracao]
+
+    # Descartar horas fora do intervalo 00:00 a 23:59
+    fora_do_intervalo = (minutos < 0) | (minutos >= 1440)
+    minutos[fora_do_intervalo] = np.nan
+
+    invalidos = len(pendentes) + int(fora_do_intervalo.sum())
+    return minutos.astype('Int16'), invalidos
+
+
+# Função para validar dados
+def validar_dados(df, falhas=None):
+    """Retorna o relatório de validação (validacao.RelatorioValidacao) com
+    nulos, cardinalidade, mínimo/máximo e falhas de conversão de cada coluna,
+    sem imprimir nada. falhas: {coluna: (falhas, valores convertidos)}"""
+    if df is None:
+        return None
+    return perfilar(df, falhas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingere um novo período (planilha ou CSV) em um conjunto de dados.")
+    parser.add_argument('conjunto', choices=list(CONJUNTOS))
+    parser.add_argument('arquivo', help="planilha .xlsx ou arquivo .csv com os registros novos")
+    args = parser.parse_args()
+    ingerir_incremento(args.arquivo, args.conjunto)
@@ -1,3 +1,6 @@
+import instrumentacao
+instrumentacao.iniciar()
+
 from interface import main
 
 if __name__ == "__main__":
@@ -0,0 +1,317 @@
+# Mapas coropléticos dos municípios e das AIS do Ceará
+import functools
+import hashlib
+import json
+import os
+
+# Matplotlib para desenhar os polígonos
+import matplotlib
+import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+
+# Pandas e Numpy para a junção com as contagens
+import pandas as pd
+import numpy as np
+
+from agregados import contagem
+from leitura_dados import DIRETORIO_CACHE, sem_acentos
+from registro_graficos import ARQUIVO_MUNICIPIOS
+
+
+DIRETORIO_PROJETO = os.path.dirname(os.path.abspath(__file__))
+
+# Os limites municipais (ARQUIVO_MUNICIPIOS, GeoJSON com coordenadas em graus)
+# são lidos do disco, sem rede. Cada feição deve ter o nome do município e,
+# opcionalmente, a população.
+PROPRIEDADES_NOME = ('nome', 'name', 'NM_MUN', 'NM_MUNICIP', 'NOME', 'municipio')
+PROPRIEDADES_POPULACAO = ('populacao', 'POPULACAO', 'pop', 'POP', 'habitantes')
+
+# Incrementar ao mudar a simplificação ou o formato do cache de geometria
+VERSAO_GEOMETRIA = 1
+
+# Projeção equiretangular centrada no Ceará (distâncias em km)
+LONGITUDE_REFERENCIA = -39.5
+LATITUDE_REFERENCIA = -5.2
+RAIO_TERRA_KM = 6371.0
+
+# Vértices mais próximos que isto da linha simplificada são descartados
+TOLERANCIA_KM = 0.3
+
+# Fração das ocorrências de uma AIS a partir da qual um município é ligado a
+# ela (evita que registros com AIS errada unam regiões)
+FRACAO_MINIMA_AIS = 0.05
+
+MAPA_CORES = 'YlOrRd'
+
+
+# Função para comparar nomes de municípios entre as planilhas e os limites
+def chave_nome(nome):
+    """Nome sem acentos, espaços extras e diferença de maiúsculas"""
+    return sem_acentos(str(nome)).strip().casefold()
+
+
+# Função para projetar coordenadas em graus para km
+def projetar(coordenadas):
+    lon, lat = np.radians(coordenadas[:, 0]), np.radians(coordenadas[:, 1])
+    x = RAIO_TERRA_KM * (lon - np.radians(LONGITUDE_REFERENCIA)) * np.cos(np.radians(LATITUDE_REFERENCIA))
+    y = RAIO_TERRA_KM * lat
+    return np.column_stack([x, y])
+
+
+# Função para simplificar um anel de vértices (Douglas-Peucker)
+def simplificar(pontos, tolerancia=TOLERANCIA_KM):
+    """Mantém os vértices que se afastam mais que `tolerancia` da linha
+    simplificada; anéis que ficariam com menos de 4 vértices são mantidos"""
+    if len(pontos) <= 4:
+        return pontos
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim <= inicio + 1:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1:fim]
+        direcao = b - a
+        comprimento = np.hypot(*direcao)
+        if comprimento == 0:
+            # Anel fechado: distância ao ponto inicial
+            distancias = np.hypot(*(trecho - a).T)
+        else:
+            vetorial = direcao[0] * (trecho[:, 1] - a[1]) - direcao[1] * (trecho[:, 0] - a[0])
+            distancias = np.abs(vetorial) / comprimento
+        maior = int(np.argmax(distancias))
+        if distancias[maior] > tolerancia:
+            meio = inicio + 1 + maior
+            manter[meio] = True
+            pilha.append((inicio, meio))
+            pilha.append((meio, fim))
+    simplificado = pontos[manter]
+    return simplificado if len(simplificado) >= 4 else pontos
+
+
+# Função para orientar um anel (externos no sentido anti-horário, buracos no
+# horário), para que os buracos fiquem vazios no preenchimento do matplotlib
+def orientar(anel, externo):
+    x, y = anel[:, 0], anel[:, 1]
+    area = np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])
+    return anel if (area > 0) == externo else anel[::-1]
+
+
+# Classe com os polígonos projetados e simplificados de cada município
+class GeometriaMapa:
+    """Um caminho (Path) composto por município, com anéis externos e buracos,
+    pronto para o PathCollection. Lida uma vez por sessão; os redesenhos
+    apenas trocam as cores."""
+
+    def __init__(self, nomes, populacao, vertices, inicios_aneis, aneis_por_feicao):
+        self.nomes = list(nomes)
+        self.populacao = np.asarray(populacao, dtype='float64')
+        self.chaves = {chave_nome(nome): posicao for posicao, nome in enumerate(self.nomes)}
+        self.limites = (vertices[:, 0].min(), vertices[:, 0].max(), vertices[:, 1].min(), vertices[:, 1].max())
+
+        self.caminhos = []
+        for feicao in range(len(self.nomes)):
+            aneis = [vertices[inicios_aneis[anel]:inicios_aneis[anel + 1]]
+                     for anel in range(aneis_por_feicao[feicao], aneis_por_feicao[feicao + 1])]
+            self.caminhos.append(Path.make_compound_path(*[Path(anel, closed=True) for anel in aneis]))
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def alinhar(self, valores):
+        """Valores por município (Series indexada pelo nome) na ordem das
+        feições; municípios sem ocorrências recebem zero. Retorna também os
+        nomes das planilhas que não foram encontrados nos limites."""
+        alinhados = np.zeros(len(self.nomes))
+        sem_limites = []
+        for nome, valor in valores.items():
+            posicao = self.chaves.get(chave_nome(nome))
+            if posicao is None:
+                sem_limites.append(nome)
+            else:
+                alinhados[posicao] += valor
+        return alinhados, sem_limites
+
+    def desenhar(self, ax, valores, rotulo):
+        """Desenha os municípios coloridos por `valores` (NaN em cinza)"""
+        mapa_cores = matplotlib.colormaps[MAPA_CORES].with_extremes(bad='lightgray')
+        colecao = PathCollection(self.caminhos, cmap=mapa_cores, edgecolor='white', linewidth=0.3)
+        colecao.set_array(np.ma.masked_invalid(valores))
+        ax.add_collection(colecao)
+        xmin, xmax, ymin, ymax = self.limites
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        ax.set_aspect('equal')
+        ax.set_axis_off()
+        ax.figure.colorbar(colecao, ax=ax, shrink=0.8, label=rotulo)
+        return colecao
+
+
+# Função para ler o GeoJSON, projetar e simplificar os polígonos
+def _ler_geojson(arquivo):
+    with open(arquivo, encoding='utf-8') as f:
+        feicoes = json.load(f)['features']
+
+    nomes, populacao, aneis, aneis_por_feicao = [], [], [], [0]
+    for feicao in feicoes:
+        propriedades = feicao.get('properties') or {}
+        nome = next((propriedades[p] for p in PROPRIEDADES_NOME if propriedades.get(p)), None)
+        geometria = feicao.get('geometry') or {}
+        if nome is None or geometria.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+        poligonos = geometria['coordinates'] if geometria['type'] == 'MultiPolygon' else [geometria['coordinates']]
+        for poligono in poligonos:
+            for posicao, anel in enumerate(poligono):
+                anel = simplificar(projetar(np.asarray(anel, dtype='float64')[:, :2]))
+                aneis.append(orientar(anel, externo=posicao == 0))
+        nomes.append(str(nome))
+        valor = next((propriedades[p] for p in PROPRIEDADES_POPULACAO if propriedades.get(p) is not None), None)
+        populacao.append(float(valor) if valor is not None else np.nan)
+        aneis_por_feicao.append(len(aneis))
+
+    inicios_aneis = np.concatenate([[0], np.cumsum([len(anel) for anel in aneis])]).astype('int64')
+    return {
+        'nomes': np.array(nomes),
+        'populacao': np.array(populacao, dtype='float64'),
+        'vertices': np.concatenate(aneis).astype('float32'),
+        'inicios_aneis': inicios_aneis,
+        'aneis_por_feicao': np.array(aneis_por_feicao, dtype='int64'),
+    }
+
+
+# Função para obter o arquivo .npz com a geometria já processada
+def _arquivo_cache_geometria(arquivo):
+    info = os.stat(arquivo)
+    h = hashlib.sha1(os.path.abspath(arquivo).encode('utf-8'))
+    h.update(f"{info.st_mtime_ns}:{info.st_size}:{TOLERANCIA_KM}".encode('ascii'))
+    nome = os.path.splitext(os.path.basename(arquivo))[0]
+    return os.path.join(DIRETORIO_PROJETO, DIRETORIO_CACHE,
+                        f"{nome}-{h.hexdigest()[:16]}.geo-v{VERSAO_GEOMETRIA}.npz")
+
+
+# Função para carregar a geometria dos municípios (uma vez por sessão)
+def carregar_geometria(arquivo=None):
+    """Lê os limites do cache binário (.npz) ou do GeoJSON, gravando o cache.
+    Retorna None se o arquivo de limites não existir."""
+    return _carregar_geometria(arquivo or ARQUIVO_MUNICIPIOS)
+
+
+@functools.lru_cache(maxsize=None)
+def _carregar_geometria(arquivo):
+    if not os.path.exists(arquivo):
+        return None
+
+    cache = _arquivo_cache_geometria(arquivo)
+    dados = None
+    if os.path.exists(cache):
+        try:
+            with np.load(cache) as npz:
+                dados = {chave: npz[chave] for chave in npz.files}
+        except Exception as e:
+            print(f"Cache de geometria inválido em {cache}, reconstruindo: {str(e)}")
+
+    if dados is None:
+        dados = _ler_geojson(arquivo)
+        try:
+            os.makedirs(os.path.dirname(cache), exist_ok=True)
+            temporario = os.path.join(os.path.dirname(cache), f"tmp-{os.path.basename(cache)}")
+            np.savez(temporario, **dados)
+            os.replace(temporario, cache)
+        except Exception as e:
+            print(f"Não foi possível gravar o cache de geometria: {str(e)}")
+
+    return GeometriaMapa(dados['nomes'], dados['populacao'], dados['vertices'],
+                         dados['inicios_aneis'], dados['aneis_por_feicao'])
+
+
+# Função para agrupar os municípios nas regiões formadas pelas AIS
+def regioes_ais(pares):
+    """Recebe as contagens por (Municipio, AIS) e retorna {município: região},
+    sendo cada região o conjunto de AIS ligadas aos mesmos municípios (AIS do
+    interior reúnem vários municípios; Fortaleza reúne várias AIS)"""
+    pares = pares[pares > 0]
+    # Cada município entra na região da sua AIS principal; outras AIS só o
+    # ligam a elas se ele concentrar uma fração relevante das ocorrências da AIS
+    principal = pares == pares.groupby(level=0, observed=True).transform('max')
+    relevante = pares >= FRACAO_MINIMA_AIS * pares.groupby(level=1, observed=True).transform('sum')
+    pares = pares[principal | relevante]
+
+    # União de conjuntos entre municípios e AIS
+    pai = {}
+
+    def raiz(no):
+        while pai.setdefault(no, no) != no:
+            pai[no] = pai[pai[no]]
+            no = pai[no]
+        return no
+
+    for municipio, ais in pares.index:
+        pai[raiz(('m', municipio))] = raiz(('a', ais))
+
+    membros = {}
+    for municipio, ais in pares.index:
+        membros.setdefault(raiz(('a', ais)), set()).add(ais)
+    return {municipio: tuple(sorted(membros[raiz(('m', municipio))]))
+            for municipio in pares.index.get_level_values(0).unique()}
+
+
+def _sem_limites(ax, titulo):
+    caminho = os.path.relpath(ARQUIVO_MUNICIPIOS, DIRETORIO_PROJETO)
+    ax.text(0.5, 0.5, f'Limites municipais não encontrados em {caminho}.', horizontalalignment='center',
+            verticalalignment='center', transform=ax.transAxes, fontsize=12, color='gray')
+    ax.set_title(titulo)
+    ax.set_axis_off()
+
+
+def _avisar_sem_limites(nomes):
+    if nomes:
+        print(f"{len(nomes)} municípios sem limites no mapa: {', '.join(map(str, nomes[:5]))}"
+              + ("..." if len(nomes) > 5 else ""))
+
+
+# Funções para criar gráficos
+def mapa_municipios(dados, ax=None, titulo='Ocorrências por Município', por_habitante=False):
+    """Municípios coloridos pelo total de ocorrências ou pela taxa por 100 mil
+    habitantes (população lida do arquivo de limites)"""
+    if ax is None:
+        ax = plt.gca()
+    geometria = carregar_geometria()
+    if geometria is None:
+        return _sem_limites(ax, titulo)
+
+    valores, sem_limites = geometria.alinhar(contagem(dados, 'Municipio'))
+    _avisar_sem_limites(sem_limites)
+    rotulo = 'Ocorrencias'
+    if por_habitante:
+        if np.isnan(geometria.populacao).all():
+            ax.text(0.5, 0.5, 'O arquivo de limites não informa a população.', horizontalalignment='center',
+                    verticalalignment='center', transform=ax.transAxes, fontsize=12, color='gray')
+            ax.set_title(titulo)
+            ax.set_axis_off()
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valores = valores / geometria.populacao * 100000
+        rotulo = 'Ocorrencias por 100 mil habitantes'
+    geometria.desenhar(ax, valores, rotulo)
+    ax.set_title(titulo)
+
+
+def mapa_ais(dados, ax=None, titulo='Ocorrências por Região de AIS'):
+    """Municípios coloridos pelo total da região de AIS a que pertencem"""
+    if ax is None:
+        ax = plt.gca()
+    geometria = carregar_geometria()
+    if geometria is None:
+        return _sem_limites(ax, titulo)
+
+    regioes = regioes_ais(contagem(dados, 'Municipio/AIS'))
+    por_ais = contagem(dados, 'AIS')
+    totais = pd.Series({municipio: por_ais.reindex(list(regiao), fill_value=0).sum()
+                        for municipio, regiao in regioes.items()}, dtype='float64')
+    valores, sem_limites = geometria.alinhar(totais)
+    _avisar_sem_limites(sem_limites)
+    geometria.desenhar(ax, valores, 'Ocorrencias na região')
+    ax.set_title(titulo)
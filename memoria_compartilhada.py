@@ -0,0 +1,193 @@
+"""Conjuntos de dados em memória compartilhada entre processos.
+
+Um DataFrame tratado (colunas do esquema de leitura_dados) é copiado uma
+única vez para um segmento de multiprocessing.shared_memory: as colunas
+categóricas como os códigos inteiros da carga, as datas como datetime64, os
+inteiros anuláveis como valores + máscara e os números como vetores numpy.
+Outros processos recebem só a descrição (DadosCompartilhados, alguns KiB) e
+montam um DataFrame cujas colunas apontam para o mesmo segmento, sem copiar
+nem desserializar os dados. Qualquer função de gráfico aceita esse DataFrame
+(relatorio_lote --dataframe desenha todos os gráficos assim, em um pool).
+
+O processo que publica é o dono do segmento e o remove ao terminar (ou em
+liberar). O dono pode entregar o segmento a outro processo, que o assume ao
+anexá-lo (é o caso da carga em segundo plano da interface). Quem espera um
+segmento de um processo que pode ser interrompido antes de entregá-lo
+escolhe o nome do segmento e o remove com remover.
+"""
+import atexit
+from multiprocessing import shared_memory
+
+# Pandas e Numpy para as colunas montadas sobre o segmento
+import pandas as pd
+import numpy as np
+
+
+# Início de cada vetor no segmento, em bytes (alinhado à linha de cache)
+ALINHAMENTO = 64
+
+# Segmentos abertos neste processo e os que ele deve remover ao terminar
+_segmentos = {}
+_donos = set()
+
+
+# Classe com a descrição de um DataFrame publicado em memória compartilhada
+class DadosCompartilhados:
+    """Nome do segmento, número de linhas, posição e tipo de cada coluna e
+    os atributos do DataFrame (df.attrs). É o que vai para os outros
+    processos; os dados ficam no segmento."""
+
+    def __init__(self, memoria, linhas, colunas, attrs):
+        self.memoria = memoria
+        self.linhas = linhas
+        self.colunas = colunas
+        self.attrs = attrs
+
+    def __len__(self):
+        return self.linhas
+
+    def __repr__(self):
+        return f"DadosCompartilhados({self.memoria!r}, {self.linhas} linhas, {len(self.colunas)} colunas)"
+
+
+# Função para decompor uma coluna nos vetores gravados no segmento
+def _vetores(serie):
+    """Retorna (descrição da coluna, lista de vetores numpy)"""
+    dtype = serie.dtype
+    if not isinstance(dtype, pd.CategoricalDtype) and (pd.api.types.is_object_dtype(dtype)
+                                                      or pd.api.types.is_string_dtype(dtype)):
+        # Texto fora do esquema: compartilhado pelos códigos, como categoria
+        serie = serie.astype('category')
+        dtype = serie.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        descricao = {'tipo': 'categoria', 'categorias': list(dtype.categories), 'ordenada': dtype.ordered}
+        return descricao, [serie.cat.codes.to_numpy()]
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, 'numpy_dtype'):
+        # Inteiros/decimais anuláveis (Int16, UInt8, Float32...): valores e máscara
+        valores = serie.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+        return {'tipo': 'mascarado', 'dtype': str(dtype)}, [valores, serie.isna().to_numpy()]
+    return {'tipo': 'numerico'}, [serie.to_numpy()]
+
+
+# Função para copiar um DataFrame para um novo segmento de memória compartilhada
+def publicar(df, nome=None):
+    """Grava as colunas do DataFrame em um segmento e retorna a descrição.
+    O índice não é copiado (os outros processos recebem um RangeIndex).
+    Sem nome, o segmento recebe um nome aleatório."""
+    colunas, vetores = [], []
+    tamanho = 0
+    for coluna in df.columns:
+        descricao, partes = _vetores(df[coluna])
+        descricao['nome'] = coluna
+        descricao['vetores'] = []
+        for vetor in partes:
+            vetor = np.ascontiguousarray(vetor)
+            tamanho = -(-tamanho // ALINHAMENTO) * ALINHAMENTO
+            descricao['vetores'].append((tamanho, vetor.dtype.str, len(vetor)))
+            vetores.append((tamanho, vetor))
+            tamanho += vetor.nbytes
+        colunas.append(descricao)
+
+    segmento = shared_memory.SharedMemory(name=nome, create=True, size=max(tamanho, 1))
+    for deslocamento, vetor in vetores:
+        destino = np.ndarray(vetor.shape, dtype=vetor.dtype, buffer=segmento.buf, offset=deslocamento)
+        destino[:] = vetor
+        del destino
+    _segmentos[segmento.name] = segmento
+    _donos.add(segmento.name)
+    return DadosCompartilhados(segmento.name, len(df), colunas, dict(df.attrs))
+
+
+# Função para montar o DataFrame sobre o segmento, sem copiar os dados
+def anexar(dados, assumir=False):
+    """DataFrame (somente leitura) cujas colunas são visões do segmento.
+    Com assumir=True, este processo passa a ser o dono do segmento."""
+    segmento = _segmentos.get(dados.memoria)
+    if segmento is None:
+        segmento = shared_memory.SharedMemory(name=dados.memoria)
+        _segmentos[dados.memoria] = segmento
+    if assumir:
+        _donos.add(dados.memoria)
+
+    colunas = {}
+    for descricao in dados.colunas:
+        partes = []
+        for deslocamento, dtype, linhas in descricao['vetores']:
+            vetor = np.ndarray(linhas, dtype=np.dtype(dtype), buffer=segmento.buf, offset=deslocamento)
+            vetor.flags.writeable = False
+            partes.append(vetor)
+        if descricao['tipo'] == 'categoria':
+            tipo = pd.CategoricalDtype(descricao['categorias'], ordered=descricao['ordenada'])
+            coluna = pd.Categorical.from_codes(partes[0], dtype=tipo, validate=False)
+        elif descricao['tipo'] == 'mascarado':
+            tipo = pd.api.types.pandas_dtype(descricao['dtype'])
+            coluna = tipo.construct_array_type()(partes[0], partes[1])
+        else:
+            coluna = partes[0]
+        colunas[descricao['nome']] = coluna
+    df = pd.DataFrame(colunas, index=pd.RangeIndex(dados.linhas), copy=False)
+    df.attrs.update(dados.attrs)
+    return df
+
+
+# Função para deixar de ser o dono do segmento (outro processo vai assumi-lo)
+def entregar(dados):
+    _donos.discard(dados.memoria)
+    _fechar(dados.memoria)
+
+
+# Função para fechar o segmento neste processo e removê-lo se for o dono
+def liberar(dados):
+    """Depois de liberar, os DataFrames anexados a este segmento não podem mais ser usados"""
+    nome = dados.memoria
+    if nome in _donos:
+        _donos.discard(nome)
+        segmento = _segmentos.get(nome) or shared_memory.SharedMemory(name=nome)
+        _segmentos[nome] = segmento
+        try:
+            segmento.unlink()
+        except FileNotFoundError:
+            pass
+    _fechar(nome)
+
+
+# Função para remover um segmento pelo nome, sem anexá-lo
+def remover(nome):
+    """Remove o segmento se ele ainda existir (por exemplo, publicado por um
+    processo interrompido antes de entregá-lo)"""
+    _donos.discard(nome)
+    segmento = _segmentos.pop(nome, None)
+    try:
+        segmento = segmento or shared_memory.SharedMemory(name=nome)
+    except FileNotFoundError:
+        return
+    try:
+        segmento.unlink()
+    except FileNotFoundError:
+        pass
+    _segmentos[nome] = segmento
+    _fechar(nome)
+
+
+def _fechar(nome):
+    segmento = _segmentos.pop(nome, None)
+    if segmento is None:
+        return
+    try:
+        segmento.close()
+    except BufferError:
+        # Ainda há colunas apontando para o segmento: o mapeamento fica
+        # aberto até o processo terminar
+        _segmentos[nome] = segmento
+
+
+# Os segmentos de que este processo é dono não sobrevivem a ele
+@atexit.register
+def _remover_segmentos():
+    for nome in list(_donos):
+        try:
+            segmento = _segmentos.get(nome) or shared_memory.SharedMemory(name=nome)
+            segmento.unlink()
+        except FileNotFoundError:
+            pass
+    _donos.clear()
@@ -0,0 +1,135 @@
+# Importlib para resolver as funções de gráfico só quando forem usadas
+import importlib
+import os
+from collections import namedtuple
+
+
+# Um gráfico do menu: rótulo do botão, módulo e nome da função que o desenha
+Grafico = namedtuple('Grafico', ['rotulo', 'modulo', 'funcao'])
+
+# Uma página de menu: título, texto de ajuda e gráficos disponíveis
+Menu = namedtuple('Menu', ['titulo', 'descricao', 'graficos'])
+
+# Limites municipais (GeoJSON) lidos pelos mapas de mapas.py. O arquivo não
+# acompanha o repositório; sem ele os mapas não entram nos menus.
+ARQUIVO_MUNICIPIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados_geo', 'municipios_ce.geojson')
+
+
+# Função para obter os mapas de um conjunto de dados
+def graficos_mapa(modulo, sufixo, arquivo=None):
+    """Gráficos de mapa do módulo, ou nenhum se o arquivo de limites não existir"""
+    if not os.path.exists(arquivo or ARQUIVO_MUNICIPIOS):
+        return []
+    return [
+        Grafico("Mapa por Município", modulo, f'mapa_municipio_{sufixo}'),
+        Grafico("Mapa por Habitante", modulo, f'mapa_taxa_{sufixo}'),
+        Grafico("Mapa por AIS", modulo, f'mapa_ais_{sufixo}'),
+    ]
+
+
+# Registro dos gráficos de cada conjunto de dados, na ordem em que aparecem no menu
+MENUS = {
+    'entorpecentes': Menu(
+        "Análise de Entorpecentes",
+        "Selecione uma opção para visualizar a análise de apreensões de entorpecentes no Ceará.",
+        [
+            Grafico("Tipos de Entorpecentes", 'entorpecentes', 'tipo_entorpecente'),
+            Grafico("Peso", 'entorpecentes', 'peso_entorpecente'),
+            Grafico("Município", 'entorpecentes', 'municipio_entorpecente'),
+            Grafico("AIS", 'entorpecentes', 'ais_entorpecente'),
+            Grafico("Ano", 'entorpecentes', 'ano_entorpecente'),
+            Grafico("Mês", 'entorpecentes', 'mes_entorpecente'),
+            Grafico("Dia da Semana", 'entorpecentes', 'dia_semana_entorpecente'),
+            Grafico("Horário", 'entorpecentes', 'horario_entorpecente'),
+            Grafico("Tendência Diária", 'entorpecentes', 'tendencia_diaria_entorpecente'),
+            Grafico("Tendência Mensal", 'entorpecentes', 'tendencia_mensal_entorpecente'),
+            Grafico("Ano a Ano", 'entorpecentes', 'comparacao_anual_entorpecente'),
+            Grafico("Tendência por Município", 'entorpecentes', 'tendencia_municipios_entorpecente'),
+        ] + graficos_mapa('entorpecentes', 'entorpecente'),
+    ),
+    'crimes_violentos': Menu(
+        "Análise de Crimes Violentos",
+        "Selecione uma opção para visualizar a análise de crimes violentos no Ceará.",
+        [
+            Grafico("Meio Empregado", 'crimes_violentos', 'meio_empregado_cv'),
+            Grafico("Natureza", 'crimes_violentos', 'natureza_cv'),
+            Grafico("Gênero", 'crimes_violentos', 'genero_cv'),
+            Grafico("Raça", 'crimes_violentos', 'raca_cv'),
+            Grafico("Idade", 'crimes_violentos', 'idade_cv'),
+            Grafico("Escolaridade", 'crimes_violentos', 'escolaridade_cv'),
+            Grafico("Município", 'crimes_violentos', 'municipio_cv'),
+            Grafico("AIS", 'crimes_violentos', 'ais_cv'),
+            Grafico("Ano", 'crimes_violentos', 'ano_cv'),
+            Grafico("Mês", 'crimes_violentos', 'mes_cv'),
+            Grafico("Dia da Semana", 'crimes_violentos', 'dia_semana_cv'),
+            Grafico("Horário", 'crimes_violentos', 'horario_cv'),
+            Grafico("Tendência Diária", 'crimes_violentos', 'tendencia_diaria_cv'),
+            Grafico("Tendência Mensal", 'crimes_violentos', 'tendencia_mensal_cv'),
+            Grafico("Ano a Ano", 'crimes_violentos', 'comparacao_anual_cv'),
+            Grafico("Tendência por Município", 'crimes_violentos', 'tendencia_municipios_cv'),
+        ] + graficos_mapa('crimes_violentos', 'cv'),
+    ),
+    'crimes_sexuais': Menu(
+        "Análise de Crimes Sexuais",
+        "Selecione uma opção para visualizar a análise de crimes sexuais no Ceará.",
+        [
+            Grafico("Gênero", 'crimes_sexuais', 'genero_cs'),
+            Grafico("Raça", 'crimes_sexuais', 'raca_cs'),
+            Grafico("Idade", 'crimes_sexuais', 'idade_cs'),
+            Grafico("Escolaridade", 'crimes_sexuais', 'escolaridade_cs'),
+            Grafico("Município", 'crimes_sexuais', 'municipio_cs'),
+            Grafico("AIS", 'crimes_sexuais', 'ais_cs'),
+            Grafico("Ano", 'crimes_sexuais', 'ano_cs'),
+            Grafico("Mês", 'crimes_sexuais', 'mes_cs'),
+            Grafico("Dia da Semana", 'crimes_sexuais', 'dia_semana_cs'),
+            Grafico("Horário", 'crimes_sexuais', 'horario_cs'),
+            Grafico("Tendência Diária", 'crimes_sexuais', 'tendencia_diaria_cs'),
+            Grafico("Tendência Mensal", 'crimes_sexuais', 'tendencia_mensal_cs'),
+            Grafico("Ano a Ano", 'crimes_sexuais', 'comparacao_anual_cs'),
+            Grafico("Tendência por Município", 'crimes_sexuais', 'tendencia_municipios_cs'),
+        ] + graficos_mapa('crimes_sexuais', 'cs'),
+    ),
+    # Gráficos que recebem todos os conjuntos carregados (cruzamentos.ConjuntosCruzados)
+    'cruzamentos': Menu(
+        "Cruzamentos entre Conjuntos",
+        "Compare os conjuntos de dados por município ou AIS e mês, por exemplo para ver se as apreensões "
+        "de entorpecentes antecedem aumentos nos crimes violentos.",
+        [
+            Grafico("Séries Comparadas", 'cruzamentos', 'series_comparadas'),
+            Grafico("Correlação Defasada por Município", 'cruzamentos', 'correlacao_defasada_municipios'),
+            Grafico("Correlação Defasada por AIS", 'cruzamentos', 'correlacao_defasada_ais'),
+            Grafico("Correlação por Município", 'cruzamentos', 'correlacao_municipios'),
+            Grafico("Correlação por AIS", 'cruzamentos', 'correlacao_ais'),
+        ],
+    ),
+}
+
+# Menu cujos gráficos cruzam os conjuntos de dados
+MENU_CRUZAMENTOS = 'cruzamentos'
+
+
+# Função para obter a função de desenho de um gráfico do registro
+def resolver(grafico):
+    """Importa o módulo do gráfico (na primeira vez) e retorna a função"""
+    modulo = importlib.import_module(grafico.modulo)
+    return getattr(modulo, grafico.funcao)
+
+
+# Função para aplicar o estilo padrão dos gráficos
+def configurar_estilo():
+    """Estilo do seaborn e fonte padrão usados na interface e nos relatórios"""
+    import matplotlib
+    import seaborn as sns
+
+    sns.set_style("whitegrid")
+    sns.set_palette("husl")
+    matplotlib.rcParams['font.family'] = 'Arial'
+    matplotlib.rcParams['font.size'] = 10
+
+
+# Função para listar todos os gráficos registrados
+def todos_graficos():
+    """Gera pares (nome do conjunto de dados, gráfico) de todos os menus"""
+    for nome, menu in MENUS.items():
+        for grafico in menu.graficos:
+            yield nome, grafico
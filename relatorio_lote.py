@@ -0,0 +1,183 @@
+"""Geração em lote de todos os gráficos, sem interface gráfica.
+
+Uso:
+    python relatorio_lote.py --saida relatorios --formatos png pdf
+    python relatorio_lote.py --dataframe
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# Backend sem janela: o relatório roda em servidores sem display
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+from agregados import obter_cubo
+from cruzamentos import ConjuntosCruzados
+from leitura_dados import DATASETS
+from memoria_compartilhada import DadosCompartilhados, anexar, liberar, publicar
+from registro_graficos import MENU_CRUZAMENTOS, configurar_estilo, resolver, todos_graficos
+
+
+# Dados compartilhados com cada processo de renderização
+_dados_worker = {}
+
+
+# Função executada uma vez em cada processo de renderização
+def _iniciar_worker(dados):
+    matplotlib.use('Agg')
+    configurar_estilo()
+    _dados_worker.update(dados)
+
+
+# Função para obter os dados de um conjunto no processo de renderização
+def _dados(nome):
+    dados = _dados_worker[nome]
+    if isinstance(dados, DadosCompartilhados):
+        # Colunas anexadas à memória compartilhada publicada pelo processo
+        # principal, sem cópia
+        dados = anexar(dados)
+    elif isinstance(dados, ConjuntosCruzados):
+        dados = ConjuntosCruzados({conjunto: _dados(conjunto) for conjunto in dados.conjuntos})
+    _dados_worker[nome] = dados
+    return dados
+
+
+# Função para desenhar um gráfico e gravá-lo em todos os formatos pedidos
+def _renderizar(nome, grafico, saida, formatos):
+    """Retorna (conjunto, função, segundos, arquivos, erro). Um gráfico com
+    erro não interrompe o lote: o erro é devolvido e registrado no resumo."""
+    inicio = time.perf_counter()
+    arquivos = []
+    try:
+        figura = Figure(figsize=(10, 6))
+        ax = figura.add_subplot(111)
+        resolver(grafico)(_dados(nome), ax=ax)
+        figura.tight_layout()
+
+        pasta = os.path.join(saida, nome)
+        for formato in formatos:
+            arquivo = os.path.join(pasta, f"{grafico.funcao}.{formato}")
+            figura.savefig(arquivo, format=formato, dpi=120)
+            arquivos.append(arquivo)
+    except Exception as e:
+        return nome, grafico.funcao, time.perf_counter() - inicio, arquivos, str(e)
+    return nome, grafico.funcao, time.perf_counter() - inicio, arquivos, None
+
+
+# Função para gerar todos os gráficos dos conjuntos de dados pedidos
+def gerar_relatorio(saida='relatorios', formatos=('png',), conjuntos=None, processos=None, banco=None,
+                    dataframe=False):
+    """Carrega os dados uma única vez e desenha todos os gráficos em paralelo.
+    Com um arquivo de banco (banco_dados), os processos consultam o banco.
+    Com dataframe=True, os gráficos são desenhados a partir dos DataFrames,
+    publicados em memória compartilhada: cada processo anexa as colunas sem
+    copiá-las, e os segmentos são removidos ao final.
+
+    Retorna a lista de tempos por gráfico (com 'erro' nos que falharam) e
+    grava o resumo em tempos.json. Sem nenhum conjunto disponível, retorna
+    uma lista vazia."""
+    conjuntos = conjuntos or list(DATASETS)
+    inicio = time.perf_counter()
+    os.makedirs(saida, exist_ok=True)
+
+    # Carregar os dados uma única vez; os processos recebem só o cubo de contagens,
+    # o acesso ao banco (cada processo abre suas conexões) ou a descrição do
+    # DataFrame em memória compartilhada
+    dados = {}
+    compartilhados = []
+    for nome in conjuntos:
+        if banco is not None:
+            from banco_dados import obter_conjunto
+            dados[nome] = obter_conjunto(nome, banco)
+        else:
+            df = DATASETS[nome]()
+            if df is None:
+                dados[nome] = None
+            elif dataframe:
+                dados[nome] = publicar(df)
+                compartilhados.append(dados[nome])
+            else:
+                dados[nome] = obter_cubo(df)
+            del df
+        if dados[nome] is None:
+            del dados[nome]
+            print(f"Conjunto {nome} indisponível, gráficos ignorados")
+            continue
+        os.makedirs(os.path.join(saida, nome), exist_ok=True)
+    if not dados:
+        print("Nenhum conjunto de dados disponível; nenhum gráfico gerado")
+        return []
+    # Gráficos de cruzamento, com todos os conjuntos disponíveis
+    if len(dados) >= 2:
+        dados[MENU_CRUZAMENTOS] = ConjuntosCruzados(dict(dados))
+        os.makedirs(os.path.join(saida, MENU_CRUZAMENTOS), exist_ok=True)
+    tempo_carga = time.perf_counter() - inicio
+
+    tarefas = [(nome, grafico, saida, formatos) for nome, grafico in todos_graficos() if nome in dados]
+    tempos = []
+    try:
+        with multiprocessing.get_context('spawn').Pool(processos, _iniciar_worker, (dados,)) as pool:
+            for nome, funcao, segundos, arquivos, erro in pool.starmap(_renderizar, tarefas):
+                tempo = {'conjunto': nome, 'grafico': funcao, 'segundos': round(segundos, 4),
+                         'arquivos': arquivos}
+                if erro is not None:
+                    tempo['erro'] = erro
+                tempos.append(tempo)
+    finally:
+        for publicados in compartilhados:
+            liberar(publicados)
+
+    resumo = {
+        'carga_segundos': round(tempo_carga, 4),
+        'total_segundos': round(time.perf_counter() - inicio, 4),
+        'graficos': tempos,
+    }
+    with open(os.path.join(saida, 'tempos.json'), 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    _imprimir_resumo(resumo)
+    return tempos
+
+
+# Função para imprimir o resumo de tempos por gráfico
+def _imprimir_resumo(resumo):
+    print(f"\nCarga dos dados: {resumo['carga_segundos']:.2f} s")
+    print(f"{'Conjunto':<18} {'Gráfico':<26} {'Tempo (s)':>10}")
+    for item in sorted(resumo['graficos'], key=lambda item: -item['segundos']):
+        print(f"{item['conjunto']:<18} {item['grafico']:<26} {item['segundos']:>10.3f}")
+    erros = [item for item in resumo['graficos'] if 'erro' in item]
+    for item in erros:
+        print(f"Erro em {item['conjunto']}/{item['grafico']}: {item['erro']}")
+    print(f"Total: {len(resumo['graficos'])} gráficos em {resumo['total_segundos']:.2f} s"
+          + (f" ({len(erros)} com erro)" if erros else ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera todos os gráficos sem abrir a interface.")
+    parser.add_argument('--saida', default='relatorios', help="pasta de destino dos arquivos")
+    parser.add_argument('--formatos', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--conjuntos', nargs='+', choices=list(DATASETS), help="conjuntos de dados a incluir")
+    parser.add_argument('--processos', type=int, default=None, help="processos de renderização (padrão: nº de CPUs)")
+    parser.add_argument('--banco', nargs='?', const='', metavar='ARQUIVO',
+                        help="consultar os dados no banco SQLite (banco_dados.py)")
+    parser.add_argument('--dataframe', action='store_true',
+                        help="desenhar a partir dos DataFrames em memória compartilhada, em vez dos cubos")
+    args = parser.parse_args(argv)
+
+    if args.banco is not None and args.dataframe:
+        parser.error("--dataframe não pode ser usado com --banco")
+    if args.banco == '':
+        from banco_dados import ARQUIVO_BANCO
+        args.banco = ARQUIVO_BANCO
+    tempos = gerar_relatorio(args.saida, args.formatos, args.conjuntos, args.processos, args.banco,
+                             args.dataframe)
+    return 0 if tempos and not any('erro' in tempo for tempo in tempos) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
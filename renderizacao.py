@@ -0,0 +1,82 @@
+# Thread para desenhar os gráficos sem bloquear a interface
+from concurrent.futures import ThreadPoolExecutor
+import traceback
+
+# PyQt para avisar a interface por sinais
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+# Função executada na thread de desenho
+def desenhar_buffer(funcao, args, largura, altura, dpi, cancelado=None):
+    """Desenha funcao(*args, ax=...) em uma figura Agg, independente do canvas
+    Qt, e retorna o buffer RGBA (altura x largura x 4) ou None se o pedido foi
+    cancelado enquanto os dados eram agregados"""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(largura / dpi, altura / dpi), dpi=dpi)
+    canvas = FigureCanvasAgg(figura)
+    funcao(*args, ax=figura.add_subplot(111))
+    if cancelado is not None and cancelado():
+        return None
+    figura.tight_layout()
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
+
+
+# Classe que desenha os gráficos em uma thread separada
+class RenderizadorGraficos(QObject):
+    """Agrega e desenha os gráficos fora da thread da interface.
+
+    Cada pedido recebe um número de geração; um pedido novo invalida os
+    anteriores, que são descartados se ainda estiverem na fila e têm o
+    resultado ignorado se já estiverem sendo desenhados."""
+
+    # Geração do pedido e buffer RGBA desenhado
+    grafico_pronto = pyqtSignal(int, object)
+    # Geração do pedido e traceback do erro
+    erro = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Uma única thread: o matplotlib não ganha nada desenhando em paralelo
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='grafico')
+        self._geracao = 0
+        self._futuro = None
+
+    def pedir(self, funcao, args, largura, altura, dpi):
+        """Agenda o desenho e retorna a geração do pedido"""
+        self.cancelar()
+        geracao = self._geracao
+        self._futuro = self._executor.submit(self._executar, geracao, funcao, args, largura, altura, dpi)
+        return geracao
+
+    def cancelar(self):
+        """Invalida o pedido em andamento (o resultado dele será ignorado)"""
+        self._geracao += 1
+        if self._futuro is not None:
+            self._futuro.cancel()
+            self._futuro = None
+
+    def atual(self, geracao):
+        return geracao == self._geracao
+
+    def encerrar(self):
+        self.cancelar()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # Roda na thread de desenho; os sinais chegam à interface pela fila de
+    # eventos do Qt
+    def _executar(self, geracao, funcao, args, largura, altura, dpi):
+        if not self.atual(geracao):
+            return
+        try:
+            buffer = desenhar_buffer(funcao, args, largura, altura, dpi,
+                                     cancelado=lambda: not self.atual(geracao))
+        except Exception:
+            if self.atual(geracao):
+                self.erro.emit(geracao, traceback.format_exc())
+            return
+        if buffer is not None and self.atual(geracao):
+            self.grafico_pronto.emit(geracao, buffer)
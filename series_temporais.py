@@ -0,0 +1,161 @@
+# Matplotlib para criar gráficos e visualizações básicas
+import matplotlib.pyplot as plt
+
+# Pandas e Numpy para as séries diárias
+import pandas as pd
+import numpy as np
+
+from agregados import CuboAgregado, serie_dimensao
+
+
+# Janelas (em dias) das médias móveis da tendência diária
+JANELAS = (7, 30, 365)
+
+# Anos exibidos na comparação ano a ano
+ANOS_COMPARADOS = 5
+
+MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+# Função para obter a série diária de ocorrências de um DataFrame ou cubo
+def serie_diaria(dados, por=None):
+    """Contagem de ocorrências por dia, em ordem cronológica e com os dias sem
+    ocorrências preenchidos com zero (índice diário contínuo).
+
+    Com por='Municipio' ou 'AIS', retorna um DataFrame com uma coluna por
+    valor. Do cubo (ou do banco) a série vem pronta; do DataFrame (ex.: filtrado) é montada
+    com um único np.bincount sobre os dias."""
+    if isinstance(dados, CuboAgregado) or hasattr(dados, 'contagem'):
+        contagens = dados.contagem('Dia' if por is None else f"Dia/{por}")
+        if por is not None:
+            contagens = contagens.unstack(fill_value=0)
+        return _completar_dias(contagens.sort_index())
+
+    dias = serie_dimensao(dados, 'Dia').to_numpy(dtype='datetime64[D]')
+    validos = ~np.isnat(dias)
+    if not validos.any():
+        return pd.Series(dtype='int64', name='Ocorrencias') if por is None else pd.DataFrame()
+    inicio = dias[validos].min()
+    deslocamentos = (dias[validos] - inicio).astype('int64')
+    indice = pd.date_range(inicio, periods=int(deslocamentos.max()) + 1, freq='D')
+
+    if por is None:
+        return pd.Series(np.bincount(deslocamentos, minlength=len(indice)), index=indice, name='Ocorrencias')
+
+    codigos, valores = pd.factorize(dados[por].to_numpy()[validos])
+    presentes = codigos >= 0
+    totais = np.bincount(deslocamentos[presentes] * len(valores) + codigos[presentes],
+                         minlength=len(indice) * len(valores))
+    return pd.DataFrame(totais.reshape(len(indice), len(valores)), index=indice, columns=valores)
+
+
+def _completar_dias(contagens):
+    if len(contagens) == 0:
+        return contagens
+    indice = pd.date_range(contagens.index.min(), contagens.index.max(), freq='D')
+    contagens = contagens.reindex(indice, fill_value=0)
+    if isinstance(contagens, pd.Series):
+        contagens.name = 'Ocorrencias'
+    return contagens
+
+
+# Função para reagrupar a série diária em semanas ou meses
+def reamostrar(serie, frequencia):
+    """Totais por período ('W' para semanas, 'MS' para meses)"""
+    return serie.resample(frequencia).sum()
+
+
+# Função para calcular a média móvel de uma série diária
+def media_movel(serie, janela):
+    """Média dos últimos `janela` dias (a série diária não tem lacunas)"""
+    return serie.rolling(janela, min_periods=max(1, janela // 2)).mean()
+
+
+# Função para montar a tabela de totais mensais por ano
+def comparacao_anual(serie):
+    """Tabela ano x mês com os totais mensais e a variação do total de cada
+    ano em relação ao ano anterior"""
+    mensal = reamostrar(serie, 'MS')
+    tabela = pd.DataFrame({'Ano': mensal.index.year, 'Mes': mensal.index.month, 'Total': mensal.to_numpy()})
+    tabela = tabela.pivot(index='Ano', columns='Mes', values='Total').reindex(columns=range(1, 13))
+    totais = tabela.sum(axis=1, min_count=1)
+    variacao = totais.pct_change(fill_method=None)
+    return tabela, variacao
+
+
+def _sem_dados(ax, titulo):
+    ax.text(0.5, 0.5, 'Não há datas válidas para exibir.', horizontalalignment='center',
+            verticalalignment='center', transform=ax.transAxes, fontsize=12, color='gray')
+    ax.set_title(titulo)
+
+
+# Funções para criar gráficos
+def tendencia_diaria(dados, ax=None, titulo='Tendência Diária'):
+    if ax is None:
+        ax = plt.gca()
+    serie = serie_diaria(dados)
+    if serie.empty:
+        return _sem_dados(ax, titulo)
+    ax.plot(serie.index, serie.to_numpy(), color='lightgray', linewidth=0.5, label='Diário')
+    for janela in JANELAS:
+        movel = media_movel(serie, janela)
+        ax.plot(movel.index, movel.to_numpy(), linewidth=1.5, label=f'Média móvel de {janela} dias')
+    ax.set_title(titulo)
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Ocorrencias por dia')
+    ax.legend(loc='upper left')
+
+
+def tendencia_mensal(dados, ax=None, titulo='Tendência Mensal'):
+    if ax is None:
+        ax = plt.gca()
+    serie = serie_diaria(dados)
+    if serie.empty:
+        return _sem_dados(ax, titulo)
+    semanal = reamostrar(serie, 'W')
+    mensal = reamostrar(serie, 'MS')
+    ax.plot(semanal.index, semanal.to_numpy() * (365.25 / 12 / 7), color='lightgray', linewidth=0.7,
+            label='Semanal (escala mensal)')
+    ax.plot(mensal.index, mensal.to_numpy(), linewidth=1.5, label='Mensal')
+    ax.plot(mensal.index, mensal.rolling(12, min_periods=6).mean().to_numpy(), linewidth=2,
+            label='Média móvel de 12 meses')
+    ax.set_title(titulo)
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Ocorrencias por mês')
+    ax.legend(loc='upper left')
+
+
+def comparacao_ano_a_ano(dados, ax=None, titulo='Comparação Ano a Ano'):
+    if ax is None:
+        ax = plt.gca()
+    serie = serie_diaria(dados)
+    if serie.empty:
+        return _sem_dados(ax, titulo)
+    tabela, variacao = comparacao_anual(serie)
+    for ano in tabela.index[-ANOS_COMPARADOS:]:
+        rotulo = str(ano)
+        if pd.notna(variacao.get(ano)):
+            rotulo += f" ({variacao[ano]:+.1%} vs {ano - 1})"
+        ax.plot(range(12), tabela.loc[ano].to_numpy(), marker='o', label=rotulo)
+    ax.set_xticks(range(12), MESES)
+    ax.set_title(titulo)
+    ax.set_xlabel('Mês')
+    ax.set_ylabel('Ocorrencias')
+    ax.legend(title='Ano (variação anual)')
+
+
+def tendencia_por(dados, ax=None, coluna='Municipio', titulo='Tendência por Município', quantidade=5):
+    """Média móvel de 30 dias das `quantidade` categorias com mais ocorrências"""
+    if ax is None:
+        ax = plt.gca()
+    tabela = serie_diaria(dados, por=coluna)
+    if tabela.empty:
+        return _sem_dados(ax, titulo)
+    principais = tabela.sum().sort_values(ascending=False).index[:quantidade]
+    for valor in principais:
+        movel = media_movel(tabela[valor], 30)
+        ax.plot(movel.index, movel.to_numpy(), linewidth=1.5, label=str(valor))
+    ax.set_title(titulo)
+    ax.set_xlabel('Data')
+    ax.set_ylabel('Ocorrencias por dia (média de 30 dias)')
+    ax.legend(loc='upper left')
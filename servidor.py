@@ -0,0 +1,462 @@
+"""Servidor HTTP do painel: os mesmos gráficos da interface, no navegador.
+
+Carrega os conjuntos de dados uma única vez (leitura_dados, com o cache
+colunar e o cubo de contagens) e atende, com asyncio e sem dependências
+além das do projeto:
+
+    GET /                                      página com os gráficos
+    GET /api                                   conjuntos, dimensões, gráficos e filtros
+    GET /<conjunto>/<dimensao>?top=20&ano=2023 contagens em JSON
+    GET /<conjunto>/grafico/<funcao>.png       gráfico desenhado no servidor
+
+Conjuntos: cvli (ou crimes_violentos), crimes_sexuais, entorpecentes e
+cruzamentos (só gráficos). Filtros: ano (2023, 2020-2023 ou 2020,2022), mes,
+municipio, ais, genero, raca, natureza, meio e tipo; vários valores separados
+por vírgula. As respostas ficam em um cache em memória e levam um ETag; um
+If-None-Match igual recebe 304 sem corpo.
+
+Uso:
+    python servidor.py                        # http://127.0.0.1:8050
+    python servidor.py --host 0.0.0.0 --porta 8080
+    python servidor.py --banco                # contagens do banco SQLite
+"""
+import argparse
+import asyncio
+import hashlib
+import html
+import io
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Backend sem janela: o servidor roda sem display
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+import numpy as np
+import pandas as pd
+
+from agregados import contagem, obter_cubo
+from cruzamentos import ConjuntosCruzados
+from filtros import IndiceFiltros
+from leitura_dados import DATASETS
+from mapas import chave_nome
+from registro_graficos import MENUS, MENU_CRUZAMENTOS, configurar_estilo, resolver
+
+
+PORTA_PADRAO = 8050
+
+# Nomes dos conjuntos aceitos na URL
+CONJUNTOS_URL = {
+    'cvli': 'crimes_violentos',
+    'crimes_violentos': 'crimes_violentos',
+    'crimes_sexuais': 'crimes_sexuais',
+    'entorpecentes': 'entorpecentes',
+    MENU_CRUZAMENTOS: MENU_CRUZAMENTOS,
+}
+
+# Dimensões aceitas na URL e as do cubo/DataFrame correspondentes
+DIMENSOES_URL = {
+    'ano': 'Ano',
+    'mes': 'Mes',
+    'dia': 'Dia',
+    'dia_semana': 'Dia da Semana',
+    'hora': 'Hora do Dia',
+    'municipio': 'Municipio',
+    'ais': 'AIS',
+    'genero': 'Genero',
+    'raca': 'Raca da Vitima',
+    'idade': 'Idade da Vitima',
+    'escolaridade': 'Escolaridade da Vitima',
+    'natureza': 'Natureza',
+    'meio': 'Meio Empregado',
+    'tipo': 'Tipo de Entorpecente',
+}
+
+# Dimensões listadas em ordem cronológica em vez de pela contagem
+DIMENSOES_ORDENADAS = {'Ano', 'Mes', 'Dia', 'Hora do Dia'}
+
+# Parâmetros da URL que filtram os dados (colunas do IndiceFiltros)
+FILTROS_URL = {
+    'ano': 'Ano',
+    'mes': 'Mes',
+    'municipio': 'Municipio',
+    'ais': 'AIS',
+    'genero': 'Genero',
+    'raca': 'Raca da Vitima',
+    'natureza': 'Natureza',
+    'meio': 'Meio Empregado',
+    'tipo': 'Tipo de Entorpecente',
+}
+
+# Tamanho padrão e máximo dos PNGs, em pixels
+TAMANHO_PNG = (1000, 600)
+TAMANHO_MAXIMO_PNG = 2400
+DPI_PNG = 100
+
+MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error'}
+
+
+# Erro de requisição, respondido com o status indicado
+class ErroRequisicao(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# Classe com uma resposta pronta (corpo e ETag calculados uma vez)
+class Resposta:
+    def __init__(self, status, tipo, corpo):
+        self.status = status
+        self.tipo = tipo
+        self.corpo = corpo
+        self.etag = f'"{hashlib.sha1(corpo).hexdigest()[:20]}"'
+
+    def bytes(self, manter_conexao=True, com_corpo=True, nao_modificado=False):
+        status = 304 if nao_modificado else self.status
+        cabecalhos = [
+            f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}",
+            f"Content-Type: {self.tipo}",
+            f"Content-Length: {0 if nao_modificado else len(self.corpo)}",
+            f"ETag: {self.etag}",
+            "Cache-Control: public, max-age=300" if self.status == 200 else "Cache-Control: no-store",
+            f"Connection: {'keep-alive' if manter_conexao else 'close'}",
+        ]
+        inicio = ("\r\n".join(cabecalhos) + "\r\n\r\n").encode('latin-1')
+        return inicio + self.corpo if com_corpo and not nao_modificado else inicio
+
+
+def resposta_json(dados, status=200):
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return Resposta(status, 'application/json; charset=utf-8', corpo)
+
+
+# Classe com o cache das respostas, limitado em bytes (LRU)
+class CacheRespostas:
+    def __init__(self, limite_bytes=64 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.total_bytes = 0
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+
+    def obter(self, chave):
+        resposta = self._itens.get(chave)
+        if resposta is None:
+            self.faltas += 1
+            return None
+        self.acertos += 1
+        self._itens.move_to_end(chave)
+        return resposta
+
+    def guardar(self, chave, resposta):
+        if len(resposta.corpo) > self.limite_bytes:
+            return
+        antiga = self._itens.pop(chave, None)
+        if antiga is not None:
+            self.total_bytes -= len(antiga.corpo)
+        self._itens[chave] = resposta
+        self.total_bytes += len(resposta.corpo)
+        # Descartar as respostas usadas há mais tempo até caber no limite
+        while self.total_bytes > self.limite_bytes:
+            _, removida = self._itens.popitem(last=False)
+            self.total_bytes -= len(removida.corpo)
+
+    def __len__(self):
+        return len(self._itens)
+
+
+# Função para converter um valor do pandas/numpy em um valor JSON
+def _valor_json(valor):
+    if isinstance(valor, pd.Timestamp):
+        return valor.date().isoformat() if valor == valor.normalize() else valor.isoformat()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor if isinstance(valor, (int, float, str)) or valor is None else str(valor)
+
+
+# Função para carregar os conjuntos de dados uma única vez
+def carregar_conjuntos(nomes=None, banco=None):
+    """Retorna {nome: (DataFrame, cubo, índice de filtros)} dos conjuntos disponíveis.
+    Com um arquivo de banco (banco_dados), o mesmo ConjuntoSQL faz os três
+    papéis e as contagens são consultas ao banco."""
+    conjuntos = {}
+    for nome in nomes or list(DATASETS):
+        if banco is not None:
+            from banco_dados import obter_conjunto
+            conjunto = obter_conjunto(nome, banco)
+            if conjunto is not None:
+                conjuntos[nome] = (conjunto, conjunto, conjunto)
+            continue
+        df = DATASETS[nome]()
+        if df is None:
+            print(f"Conjunto {nome} indisponível")
+            continue
+        conjuntos[nome] = (df, obter_cubo(df), IndiceFiltros(df))
+    return conjuntos
+
+
+# Classe do servidor: rotas, cache e desenho dos gráficos
+class ServidorPainel:
+    def __init__(self, conjuntos):
+        self.conjuntos = conjuntos
+        self.cruzados = ConjuntosCruzados({nome: cubo for nome, (_, cubo, _) in conjuntos.items()})
+        self.cache = CacheRespostas()
+        self.requisicoes = 0
+        self.inicio = time.time()
+        # Uma thread para o matplotlib; o laço de eventos continua atendendo
+        self._desenho = ThreadPoolExecutor(max_workers=1, thread_name_prefix='grafico')
+        # Requisições iguais que chegam enquanto a primeira é calculada
+        # aguardam o mesmo resultado
+        self._em_andamento = {}
+
+    # Função chamada para cada requisição; devolve uma Resposta
+    async def responder(self, metodo, alvo):
+        self.requisicoes += 1
+        if metodo not in ('GET', 'HEAD'):
+            return resposta_json({'erro': f"Método {metodo} não suportado"}, 405)
+
+        partes = urlsplit(alvo)
+        caminho = unquote(partes.path).rstrip('/') or '/'
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+        chave = (caminho, tuple(sorted(parametros.items())))
+
+        resposta = self.cache.obter(chave)
+        if resposta is not None:
+            return resposta
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._calcular(caminho, parametros))
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+        resposta = await asyncio.shield(tarefa)
+        # Só respostas de sucesso vão para o cache (os dados não mudam); o
+        # catálogo traz as estatísticas do servidor e é sempre recalculado
+        if resposta.status == 200 and caminho != '/api':
+            self.cache.guardar(chave, resposta)
+        return resposta
+
+    async def _calcular(self, caminho, parametros):
+        try:
+            partes = caminho.strip('/').split('/')
+            if caminho == '/':
+                return Resposta(200, 'text/html; charset=utf-8', self._pagina_inicial().encode('utf-8'))
+            if partes == ['api']:
+                return resposta_json(self._catalogo())
+            nome = CONJUNTOS_URL.get(partes[0].replace('-', '_'))
+            if nome is None or (nome != MENU_CRUZAMENTOS and nome not in self.conjuntos):
+                raise ErroRequisicao(404, f"Conjunto '{partes[0]}' não encontrado")
+            if len(partes) == 3 and partes[1] == 'grafico' and partes[2].endswith('.png'):
+                return await self._grafico(nome, partes[2][:-4], parametros)
+            if len(partes) == 2 and nome != MENU_CRUZAMENTOS:
+                return resposta_json(self._contagens(nome, partes[1], parametros))
+            raise ErroRequisicao(404, f"Caminho '{caminho}' não encontrado")
+        except ErroRequisicao as e:
+            return resposta_json({'erro': str(e)}, e.status)
+        except Exception as e:
+            print(f"Erro ao responder {caminho}: {str(e)}")
+            return resposta_json({'erro': str(e)}, 500)
+
+    # Função para resolver os parâmetros de filtro nos critérios do índice
+    def _criterios(self, nome, parametros):
+        indice = self.conjuntos[nome][2]
+        criterios = {}
+        for parametro, texto in parametros.items():
+            coluna = FILTROS_URL.get(parametro)
+            if coluna is None:
+                continue
+            if coluna not in indice.colunas():
+                raise ErroRequisicao(400, f"O conjunto não pode ser filtrado por '{parametro}'")
+            if coluna in ('Ano', 'Mes'):
+                try:
+                    if '-' in texto:
+                        inicio, fim = (int(valor) for valor in texto.split('-'))
+                        criterios[coluna] = list(range(inicio, fim + 1))
+                    else:
+                        criterios[coluna] = [int(valor) for valor in texto.split(',')]
+                except ValueError:
+                    raise ErroRequisicao(400, f"Valor inválido para '{parametro}': {texto}")
+                continue
+            # Valores comparados sem acentos e sem diferença de maiúsculas
+            conhecidos = {chave_nome(valor): valor for valor in indice.valores(coluna)}
+            selecionados = []
+            for valor in texto.split(','):
+                if chave_nome(valor) not in conhecidos:
+                    raise ErroRequisicao(400, f"Valor desconhecido para '{parametro}': {valor}")
+                selecionados.append(conhecidos[chave_nome(valor)])
+            criterios[coluna] = selecionados
+        return criterios
+
+    # Função para obter os dados (cubo sem filtros, linhas filtradas com filtros)
+    def _dados(self, nome, parametros):
+        if nome == MENU_CRUZAMENTOS:
+            return self.cruzados, {}
+        df, cubo, indice = self.conjuntos[nome]
+        criterios = self._criterios(nome, parametros)
+        return (indice.filtrar(criterios) if criterios else cubo), criterios
+
+    def _contagens(self, nome, dimensao_url, parametros):
+        dimensao = DIMENSOES_URL.get(dimensao_url)
+        if dimensao is None:
+            raise ErroRequisicao(404, f"Dimensão '{dimensao_url}' não encontrada")
+        dados, criterios = self._dados(nome, parametros)
+        try:
+            contagens = contagem(dados, dimensao)
+        except KeyError:
+            raise ErroRequisicao(404, f"O conjunto não tem a dimensão '{dimensao_url}'")
+        if dimensao in DIMENSOES_ORDENADAS:
+            contagens = contagens.sort_index()
+        top = parametros.get('top')
+        if top is not None:
+            if not top.isdigit() or int(top) < 1:
+                raise ErroRequisicao(400, f"Valor inválido para 'top': {top}")
+            contagens = contagens.head(int(top))
+        return {
+            'conjunto': nome,
+            'dimensao': dimensao,
+            'filtros': {coluna: [_valor_json(valor) for valor in valores] for coluna, valores in criterios.items()},
+            'total': int(len(dados)),
+            'valores': [{'valor': _valor_json(valor), 'ocorrencias': int(total)} for valor, total in contagens.items()],
+        }
+
+    async def _grafico(self, nome, funcao, parametros):
+        graficos = {grafico.funcao: grafico for grafico in MENUS[nome].graficos}
+        if funcao not in graficos:
+            raise ErroRequisicao(404, f"Gráfico '{funcao}' não encontrado")
+        try:
+            largura = min(int(parametros.get('largura', TAMANHO_PNG[0])), TAMANHO_MAXIMO_PNG)
+            altura = min(int(parametros.get('altura', TAMANHO_PNG[1])), TAMANHO_MAXIMO_PNG)
+        except ValueError:
+            raise ErroRequisicao(400, "Largura e altura devem ser números inteiros")
+        dados, _ = self._dados(nome, parametros)
+        corpo = await asyncio.get_running_loop().run_in_executor(
+            self._desenho, desenhar_png, resolver(graficos[funcao]), dados, max(largura, 100), max(altura, 100))
+        return Resposta(200, 'image/png', corpo)
+
+    def _catalogo(self):
+        conjuntos = {}
+        for nome, (df, cubo, indice) in self.conjuntos.items():
+            conjuntos[nome] = {
+                'registros': len(df),
+                'dimensoes': [url for url, dimensao in DIMENSOES_URL.items() if dimensao in cubo],
+                'filtros': [url for url, coluna in FILTROS_URL.items() if coluna in indice.colunas()],
+                'graficos': [f"/{nome}/grafico/{grafico.funcao}.png" for grafico in MENUS[nome].graficos],
+            }
+        if len(self.cruzados.pares()) > 0:
+            conjuntos[MENU_CRUZAMENTOS] = {
+                'graficos': [f"/{MENU_CRUZAMENTOS}/grafico/{grafico.funcao}.png"
+                             for grafico in MENUS[MENU_CRUZAMENTOS].graficos],
+            }
+        return {
+            'conjuntos': conjuntos,
+            'requisicoes': self.requisicoes,
+            'respostas_em_cache': len(self.cache),
+            'acertos_cache': self.cache.acertos,
+            'segundos_no_ar': round(time.time() - self.inicio, 1),
+        }
+
+    def _pagina_inicial(self):
+        secoes = []
+        nomes = list(self.conjuntos) + ([MENU_CRUZAMENTOS] if self.cruzados.pares() else [])
+        for nome in nomes:
+            menu = MENUS[nome]
+            itens = "".join(
+                f'<li><a href="/{nome}/grafico/{grafico.funcao}.png">{html.escape(grafico.rotulo)}</a></li>'
+                for grafico in menu.graficos)
+            secoes.append(f"<h2>{html.escape(menu.titulo)}</h2><p>{html.escape(menu.descricao)}</p><ul>{itens}</ul>")
+        return ("<!DOCTYPE html><html lang=\"pt-BR\"><head><meta charset=\"utf-8\">"
+                "<title>Análise de Criminalidade no Ceará</title></head><body>"
+                "<h1>Análise de Criminalidade no Ceará</h1>"
+                "<p>Contagens em JSON: <a href=\"/api\">/api</a> (ex.: /cvli/municipio?top=20&amp;ano=2023)</p>"
+                + "".join(secoes) + "</body></html>")
+
+    # Função que atende uma conexão (várias requisições com keep-alive)
+    async def atender(self, leitor, escritor):
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                # O corpo (se houver) é descartado: só há rotas GET
+                if cabecalhos.get('content-length', '0').isdigit() and int(cabecalhos.get('content-length', 0)):
+                    await leitor.readexactly(int(cabecalhos['content-length']))
+
+                resposta = await self.responder(metodo, alvo)
+                manter = versao == 'HTTP/1.1' and cabecalhos.get('connection', '').lower() != 'close'
+                nao_modificado = resposta.status == 200 and cabecalhos.get('if-none-match') == resposta.etag
+                escritor.write(resposta.bytes(manter, metodo != 'HEAD', nao_modificado))
+                await escritor.drain()
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    def encerrar(self):
+        self._desenho.shutdown(wait=False, cancel_futures=True)
+
+
+# Função executada na thread de desenho
+def desenhar_png(funcao, dados, largura, altura):
+    figura = Figure(figsize=(largura / DPI_PNG, altura / DPI_PNG), dpi=DPI_PNG)
+    funcao(dados, ax=figura.add_subplot(111))
+    figura.tight_layout()
+    saida = io.BytesIO()
+    figura.savefig(saida, format='png', dpi=DPI_PNG)
+    return saida.getvalue()
+
+
+async def servir(host, porta, conjuntos):
+    servidor_painel = ServidorPainel(conjuntos)
+    servidor = await asyncio.start_server(servidor_painel.atender, host, porta, backlog=1024)
+    print(f"Servidor no ar em http://{host}:{porta} ({', '.join(conjuntos)})")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        servidor_painel.encerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP com os gráficos e contagens dos dados.")
+    parser.add_argument('--host', default='127.0.0.1', help="endereço (0.0.0.0 para aceitar outras máquinas)")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--conjuntos', nargs='+', choices=list(DATASETS), help="conjuntos de dados a carregar")
+    parser.add_argument('--banco', nargs='?', const='', metavar='ARQUIVO',
+                        help="consultar os dados no banco SQLite (banco_dados.py) em vez de carregá-los em memória")
+    args = parser.parse_args(argv)
+
+    configurar_estilo()
+    if args.banco == '':
+        from banco_dados import ARQUIVO_BANCO
+        args.banco = ARQUIVO_BANCO
+    conjuntos = carregar_conjuntos(args.conjuntos, args.banco)
+    if not conjuntos:
+        print("Nenhum conjunto de dados disponível")
+        return 1
+    try:
+        asyncio.run(servir(args.host, args.porta, conjuntos))
+    except KeyboardInterrupt:
+        print("Servidor encerrado")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Teste de carga do servidor do painel (servidor.py).
+
+Abre várias conexões simultâneas (keep-alive) e faz requisições aos
+endereços pedidos, em rodízio, durante o tempo indicado. Mostra as
+requisições por segundo, a latência (mediana, p95, p99) e os status.
+
+Uso:
+    python servidor.py &
+    python teste_carga.py --conexoes 50 --segundos 10
+    python teste_carga.py --caminhos /cvli/municipio?top=20 /cvli/grafico/municipio_cv.png
+"""
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from servidor import PORTA_PADRAO
+
+
+# Mistura padrão: contagens em JSON com e sem filtros e alguns PNGs
+CAMINHOS_PADRAO = [
+    '/cvli/municipio?top=20',
+    '/cvli/municipio?top=20&ano=2023',
+    '/cvli/ais?ano=2020-2023',
+    '/cvli/mes?municipio=Fortaleza',
+    '/cvli/hora?genero=Feminino',
+    '/crimes_sexuais/ano',
+    '/crimes_sexuais/idade?municipio=Caucaia',
+    '/cvli/grafico/municipio_cv.png',
+    '/cvli/grafico/ano_cv.png?ano=2015-2020',
+    '/crimes_sexuais/grafico/raca_cs.png',
+    '/api',
+]
+
+
+# Função que faz requisições em uma conexão até o prazo acabar
+async def _cliente(host, porta, caminhos, deslocamento, prazo, latencias, status):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    posicao = deslocamento
+    try:
+        while time.perf_counter() < prazo:
+            caminho = caminhos[posicao % len(caminhos)]
+            posicao += 1
+            inicio = time.perf_counter()
+            escritor.write(f"GET {caminho} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+            await escritor.drain()
+
+            linha = await leitor.readline()
+            if not linha:
+                break
+            tamanho = 0
+            while True:
+                cabecalho = await leitor.readline()
+                if cabecalho in (b'\r\n', b''):
+                    break
+                nome, _, valor = cabecalho.decode('latin-1').partition(':')
+                if nome.strip().lower() == 'content-length':
+                    tamanho = int(valor)
+            await leitor.readexactly(tamanho)
+            latencias.append(time.perf_counter() - inicio)
+            status[int(linha.split()[1])] += 1
+    finally:
+        escritor.close()
+
+
+async def executar(host, porta, caminhos, conexoes, segundos):
+    latencias = []
+    status = Counter()
+    inicio = time.perf_counter()
+    prazo = inicio + segundos
+    await asyncio.gather(*(_cliente(host, porta, caminhos, i, prazo, latencias, status) for i in range(conexoes)))
+    duracao = time.perf_counter() - inicio
+    return latencias, status, duracao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor do painel.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--conexoes', type=int, default=50, help="conexões simultâneas")
+    parser.add_argument('--segundos', type=float, default=10.0, help="duração do teste")
+    parser.add_argument('--caminhos', nargs='+', default=CAMINHOS_PADRAO, help="endereços requisitados em rodízio")
+    args = parser.parse_args(argv)
+
+    try:
+        latencias, status, duracao = asyncio.run(
+            executar(args.host, args.porta, args.caminhos, args.conexoes, args.segundos))
+    except ConnectionError as e:
+        print(f"Não foi possível conectar a {args.host}:{args.porta}: {str(e)}")
+        return 1
+
+    if not latencias:
+        print("Nenhuma requisição concluída")
+        return 1
+    milissegundos = np.array(latencias) * 1000
+    print(f"{len(latencias)} requisições em {duracao:.1f} s com {args.conexoes} conexões: "
+          f"{len(latencias) / duracao:.0f} req/s")
+    print(f"Latência (ms): mediana {np.median(milissegundos):.1f}, p95 {np.percentile(milissegundos, 95):.1f}, "
+          f"p99 {np.percentile(milissegundos, 99):.1f}, máxima {milissegundos.max():.1f}")
+    print("Status: " + ", ".join(f"{codigo}: {total}" for codigo, total in sorted(status.items())))
+    return 0 if set(status) <= {200, 304} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# Os módulos do projeto ficam na raiz do repositório, sem pacote
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leitura_dados import ESQUEMA_CRIMES_VIOLENTOS, aplicar_esquema  # noqa: E402
+
+
+# Função para gerar um DataFrame já tratado, no esquema dos crimes violentos
+def gerar_crimes(linhas=2000, semente=0):
+    """Linhas sorteadas com poucos valores por coluna e alguns nulos"""
+    rng = np.random.default_rng(semente)
+
+    def sortear(valores):
+        return rng.choice(np.array(valores, dtype=object), linhas)
+
+    datas = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, linhas), unit='D')
+    df = pd.DataFrame({
+        'Municipio': sortear(['Fortaleza', 'Caucaia', 'Maracanaú', 'Sobral', 'Juazeiro do Norte']),
+        'AIS': sortear(['AIS 01', 'AIS 02', 'AIS 11', 'AIS 15']),
+        'Natureza': sortear(['Homicidio Doloso', 'Feminicidio', 'Latrocinio']),
+        'Data': datas,
+        'Hora': rng.integers(0, 1440, linhas),
+        'Dia da Semana': datas.day_name(),
+        'Meio Empregado': sortear(['Arma de fogo', 'Arma branca', 'Outros']),
+        'Genero': sortear(['Masculino', 'Feminino', None]),
+        'Idade da Vitima': rng.integers(0, 90, linhas),
+        'Escolaridade da Vitima': sortear(['Fundamental', 'Medio', 'Superior', None]),
+        'Raca da Vitima': sortear(['Parda', 'Branca', 'Preta']),
+    })
+    df = aplicar_esquema(df, ESQUEMA_CRIMES_VIOLENTOS, relatorio=False)
+    df.loc[rng.random(linhas) < 0.05, 'Hora'] = pd.NA
+    return df
+
+
+@pytest.fixture
+def crimes():
+    return gerar_crimes()
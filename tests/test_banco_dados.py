@@ -0,0 +1,56 @@
+# Testes das contagens respondidas pelo banco (banco_dados.ConjuntoSQL)
+import pytest
+
+import agregados
+from banco_dados import ConjuntoSQL, ingerir_conjunto, pool_conexoes
+from conftest import gerar_crimes
+from filtros import IndiceFiltros
+
+
+@pytest.fixture(scope='module')
+def crimes_banco(tmp_path_factory):
+    df = gerar_crimes(1500, semente=7)
+    arquivo = str(tmp_path_factory.mktemp('banco') / 'ocorrencias.sqlite')
+    ingerir_conjunto('crimes_violentos', df, arquivo, chave='teste')
+    yield df, ConjuntoSQL('crimes_violentos', arquivo)
+    pool_conexoes(arquivo).fechar()
+
+
+def _comparar(obtida, esperada):
+    """Mesmas contagens por valor (a ordem entre valores empatados e os tipos
+    e nomes do índice podem variar)"""
+    assert obtida.index.nlevels == esperada.index.nlevels
+    assert obtida.to_dict() == esperada.to_dict()
+    # Uma dimensão: da maior contagem para a menor, como value_counts
+    if obtida.index.nlevels == 1:
+        assert obtida.is_monotonic_decreasing
+
+
+@pytest.mark.parametrize('dimensao', ['Municipio', 'AIS', 'Natureza', 'Genero', 'Escolaridade da Vitima',
+                                      'Dia da Semana', 'Ano', 'Mes', 'Hora do Dia', 'Idade da Vitima',
+                                      'Dia/Municipio', 'Dia/AIS'])
+def test_contagem_igual_a_do_dataframe(crimes_banco, dimensao):
+    df, conjunto = crimes_banco
+    _comparar(conjunto.contagem(dimensao), agregados.contagem(df, dimensao))
+
+
+@pytest.mark.parametrize('criterios', [
+    {'Municipio': 'Fortaleza'},
+    {'Ano': [2019, 2020, 2023], 'Genero': 'Feminino'},
+    {'Mes': range(1, 4), 'AIS': ['AIS 01', 'AIS 15']},
+])
+def test_contagem_filtrada_igual_a_do_dataframe(crimes_banco, criterios):
+    df, conjunto = crimes_banco
+    filtrado = IndiceFiltros(df).filtrar(criterios)
+    sql = conjunto.filtrar(criterios)
+    assert len(sql) == len(filtrado)
+    for dimensao in ('Natureza', 'Ano', 'Dia/Municipio'):
+        _comparar(sql.contagem(dimensao), agregados.contagem(filtrado, dimensao))
+
+
+def test_contagem_sem_registros(crimes_banco):
+    _, conjunto = crimes_banco
+    vazio = conjunto.filtrar({'Municipio': 'Inexistente'})
+    assert len(vazio) == 0
+    assert vazio.contagem('Genero').empty
+    assert vazio.contagem('Dia/Municipio').empty
@@ -0,0 +1,45 @@
+# Testes da carga em segundo plano (carregamento.CarregadorDados)
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import pandas as pd
+
+from carregamento import CarregadorDados
+from memoria_compartilhada import entregar, publicar
+
+
+def _existe(nome):
+    try:
+        shared_memory.SharedMemory(name=nome).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+# Executada no pool: publica o DataFrame e fica carregando até ser interrompida
+def _publicar_e_esperar(segmento):
+    entregar(publicar(pd.DataFrame({'Valor': range(1000)}), segmento))
+    time.sleep(60)
+
+
+def test_cancelar_remove_os_segmentos_publicados():
+    carregador = CarregadorDados(tarefas=('crimes_violentos',), usar_banco=False)
+    concluido = []
+    carregador.concluido.connect(lambda: concluido.append(True))
+
+    segmento = f"tbd_teste_{time.time_ns() % 10 ** 8}"
+    carregador._pool = multiprocessing.get_context('spawn').Pool(1)
+    carregador._pendentes = {'crimes_violentos'}
+    carregador._segmentos = {'crimes_violentos': segmento}
+    carregador._pool.apply_async(_publicar_e_esperar, (segmento,))
+    limite = time.monotonic() + 30
+    while not _existe(segmento) and time.monotonic() < limite:
+        time.sleep(0.05)
+    assert _existe(segmento)
+
+    carregador.cancelar()
+
+    assert not _existe(segmento)
+    assert concluido == [True]
+    assert not carregador.em_andamento()
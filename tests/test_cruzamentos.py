@@ -0,0 +1,66 @@
+# Testes dos cruzamentos entre conjuntos (cruzamentos)
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from cruzamentos import (DEFASAGEM_MAXIMA, ConjuntosCruzados, correlacao_defasada,
+                         correlacao_defasada_grafico, correlacao_locais, correlacoes_defasadas,
+                         series_comparadas)
+
+MUNICIPIOS = ['Fortaleza', 'Caucaia', 'Sobral', 'Crato', 'Iguatu']
+
+
+def _ocorrencias(contagens, inicio):
+    """Uma linha por ocorrência a partir de uma matriz municípios x meses"""
+    meses = pd.date_range(inicio, periods=contagens.shape[1], freq='MS')
+    locais, periodos = np.nonzero(contagens)
+    repeticoes = contagens[locais, periodos]
+    return pd.DataFrame({'Municipio': np.repeat(np.array(MUNICIPIOS)[locais], repeticoes),
+                         'Data': np.repeat(meses[periodos], repeticoes)})
+
+
+def _vazio():
+    return pd.DataFrame({'Municipio': pd.Series(dtype=object), 'Data': pd.Series(dtype='datetime64[ns]')})
+
+
+def test_serie_defasada_tem_a_defasagem_conhecida():
+    # b repete a com 3 meses de atraso
+    rng = np.random.default_rng(5)
+    contagens = rng.poisson(20, (len(MUNICIPIOS), 51))
+    a = _ocorrencias(contagens, '2019-01-01')
+    b = _ocorrencias(contagens, '2019-04-01')
+    dados = ConjuntosCruzados({'entorpecentes': a, 'crimes_violentos': b})
+
+    correlacoes = correlacoes_defasadas(dados.tabelas(), 'entorpecentes', 'crimes_violentos',
+                                        range(-DEFASAGEM_MAXIMA, DEFASAGEM_MAXIMA + 1))
+    assert correlacoes.idxmax() == 3
+    assert correlacoes[3] > 0.99
+
+
+def test_correlacao_defasada_sem_periodos_restantes():
+    a = np.ones((2, 3))
+    assert np.isnan(correlacao_defasada(a, a, 3))
+    assert np.isnan(correlacao_defasada(a[:, :0], a[:, :0], 0))
+
+
+@pytest.mark.parametrize('conjuntos', [
+    # Todos os conjuntos vazios
+    lambda: {'entorpecentes': _vazio(), 'crimes_violentos': _vazio()},
+    # Coberturas sem nenhum mês em comum
+    lambda: {'entorpecentes': _ocorrencias(np.full((5, 12), 3), '2019-01-01'),
+             'crimes_violentos': _ocorrencias(np.full((5, 12), 3), '2021-01-01')},
+])
+def test_sem_periodo_comum(conjuntos):
+    dados = ConjuntosCruzados(conjuntos())
+    tabelas = dados.tabelas()
+    assert tabelas.periodo_comum('entorpecentes', 'crimes_violentos') is None
+    assert correlacoes_defasadas(tabelas, 'entorpecentes', 'crimes_violentos', range(3)).empty
+
+    for grafico in (correlacao_defasada_grafico, series_comparadas, correlacao_locais):
+        fig, ax = plt.subplots()
+        grafico(dados, ax=ax)
+        assert [texto.get_text() for texto in ax.texts] == ['Os conjuntos de dados não têm meses em comum.']
+        plt.close(fig)
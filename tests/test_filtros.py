@@ -0,0 +1,75 @@
+# Testes dos índices de filtragem (filtros.IndiceFiltros)
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import gerar_crimes
+from filtros import IndiceFiltros, chave_filtros
+
+
+# Número de linhas que não é múltiplo de 8 (sobra no último byte dos bitmaps)
+LINHAS = 2001
+
+
+@pytest.fixture(scope='module')
+def crimes_indice():
+    df = gerar_crimes(LINHAS, semente=3)
+    return df, IndiceFiltros(df)
+
+
+def _mascara(df, criterios):
+    """Mesma seleção feita direto nas colunas"""
+    mascara = pd.Series(True, index=df.index)
+    datas = pd.to_datetime(df['Data'])
+    for coluna, valores in criterios.items():
+        if not isinstance(valores, (list, tuple, set, range)):
+            valores = [valores]
+        serie = datas.dt.year if coluna == 'Ano' else datas.dt.month if coluna == 'Mes' else df[coluna]
+        mascara &= serie.isin(list(valores))
+    return mascara.to_numpy()
+
+
+@pytest.mark.parametrize('criterios', [
+    {'Municipio': 'Fortaleza'},
+    {'Municipio': ['Caucaia', 'Sobral']},
+    {'Ano': range(2020, 2022)},
+    {'Mes': [12]},
+    {'Municipio': 'Fortaleza', 'Genero': 'Feminino', 'Ano': [2019, 2023]},
+    {'AIS': ['AIS 01', 'AIS 11'], 'Natureza': 'Latrocinio', 'Mes': range(1, 7)},
+    {'Municipio': 'Inexistente'},
+    {'Ano': [1990]},
+])
+def test_filtrar_igual_a_mascara(crimes_indice, criterios):
+    df, indice = crimes_indice
+    esperado = _mascara(df, criterios)
+    np.testing.assert_array_equal(indice.mascara(criterios), esperado)
+    pd.testing.assert_frame_equal(indice.filtrar(criterios), df[esperado])
+
+
+def test_sem_criterios(crimes_indice):
+    df, indice = crimes_indice
+    assert indice.filtrar({}) is df
+    assert indice.mascara({}).all()
+
+
+def test_valores_e_ids(crimes_indice):
+    df, indice = crimes_indice
+    # Nulos não entram em nenhum valor
+    assert indice.valores('Genero') == ['Feminino', 'Masculino']
+    assert indice.valores('Mes') == list(range(1, 13))
+    ids = indice.ids('Municipio', 'Sobral')
+    np.testing.assert_array_equal(ids, np.flatnonzero(df['Municipio'] == 'Sobral'))
+    assert len(indice.ids('Municipio', 'Inexistente')) == 0
+
+
+def test_bitmaps_nao_sao_alterados_pelas_combinacoes(crimes_indice):
+    _, indice = crimes_indice
+    antes = indice.bitmap('Municipio', 'Fortaleza').copy()
+    indice.mascara({'Municipio': ['Fortaleza', 'Caucaia'], 'Genero': 'Masculino'})
+    np.testing.assert_array_equal(indice.bitmap('Municipio', 'Fortaleza'), antes)
+
+
+def test_chave_filtros():
+    assert chave_filtros({}) is None
+    assert chave_filtros({'Ano': range(2020, 2022), 'Municipio': 'Fortaleza'}) == \
+        chave_filtros({'Municipio': ['Fortaleza'], 'Ano': [2020, 2021]})
@@ -0,0 +1,73 @@
+# Testes da ingestão incremental (leitura_dados.ingerir_incremento)
+import numpy as np
+import pandas as pd
+import pytest
+
+import leitura_dados
+from dados_sinteticos import _RESERVA, gerar_bloco
+from leitura_dados import ESQUEMA_CRIMES_VIOLENTOS, _contidas, ingerir_incremento
+
+
+@pytest.fixture
+def planilhas(tmp_path, monkeypatch):
+    """Linhas brutas distintas e um conjunto cuja planilha completa tem as 300 primeiras"""
+    dist = dict(_RESERVA)
+    dist['Município/AIS'] = ([('Fortaleza', 'AIS 01'), ('Caucaia', 'AIS 11'), ('Sobral', 'AIS 15')],
+                             np.array([0.6, 0.3, 0.1]))
+    dist['Hora'] = (None, None)
+    linhas = gerar_bloco('crimes_violentos', 700, np.random.default_rng(1), dist)
+    linhas = linhas.drop_duplicates(ignore_index=True).iloc[:600]
+    assert len(linhas) == 600
+
+    base = tmp_path / 'base.csv'
+    linhas.iloc[:300].to_csv(base, index=False)
+    monkeypatch.setattr(leitura_dados, 'CONJUNTOS',
+                        {'crimes_violentos': (str(base), ESQUEMA_CRIMES_VIOLENTOS)})
+
+    def gravar(nome, *trechos):
+        caminho = tmp_path / nome
+        pd.concat([linhas.iloc[trecho] for trecho in trechos]).to_csv(caminho, index=False)
+        return str(caminho)
+
+    return gravar
+
+
+def test_contidas():
+    ordenadas = np.array([3, 7, 7, 10], dtype='uint64')
+    chaves = np.array([0, 3, 5, 7, 10, 11], dtype='uint64')
+    assert _contidas(chaves, ordenadas).tolist() == [False, True, False, True, True, False]
+    assert _contidas(chaves, ordenadas[:0]).tolist() == [False] * 6
+
+
+def test_descarta_registros_da_planilha_completa(planilhas):
+    # 200 registros que já estão na planilha completa e 100 novos
+    novos = ingerir_incremento(planilhas('delta.csv', slice(100, 300), slice(300, 400)), 'crimes_violentos')
+    assert len(novos) == 100
+
+
+def test_reingerir_o_mesmo_incremento(planilhas):
+    delta = planilhas('delta.csv', slice(250, 350))
+    assert len(ingerir_incremento(delta, 'crimes_violentos')) == 50
+    assert len(ingerir_incremento(delta, 'crimes_violentos')) == 0
+    assert len(leitura_dados._originais_incrementos(leitura_dados.CONJUNTOS['crimes_violentos'][0])) == 1
+
+
+def test_incremento_sobreposto_a_um_anterior(planilhas):
+    assert len(ingerir_incremento(planilhas('delta1.csv', slice(300, 400)), 'crimes_violentos')) == 100
+    # 50 do incremento anterior, 20 da planilha completa e 30 novos
+    segundo = planilhas('delta2.csv', slice(350, 400), slice(0, 20), slice(400, 430))
+    assert len(ingerir_incremento(segundo, 'crimes_violentos')) == 30
+
+    # A carga junta a planilha completa e os dois incrementos, sem repetições
+    df = leitura_dados._carregar_conjunto(leitura_dados.CONJUNTOS['crimes_violentos'][0],
+                                          ESQUEMA_CRIMES_VIOLENTOS)
+    assert len(df) == 430
+    assert not df.duplicated().any()
+
+
+def test_linhas_identicas_no_incremento(planilhas):
+    # Duas cópias de um registro da planilha completa e duas de um registro novo
+    delta = planilhas('delta.csv', slice(0, 1), slice(0, 1), slice(300, 301), slice(300, 301))
+    novos = ingerir_incremento(delta, 'crimes_violentos')
+    assert len(novos) == 2
+    assert novos.duplicated(keep=False).all()
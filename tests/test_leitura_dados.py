@@ -0,0 +1,48 @@
+# Testes da limpeza dos dados (leitura_dados)
+from datetime import time
+
+import pandas as pd
+
+import leitura_dados
+from leitura_dados import ESQUEMA_CRIMES_VIOLENTOS, _processar_planilha, converter_horas
+
+
+def test_horas_arredondadas_para_o_minuto_mais_proximo():
+    # O Excel guarda muitas horas alguns milissegundos antes da hora cheia
+    horas = pd.Series([time(19, 59, 59, 971000), 0.8333333, '19:59:59.971', '19:59:29',
+                       '2020-01-01 10:29:31', time(8, 0)])
+    minutos, invalidos = converter_horas(horas)
+    assert minutos.tolist() == [1200, 1200, 1200, 1199, 630, 480]
+    assert invalidos == 0
+
+
+def test_fim_do_dia_nao_passa_de_23_59():
+    minutos, invalidos = converter_horas(pd.Series([time(23, 59, 45), 0.999999, '23:59:59']))
+    assert minutos.tolist() == [1439, 1439, 1439]
+    assert invalidos == 0
+
+
+def test_fracoes_do_dia_em_coluna_numerica():
+    minutos, _ = converter_horas(pd.Series([0.8333333, 0.25, 0.0]))
+    assert minutos.tolist() == [1200, 360, 0]
+
+
+def test_horas_fora_do_intervalo_sao_invalidas():
+    minutos, invalidos = converter_horas(pd.Series(['25:00', '1930', 'abc', None]))
+    assert minutos.isna().tolist() == [True, False, True, True]
+    assert minutos[1] == 1170
+    assert invalidos == 2
+
+
+def test_relatorio_de_memoria_na_leitura_em_blocos(tmp_path, monkeypatch, capsys):
+    ler_em_blocos = leitura_dados.ler_em_blocos
+    monkeypatch.setattr(leitura_dados, 'ler_em_blocos', lambda caminho: ler_em_blocos(caminho, 40))
+    planilha = tmp_path / 'cvli.csv'
+    pd.DataFrame({'Município': ['Fortaleza', 'Caucaia'] * 50, 'Data': ['2020-01-01'] * 100,
+                  'Hora': ['19:59:59'] * 100}).to_csv(planilha, index=False)
+    df = _processar_planilha(str(planilha), ESQUEMA_CRIMES_VIOLENTOS)
+    assert len(df) == 100
+    saida = capsys.readouterr().out
+    # Um único relatório para a planilha inteira, não um por bloco
+    assert saida.count('Uso de memória por coluna') == 1
+    assert 'Municipio:' in saida
@@ -0,0 +1,117 @@
+# Testes dos mapas com um GeoJSON pequeno (tests/dados/municipios_teste.geojson):
+# Fortaleza com um buraco e lados cheios de vértices colineares, Caucaia em
+# duas partes (MultiPolygon), Maracanaú com acento e uma feição sem nome
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.figure import Figure
+
+import mapas
+from registro_graficos import graficos_mapa
+
+
+ARQUIVO_TESTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados', 'municipios_teste.geojson')
+
+
+@pytest.fixture
+def limites(tmp_path, monkeypatch):
+    """Mapas lendo o arquivo de teste, com o cache .npz em uma pasta temporária"""
+    monkeypatch.setattr(mapas, 'ARQUIVO_MUNICIPIOS', ARQUIVO_TESTE)
+    monkeypatch.setattr(mapas, 'DIRETORIO_PROJETO', str(tmp_path))
+    mapas._carregar_geometria.cache_clear()
+    yield tmp_path
+    mapas._carregar_geometria.cache_clear()
+
+
+@pytest.fixture
+def ocorrencias():
+    municipios = ['Fortaleza'] * 6 + ['CAUCAIA'] * 3 + ['Maracanau'] + ['Sobral'] * 2
+    ais = ['AIS 01'] * 3 + ['AIS 02'] * 3 + ['AIS 11'] * 3 + ['AIS 11'] + ['AIS 15'] * 2
+    return pd.DataFrame({'Municipio': municipios, 'AIS': ais})
+
+
+def _cores(dados, **opcoes):
+    ax = Figure().add_subplot()
+    mapas.mapa_municipios(dados, ax, **opcoes)
+    return ax.collections[0].get_array()
+
+
+def test_geometria_lida_do_geojson(limites):
+    geometria = mapas.carregar_geometria()
+    assert geometria.nomes == ['Fortaleza', 'Caucaia', 'Maracanaú']
+    np.testing.assert_array_equal(geometria.populacao, [2400000, 350000, 230000])
+    # Fortaleza: anel externo e buraco; Caucaia: duas partes
+    assert [len(caminho.to_polygons()) for caminho in geometria.caminhos] == [2, 2, 1]
+
+
+def test_simplificacao_remove_vertices_colineares(limites):
+    externo = mapas.carregar_geometria().caminhos[0].to_polygons()[0]
+    # 20 vértices nos lados do quadrado + fechamento; restam os 4 cantos
+    assert len(externo) == 5
+
+
+def test_buraco_orientado_ao_contrario_do_anel_externo(limites):
+    externo, buraco = mapas.carregar_geometria().caminhos[0].to_polygons()
+
+    def area(anel):
+        x, y = anel[:, 0], anel[:, 1]
+        return np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])
+
+    assert area(externo) > 0 > area(buraco)
+
+
+def test_cache_da_geometria(limites):
+    primeira = mapas.carregar_geometria()
+    cache = mapas._arquivo_cache_geometria(ARQUIVO_TESTE)
+    assert os.path.exists(cache)
+
+    mapas._carregar_geometria.cache_clear()
+    segunda = mapas.carregar_geometria()
+    assert segunda is not primeira
+    assert segunda.nomes == primeira.nomes
+    for a, b in zip(primeira.caminhos, segunda.caminhos):
+        np.testing.assert_array_equal(a.vertices, b.vertices)
+
+
+def test_mapa_por_municipio(limites, ocorrencias, capsys):
+    np.testing.assert_array_equal(_cores(ocorrencias), [6, 3, 1])
+    # Sobral não está no arquivo de limites
+    assert '1 municípios sem limites no mapa: Sobral' in capsys.readouterr().out
+
+
+def test_mapa_por_habitante(limites, ocorrencias):
+    np.testing.assert_allclose(_cores(ocorrencias, por_habitante=True),
+                               [6 / 24, 3 / 3.5, 1 / 2.3])
+
+
+def test_mapa_por_ais(limites, ocorrencias):
+    ax = Figure().add_subplot()
+    mapas.mapa_ais(ocorrencias, ax)
+    # Caucaia e Maracanaú formam a região da AIS 11; Fortaleza a das AIS 01 e 02
+    np.testing.assert_array_equal(ax.collections[0].get_array(), [6, 4, 4])
+
+
+def test_regioes_ais():
+    pares = pd.Series({('Fortaleza', 'AIS 01'): 100, ('Fortaleza', 'AIS 02'): 80,
+                       ('Caucaia', 'AIS 11'): 50, ('Maracanau', 'AIS 11'): 30,
+                       # Registro isolado com a AIS errada: abaixo da fração mínima
+                       ('Caucaia', 'AIS 01'): 1})
+    assert mapas.regioes_ais(pares) == {
+        'Fortaleza': ('AIS 01', 'AIS 02'),
+        'Caucaia': ('AIS 11',),
+        'Maracanau': ('AIS 11',),
+    }
+
+
+def test_sem_arquivo_de_limites(tmp_path, monkeypatch, ocorrencias):
+    ausente = str(tmp_path / 'ausente.geojson')
+    monkeypatch.setattr(mapas, 'ARQUIVO_MUNICIPIOS', ausente)
+    ax = Figure().add_subplot()
+    mapas.mapa_municipios(ocorrencias, ax)
+    assert not ax.collections
+    # Os mapas só entram nos menus quando o arquivo existe
+    assert graficos_mapa('crimes_violentos', 'cv', ausente) == []
+    assert [grafico.funcao for grafico in graficos_mapa('crimes_violentos', 'cv', ARQUIVO_TESTE)] == [
+        'mapa_municipio_cv', 'mapa_taxa_cv', 'mapa_ais_cv']
@@ -0,0 +1,89 @@
+# Testes dos DataFrames em memória compartilhada (memoria_compartilhada)
+import multiprocessing
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import gerar_crimes
+from memoria_compartilhada import _segmentos, anexar, liberar, publicar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def publicado():
+    df = gerar_crimes(1001, semente=11)
+    df['Texto'] = df['Municipio'].astype(str)
+    dados = publicar(df)
+    yield df, dados
+    liberar(dados)
+
+
+def _existe(nome):
+    try:
+        shared_memory.SharedMemory(name=nome).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+# Executada em outro processo: anexa o segmento e devolve um resumo dos dados
+def _resumo_anexado(dados):
+    df = anexar(dados)
+    return len(df), df['Municipio'].value_counts().to_dict(), int(df['Hora'].sum()), df.attrs
+
+
+def test_ida_e_volta(publicado):
+    df, dados = publicado
+    anexado = anexar(dados)
+    assert anexado.equals(df.reset_index(drop=True).assign(Texto=df['Texto'].astype('category')))
+    assert (anexado.dtypes.drop('Texto') == df.dtypes.drop('Texto')).all()
+    assert anexado.attrs == df.attrs
+
+
+def test_ida_e_volta_em_outro_processo(publicado):
+    df, dados = publicado
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        linhas, municipios, horas, attrs = pool.apply(_resumo_anexado, (dados,))
+    assert linhas == len(df)
+    assert municipios == df['Municipio'].value_counts().to_dict()
+    assert horas == int(df['Hora'].sum())
+    assert attrs == df.attrs
+    # O processo de renderização não remove o segmento ao terminar
+    assert _existe(dados.memoria)
+
+
+def test_colunas_somente_leitura_sobre_o_segmento(publicado):
+    _, dados = publicado
+    anexado = anexar(dados)
+    segmento = np.frombuffer(_segmentos[dados.memoria].buf, dtype='uint8')
+    vetores = [anexado['Municipio'].array.codes, anexado['Data'].to_numpy(),
+               anexado['Hora'].array._data, anexado['Hora'].array._mask]
+    for vetor in vetores:
+        assert np.shares_memory(vetor, segmento)
+        assert not vetor.flags.writeable
+        with pytest.raises(ValueError):
+            vetor[0] = vetor[1]
+    del segmento, vetores
+
+
+def test_liberar_remove_o_segmento():
+    dados = publicar(pd.DataFrame({'Valor': np.arange(10)}))
+    assert _existe(dados.memoria)
+    liberar(dados)
+    assert not _existe(dados.memoria)
+
+
+def test_segmento_removido_ao_terminar_o_processo():
+    # O processo publica e termina sem liberar: o atexit remove o segmento
+    codigo = ("import pandas as pd; from memoria_compartilhada import publicar; "
+              "print(publicar(pd.DataFrame({'Valor': range(10)})).memoria)")
+    nome = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True,
+                          check=True).stdout.strip()
+    assert nome
+    assert not _existe(nome)
@@ -0,0 +1,57 @@
+# Testes da geração em lote (relatorio_lote)
+import json
+import os
+from multiprocessing import shared_memory
+
+import pytest
+
+import relatorio_lote
+from registro_graficos import Grafico
+
+
+def _conjuntos(**dados):
+    return {nome: (lambda df=df: df) for nome, df in dados.items()}
+
+
+def test_sem_conjuntos_disponiveis(tmp_path, monkeypatch):
+    monkeypatch.setattr(relatorio_lote, 'DATASETS', _conjuntos(crimes_violentos=None))
+    saida = tmp_path / 'relatorios'
+    assert relatorio_lote.gerar_relatorio(str(saida)) == []
+    assert saida.is_dir()
+
+
+def test_grafico_com_erro_nao_interrompe_o_lote(tmp_path, monkeypatch, crimes):
+    monkeypatch.setattr(relatorio_lote, 'DATASETS', _conjuntos(crimes_violentos=crimes))
+    graficos = [Grafico("Ano", 'crimes_violentos', 'ano_cv'),
+                Grafico("Inexistente", 'crimes_violentos', 'grafico_inexistente'),
+                Grafico("Gênero", 'crimes_violentos', 'genero_cv')]
+    monkeypatch.setattr(relatorio_lote, 'todos_graficos',
+                        lambda: (('crimes_violentos', grafico) for grafico in graficos))
+
+    tempos = relatorio_lote.gerar_relatorio(str(tmp_path), processos=1)
+
+    assert [tempo['grafico'] for tempo in tempos] == ['ano_cv', 'grafico_inexistente', 'genero_cv']
+    assert [('erro' in tempo) for tempo in tempos] == [False, True, False]
+    for tempo in (tempos[0], tempos[2]):
+        assert all(os.path.exists(arquivo) for arquivo in tempo['arquivos'])
+    with open(tmp_path / 'tempos.json', encoding='utf-8') as f:
+        assert 'grafico_inexistente' in json.load(f)['graficos'][1]['erro']
+
+
+def test_dataframes_em_memoria_compartilhada(tmp_path, monkeypatch, crimes):
+    monkeypatch.setattr(relatorio_lote, 'DATASETS', _conjuntos(crimes_violentos=crimes))
+    graficos = [Grafico("Ano", 'crimes_violentos', 'ano_cv'), Grafico("Gênero", 'crimes_violentos', 'genero_cv')]
+    monkeypatch.setattr(relatorio_lote, 'todos_graficos',
+                        lambda: (('crimes_violentos', grafico) for grafico in graficos))
+    publicados = []
+    publicar = relatorio_lote.publicar
+    monkeypatch.setattr(relatorio_lote, 'publicar', lambda df: publicados.append(publicar(df)) or publicados[-1])
+
+    tempos = relatorio_lote.gerar_relatorio(str(tmp_path), processos=2, dataframe=True)
+
+    assert [('erro' in tempo) for tempo in tempos] == [False, False]
+    assert all(os.path.exists(arquivo) for tempo in tempos for arquivo in tempo['arquivos'])
+    # Os segmentos publicados são removidos ao final do lote
+    assert len(publicados) == 1
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=publicados[0].memoria)
@@ -0,0 +1,155 @@
+# Pandas e Numpy para o perfil das colunas
+import pandas as pd
+import numpy as np
+
+
+# Incrementar ao mudar o conteúdo do relatório
+VERSAO_RELATORIO = 1
+
+# Bits de endereço do HyperLogLog (2^14 registros, erro padrão de ~0,8%)
+BITS_HLL = 14
+
+# Abaixo desta estimativa a cardinalidade é contada de forma exata
+LIMITE_EXATO = 100000
+
+
+# Classe com o perfil de cada coluna de um conjunto de dados
+class RelatorioValidacao:
+    """Nulos, cardinalidade, mínimo/máximo e falhas de conversão por coluna.
+    Pode ser convertido para um dicionário (JSON), que é guardado em df.attrs
+    e, com ele, no cache do conjunto de dados."""
+
+    def __init__(self, linhas, colunas, versao=VERSAO_RELATORIO):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.versao = versao
+
+    def para_dict(self):
+        return {'versao': self.versao, 'linhas': self.linhas, 'colunas': self.colunas}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(dados['linhas'], dados['colunas'], dados.get('versao'))
+
+    def alertas(self):
+        """Colunas inteiramente nulas ou com mais de 5% de falhas de conversão"""
+        alertas = []
+        for coluna, perfil in self.colunas.items():
+            if self.linhas and perfil['nulos'] == self.linhas:
+                alertas.append(f"{coluna}: todos os valores são nulos")
+            elif perfil['taxa_falhas'] > 0.05:
+                alertas.append(f"{coluna}: {perfil['taxa_falhas']:.1%} dos valores não puderam ser convertidos")
+        return alertas
+
+    def texto(self):
+        linhas = [f"{self.linhas} registros",
+                  f"{'Coluna':<24} {'Tipo':<15} {'Nulos':>8} {'Distintos':>10} {'Falhas':>7}  Mínimo / Máximo"]
+        for coluna, perfil in self.colunas.items():
+            distintos = f"{'' if perfil['cardinalidade_exata'] else '~'}{perfil['cardinalidade']}"
+            faixa = f"{perfil['minimo']} / {perfil['maximo']}" if perfil['minimo'] is not None else ''
+            linhas.append(f"{coluna:<24} {perfil['tipo']:<15} {perfil['nulos']:>8} {distintos:>10} "
+                          f"{perfil['taxa_falhas']:>7.1%}  {faixa}")
+        linhas += self.alertas()
+        return "\n".join(linhas)
+
+    def __str__(self):
+        return self.texto()
+
+
+# Função para estimar o número de valores distintos a partir dos hashes
+def estimar_cardinalidade(hashes, bits=BITS_HLL):
+    """Estimativa HyperLogLog (com correção para cardinalidades pequenas)"""
+    if len(hashes) == 0:
+        return 0
+    m = 1 << bits
+    largura = 64 - bits
+    indices = (hashes >> np.uint64(largura)).astype(np.intp)
+    resto = hashes & np.uint64((1 << largura) - 1)
+    # Posição do primeiro bit 1 do resto (o float64 representa o resto com exatidão)
+    _, expoentes = np.frexp(resto.astype(np.float64))
+    posicoes = largura - expoentes + 1
+
+    # Maior posição de cada registro, sem laço em Python
+    ocorrencias = np.zeros((m, largura + 2), dtype=bool)
+    ocorrencias[indices, posicoes] = True
+    registros = np.where(ocorrencias.any(axis=1), largura + 1 - np.argmax(ocorrencias[:, ::-1], axis=1), 0)
+
+    alfa = 0.7213 / (1 + 1.079 / m)
+    estimativa = alfa * m * m / np.sum(np.exp2(-registros.astype(np.float64)))
+    vazios = np.count_nonzero(registros == 0)
+    if estimativa <= 2.5 * m and vazios:
+        estimativa = m * np.log(m / vazios)
+    return int(round(estimativa))
+
+
+# Função para calcular a cardinalidade de uma coluna (exata quando for barata)
+def _cardinalidade(serie, presentes):
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos = serie.cat.codes.to_numpy()
+        return int(np.count_nonzero(np.bincount(codigos[codigos >= 0], minlength=1))), True
+    hashes = pd.util.hash_pandas_object(serie[presentes], index=False).to_numpy()
+    estimativa = estimar_cardinalidade(hashes)
+    if estimativa <= LIMITE_EXATO:
+        return len(pd.unique(hashes)), True
+    return estimativa, False
+
+
+# Função para obter o mínimo e o máximo de colunas numéricas e de datas
+def _faixa(serie):
+    if pd.api.types.is_bool_dtype(serie):
+        return None, None
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        minimo, maximo = serie.min(), serie.max()
+        return (None, None) if pd.isna(minimo) else (minimo.isoformat(), maximo.isoformat())
+    if pd.api.types.is_numeric_dtype(serie):
+        minimo, maximo = serie.min(), serie.max()
+        return (None, None) if pd.isna(minimo) else (minimo.item(), maximo.item())
+    return None, None
+
+
+# Função para perfilar todas as colunas de um DataFrame
+def perfilar(df, falhas=None):
+    """Calcula o perfil de cada coluna em uma passada pelas colunas.
+
+    falhas é um dicionário {coluna: (valores que falharam na conversão,
+    valores presentes antes da conversão)}, acumulado durante a limpeza."""
+    falhas = falhas or {}
+    colunas = {}
+    for coluna in df.columns:
+        serie = df[coluna]
+        presentes = serie.notna().to_numpy()
+        nulos = int(len(serie) - np.count_nonzero(presentes))
+        cardinalidade, exata = _cardinalidade(serie, presentes)
+        minimo, maximo = _faixa(serie)
+        falhou, convertidos = falhas.get(coluna, (0, 0))
+        colunas[str(coluna)] = {
+            'tipo': str(serie.dtype),
+            'nulos': nulos,
+            'percentual_nulos': round(nulos / len(serie), 4) if len(serie) else 0.0,
+            'cardinalidade': int(cardinalidade),
+            'cardinalidade_exata': exata,
+            'minimo': minimo,
+            'maximo': maximo,
+            'falhas_conversao': int(falhou),
+            'taxa_falhas': round(falhou / convertidos, 4) if convertidos else 0.0,
+        }
+    return RelatorioValidacao(len(df), colunas)
+
+
+# Função para obter o relatório de validação de um conjunto de dados carregado
+def relatorio_validacao(df):
+    """Usa o relatório guardado em df.attrs (calculado na limpeza e mantido no
+    cache). Se os dados mudaram desde então (incrementos, filtros), o perfil é
+    recalculado, mantendo as falhas de conversão registradas na limpeza."""
+    if df is None:
+        return None
+    guardado = df.attrs.get('validacao')
+    if guardado and guardado.get('versao') == VERSAO_RELATORIO and guardado.get('linhas') == len(df):
+        return RelatorioValidacao.de_dict(guardado)
+
+    falhas = {}
+    if guardado:
+        for coluna, perfil in guardado.get('colunas', {}).items():
+            if perfil.get('taxa_falhas'):
+                falhas[coluna] = (perfil['falhas_conversao'], perfil['falhas_conversao'] / perfil['taxa_falhas'])
+    return perfilar(df, falhas)